@@ -35,13 +35,29 @@ add further test cases in this file to improve your confidence in your code.
 Tip: if you put your mouse inside a pytest function and right click, the "run"
 menu will give you the option of running just that test function.
 """
+import copy
+import json
+import random
+import time
 import pytest
-from typing import Dict
+from typing import Dict, Any
 from distance_map import DistanceMap
 from domain import Truck, Parcel, Fleet
-from scheduler import GreedyScheduler
+from scheduler import GreedyScheduler, ChangeSet
 from container import PriorityQueue, _shorter
-from experiment import SchedulingExperiment
+from experiment import SchedulingExperiment, cached_run, read_distance_map, \
+    COMPRESSED_FORMATS, load_inputs, build_fleet, fleet_stats
+from city_registry import CityRegistry
+from shared_data import SharedProblem, apply_allocation, schedule_shared
+from cache import ResultCache, experiment_key
+from array_fleet import ArrayFleet
+from snapshot import SnapshotStore
+from explore import ALGORITHM_CONFIGURATIONS, run_configurations
+import cli
+from allocation_writer import read_allocations
+from improve import LocalSearch, improve
+from geo_distance_map import GeoDistanceMap
+from csr_distance_map import CSRDistanceMap
 
 # This variable is used in the special pytest test case defined by function
 # test_experiment below.  The variable defines a single scheduling experiment
@@ -302,6 +318,755 @@ def test_greedy_scheduler_example() -> None:
     assert truck_parcels[3] == [21, 13]
 
 
+def _write_problem(directory: Any) -> Dict[str, str]:
+    """Write a small scheduling problem into <directory> and return a greedy
+    configuration for it."""
+    parcel_file = directory / 'parcels.txt'
+    parcel_file.write_text('1, Toronto, Hamilton, 5\n2, Toronto, London, 10\n'
+                           '3, Toronto, Hamilton, 4\n4, Toronto, Guelph, 8\n'
+                           '5, Toronto, London, 30\n')
+    truck_file = directory / 'trucks.txt'
+    truck_file.write_text('1, 20\n2, 15\n')
+    map_file = directory / 'map.txt'
+    map_file.write_text('Toronto, Hamilton, 9\nToronto, London, 20, 21\n'
+                        'Toronto, Guelph, 7\nHamilton, London, 12\n'
+                        'Hamilton, Guelph, 6\nLondon, Guelph, 11\n')
+    return {'depot_location': 'Toronto',
+            'parcel_file': str(parcel_file),
+            'truck_file': str(truck_file),
+            'map_file': str(map_file),
+            'algorithm': 'greedy',
+            'parcel_priority': 'volume',
+            'parcel_order': 'non-increasing',
+            'truck_order': 'non-increasing',
+            'verbose': False}
+
+
+def test_result_cache_hit_and_eviction(tmp_path: Any) -> None:
+    """Test that a cached experiment is not rerun, and that old entries are
+    evicted once the cache is full."""
+    config = _write_problem(tmp_path)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    first = cached_run(config, cache)
+    assert cache.counters()['misses'] == 1
+    assert cached_run(config, cache) == first
+    assert cache.hits == 1
+
+    other = dict(config, truck_order='non-decreasing')
+    cached_run(other, cache)
+    assert len(cache) == 2
+    small = ResultCache(str(tmp_path / 'cache'), max_bytes=1)
+    assert len(small) == 2
+    small.put('extra', first)
+    assert len(small) == 1 and small.evictions == 2
+
+
+def test_route_trie_shares_prefixes() -> None:
+    """Test that trucks in a Fleet share route prefixes, and that their
+    distances match walking each route leg by leg."""
+    m = DistanceMap()
+    m.add_distance('Toronto', 'Hamilton', 9)
+    m.add_distance('Hamilton', 'London', 12)
+    m.add_distance('London', 'Toronto', 20)
+    m.add_distance('Hamilton', 'Guelph', 6)
+    m.add_distance('Guelph', 'Toronto', 7)
+    f = Fleet()
+    trucks = [Truck(i, 100, 'Toronto') for i in range(3)]
+    for truck in trucks:
+        f.add_truck(truck)
+        truck.pack(Parcel(truck.id_, 1, 'Toronto', 'Hamilton'))
+    trucks[0].pack(Parcel(10, 1, 'Toronto', 'London'))
+    trucks[1].pack(Parcel(11, 1, 'Toronto', 'Guelph'))
+    assert f._routes.num_nodes() == 4
+    assert f.route_distances(m) == {0: 41, 1: 22, 2: 18}
+    loose = Truck(9, 100, 'Toronto')
+    loose.route = list(trucks[0].route)
+    assert loose.distance(m) == trucks[0].distance(m)
+    m.add_distance('Hamilton', 'London', 2)
+    assert trucks[0].distance(m) == 31
+
+    copied = copy.deepcopy(f)
+    assert copied.route_distances(m) == f.route_distances(m)
+
+    # Prefixes that no route needs any more are pruned.
+    trucks[0].unpack(trucks[0].parcels[-1])
+    f.remove_truck(trucks[1])
+    assert f._routes.num_nodes() == 2
+
+
+def test_fleet_aggregates_follow_packing() -> None:
+    """Test that the fleet statistics stay correct while trucks are packed,
+    including before and after the distances are first asked for."""
+    m = DistanceMap()
+    m.add_distance('Toronto', 'Hamilton', 9)
+    m.add_distance('Toronto', 'London', 20)
+    m.add_distance('Hamilton', 'London', 12)
+    f = Fleet()
+    early = Truck(7, 10, 'Toronto')
+    early.pack(Parcel(70, 4, 'Toronto', 'London'))
+    f.add_truck(early)
+    trucks = [Truck(i, 10 + i, 'Toronto') for i in range(4)]
+    for truck in trucks:
+        f.add_truck(truck)
+    assert f.num_nonempty_trucks() == 1
+    assert f.total_distance_travelled(m) == 40
+    cities = ['Hamilton', 'London']
+    for i in range(12):
+        trucks[i % 3].pack(Parcel(i, 3, 'Toronto', cities[i % 2]))
+        used = [t for t in f.trucks if t.stored > 0]
+        assert f.num_nonempty_trucks() == len(used)
+        assert f.total_unused_space() == sum(t.volume_capacity - t.stored
+                                             for t in used)
+        assert f.average_fullness() == pytest.approx(
+            sum(t.fullness() for t in used) / len(used))
+        assert f.total_distance_travelled(m) == sum(t.distance(m)
+                                                    for t in f.trucks)
+        assert f.average_distance_travelled(m) == pytest.approx(
+            f.total_distance_travelled(m) / len(used))
+
+
+@pytest.mark.parametrize('truck_order', ['non-decreasing', 'non-increasing'])
+@pytest.mark.parametrize('routing', [None, 'insertion'])
+def test_array_fleet_matches_fleet(tmp_path: Any, truck_order: str,
+                                   routing: str) -> None:
+    """Test that an experiment on an ArrayFleet gives the same statistics and
+    allocations as one on a Fleet of Truck objects, when stops are inserted
+    mid-route and when parcels are unpacked and trucks removed to
+    reschedule."""
+    config = dict(_write_problem(tmp_path), truck_order=truck_order,
+                  routing=routing)
+    plain = SchedulingExperiment(config)
+    arrays = SchedulingExperiment(dict(config, fleet_backend='array'))
+    assert isinstance(arrays.fleet, ArrayFleet)
+    assert arrays.run() == plain.run()
+    for rescheduled in (False, True):
+        if rescheduled:
+            cancelled = plain.fleet.trucks[-1].parcels[0].id_
+            assert arrays.reschedule(ChangeSet(
+                [Parcel(6, 1, 'Toronto', 'Guelph')], [cancelled], [1])) == \
+                pytest.approx(plain.reschedule(ChangeSet(
+                    [Parcel(6, 1, 'Toronto', 'Guelph')], [cancelled], [1])))
+        assert arrays.fleet.parcel_allocations() == \
+            plain.fleet.parcel_allocations()
+        for view, truck in zip(arrays.fleet.trucks, plain.fleet.trucks):
+            assert view.route == truck.route
+            assert [p.id_ for p in view.parcels] == \
+                [p.id_ for p in truck.parcels]
+            assert arrays.fleet._loads[view._index].typecode == 'q'
+
+
+def test_city_names_are_interned(tmp_path: Any) -> None:
+    """Test that an experiment shares one str object per city name across
+    its parcels, trucks and distance map."""
+    experiment = SchedulingExperiment(_write_problem(tmp_path))
+    experiment.run()
+    names = {}
+    for parcel in experiment.parcels:
+        for city in (parcel.source, parcel.destination):
+            assert names.setdefault(city, city) is city
+    for truck in experiment.fleet.trucks:
+        for city in truck.route:
+            assert names.setdefault(city, city) is city
+    for city in experiment.dmap._distances:
+        assert names.setdefault(city, city) is city
+    assert len(experiment.cities) == len(names) == 4
+
+
+def test_distance_map_from_edges_matches_add_distance() -> None:
+    """Test that DistanceMap.from_edges keeps the rule that only the first
+    write to the reverse direction counts."""
+    rng = random.Random(148)
+    cities = ['A', 'B', 'C', 'D']
+    edges = [(rng.choice(cities), rng.choice(cities), rng.randint(1, 9),
+              rng.choice([-1, rng.randint(1, 9)])) for _ in range(60)]
+    expected = DistanceMap()
+    for edge in edges:
+        expected.add_distance(*edge)
+    actual = DistanceMap.from_edges(edges)
+    for a in cities:
+        for b in cities:
+            assert actual.distance(a, b) == expected.distance(a, b)
+
+
+def test_read_distance_map_in_bulk(tmp_path: Any) -> None:
+    """Test reading a map file with one and two distances per line."""
+    path = tmp_path / 'map.txt'
+    path.write_text('Toronto, Hamilton, 9\nToronto, London, 20, 21\n'
+                    'London, Toronto, 30\n\n')
+    m = read_distance_map(str(path))
+    assert m.distance('Hamilton', 'Toronto') == 9
+    assert m.distance('London', 'Toronto') == 30
+    assert m.distance('Toronto', 'London') == 20
+
+
+def test_snapshots_skip_parsing_until_file_changes(tmp_path: Any) -> None:
+    """Test that a second experiment loads its inputs from snapshots, and
+    that changing an input file invalidates its snapshot."""
+    config = dict(_write_problem(tmp_path), snapshots=True)
+    store = SnapshotStore(verify='hash')
+    first = SchedulingExperiment(config, store).run()
+    assert (store.hits, store.misses) == (0, 3)
+    second = SchedulingExperiment(config, store)
+    assert second.run() == first
+    assert (store.hits, store.misses) == (3, 3)
+    assert second.cities.intern('Hamilton') is second.parcels[0].destination
+
+    with open(config['truck_file'], 'a') as file:
+        file.write('3, 40\n')
+    third = SchedulingExperiment(config, store)
+    assert third.fleet.num_trucks() == 3
+    assert store.report()['hit_rate'] == pytest.approx(5 / 9)
+
+
+def test_cli_run_and_compare_print_json(tmp_path: Any, capsys: Any) -> None:
+    """Test that the command-line entry point prints json statistics and
+    timings."""
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps(_write_problem(tmp_path)))
+    assert cli.main(['run', str(config_file)]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output['stats']['fleet'] == 2
+    assert 'import_seconds' in output['timing']
+
+    # A memory budget only applies to the greedy algorithm.
+    random_file = tmp_path / 'random.json'
+    random_file.write_text(json.dumps(dict(_write_problem(tmp_path),
+                                           algorithm='random',
+                                           memory_budget=2)))
+    assert cli.main(['run', str(random_file)]) == 0
+    assert 'spill' not in json.loads(capsys.readouterr().out)
+
+    assert cli.main(['compare', str(config_file)]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert len(output['results']) == len(ALGORITHM_CONFIGURATIONS)
+
+    assert cli.main(['compare', str(config_file), '--workers', '2']) == 0
+    shared = json.loads(capsys.readouterr().out)
+    assert [row['config'] for row in shared['results']] == \
+        [row['config'] for row in output['results']]
+    for row, expected in zip(shared['results'], output['results']):
+        assert row['stats']['fleet'] == expected['stats']['fleet']
+
+
+def test_greedy_scheduler_grouped_by_destination() -> None:
+    """Test that grouped packing fills the chosen truck with a destination's
+    parcels before choosing another truck."""
+    parcels = [Parcel(17, 25, 'York', 'Toronto'),
+               Parcel(21, 10, 'York', 'London'),
+               Parcel(13, 8, 'York', 'London'),
+               Parcel(42, 20, 'York', 'Toronto'),
+               Parcel(25, 15, 'York', 'Toronto'),
+               Parcel(61, 15, 'York', 'Hamilton'),
+               Parcel(76, 20, 'York', 'London')]
+    f = Fleet()
+    for id_, capacity in [(1, 40), (2, 40), (3, 25)]:
+        f.add_truck(Truck(id_, capacity, 'York'))
+    scheduler = GreedyScheduler({'parcel_priority': 'destination',
+                                 'parcel_order': 'non-increasing',
+                                 'truck_order': 'non-increasing',
+                                 'group_by_destination': True})
+    unscheduled = scheduler.schedule(parcels, f.trucks)
+    assert [p.id_ for p in unscheduled] == [76]
+    assert f.parcel_allocations() == {1: [17, 61], 2: [42, 25], 3: [21, 13]}
+    assert [t.route for t in f.trucks] == [['York', 'Toronto', 'Hamilton'],
+                                          ['York', 'Toronto'],
+                                          ['York', 'London']]
+
+
+def test_insertion_routing_never_lengthens_routes(tmp_path: Any) -> None:
+    """Test that cheapest-insertion routing schedules the same parcels as the
+    plain greedy scheduler, without longer routes, and that the fleet's
+    route trie and totals follow the inserted stops."""
+    config = _write_problem(tmp_path)
+    plain = SchedulingExperiment(config)
+    inserted = SchedulingExperiment(dict(config, routing='insertion'))
+    plain_stats = plain.run()
+    inserted_stats = inserted.run()
+    assert inserted_stats['unscheduled'] == plain_stats['unscheduled']
+    assert inserted_stats['avg_distance'] <= plain_stats['avg_distance']
+    for truck in inserted.fleet.trucks:
+        destinations = {p.destination for p in truck.parcels}
+        assert set(truck.route[1:]) == destinations
+        assert len(truck.route) == len(set(truck.route))
+        walked = Truck(truck.id_, truck.volume_capacity, truck.depot)
+        walked.route = list(truck.route)
+        assert truck.distance(inserted.dmap) == walked.distance(inserted.dmap)
+    assert inserted.fleet.total_distance_travelled(inserted.dmap) == sum(
+        t.distance(inserted.dmap) for t in inserted.fleet.trucks)
+
+
+def test_local_search_merges_trucks() -> None:
+    """Test that relocating a parcel onto a truck already going to its
+    destination frees a truck, and that the fleet totals follow."""
+    dmap = DistanceMap()
+    dmap.add_distance('Toronto', 'Hamilton', 9)
+    fleet = Fleet()
+    for id_ in (1, 2):
+        truck = Truck(id_, 10, 'Toronto')
+        fleet.add_truck(truck)
+        truck.pack(Parcel(id_, 3, 'Toronto', 'Hamilton'))
+    search = LocalSearch(fleet, [Parcel(3, 20, 'Toronto', 'Hamilton')], dmap)
+    assert search.objective() == (20, 2, 36)
+    telemetry = search.run(float('inf'))
+    assert telemetry[-1][1] == search.objective() == (20, 1, 18)
+    assert fleet.num_nonempty_trucks() == 1
+    assert fleet.total_distance_travelled(dmap) == 18
+
+
+def test_improve_keeps_a_valid_schedule(tmp_path: Any) -> None:
+    """Test that the improvement phase never makes the schedule worse, leaves
+    the greedy fleet untouched, and returns a consistent fleet."""
+    experiment = SchedulingExperiment(_write_problem(tmp_path))
+    experiment.run()
+    greedy = experiment.fleet
+    before = [list(t.route) for t in greedy.trucks]
+    unscheduled = experiment._unscheduled
+    start = (sum(p.volume for p in unscheduled), greedy.num_nonempty_trucks(),
+             greedy.total_distance_travelled(experiment.dmap))
+    for workers in (0, 2):
+        result = improve(greedy, unscheduled, experiment.dmap, 0.2,
+                         restarts=2, workers=workers)
+        assert result.objective <= start
+        assert len(result.telemetry) == 2
+        assert [list(t.route) for t in greedy.trucks] == before
+        for truck in result.fleet.trucks:
+            assert truck.stored <= truck.volume_capacity
+            assert set(truck.route[1:]) == {p.destination
+                                            for p in truck.parcels}
+        assert result.objective[2] == sum(
+            t.distance(experiment.dmap) for t in result.fleet.trucks)
+
+
+def test_anytime_scheduler_meets_deadline(tmp_path: Any) -> None:
+    """Test that an experiment with a deadline finishes by it, with a
+    schedule no worse than the greedy one it starts from, and that trucks
+    scheduled outside their fleet are left where they were."""
+    config = _write_problem(tmp_path)
+    greedy = SchedulingExperiment(config).run()
+    experiment = SchedulingExperiment(dict(config, deadline_seconds=0.2))
+    start = time.monotonic()
+    stats = experiment.run()
+    assert time.monotonic() - start < 1.0
+    trucks = experiment.fleet.trucks[:1]
+    experiment.scheduler.schedule([Parcel(9, 1, 'Toronto', 'Guelph')], trucks)
+    assert trucks[0]._fleet is experiment.fleet
+    loose = Truck(9, 10, 'Toronto')
+    assert experiment.scheduler.schedule(
+        [Parcel(10, 1, 'Toronto', 'Guelph')], [loose]) == []
+    assert loose._fleet is None and loose.route == ['Toronto', 'Guelph']
+    # Progress is reported even when no parcel fits on any truck.
+    small = Truck(10, 1, 'Toronto')
+    too_big = Parcel(11, 5, 'Toronto', 'Guelph')
+    assert experiment.scheduler.schedule([too_big], [small], True) == \
+        [too_big]
+    assert stats['unscheduled'] <= greedy['unscheduled']
+    assert stats['fleet'] - stats['unused_trucks'] <= \
+        greedy['fleet'] - greedy['unused_trucks']
+    for truck in experiment.fleet.trucks:
+        assert truck.stored <= truck.volume_capacity
+        assert set(truck.route[1:]) == {p.destination for p in truck.parcels}
+
+
+def test_optimal_is_never_beaten(tmp_path: Any) -> None:
+    """Test that the optimal row of explore leaves no more unscheduled volume,
+    and uses no more trucks when it ties, than any greedy configuration."""
+    config = _write_problem(tmp_path)
+    rows = {}
+    for run_config, _ in run_configurations(config, optimal=True):
+        if run_config['algorithm'] == 'random':
+            # RandomScheduler may pick a truck without room for a parcel
+            # and drop it, so its unscheduled volume is not comparable.
+            continue
+        experiment = SchedulingExperiment(run_config)
+        experiment.run()
+        rows[(run_config['algorithm'], run_config['parcel_priority'],
+              run_config['parcel_order'], run_config['truck_order'])] = (
+            sum(p.volume for p in experiment._unscheduled),
+            experiment.fleet.num_nonempty_trucks())
+        if run_config['algorithm'] == 'optimal':
+            assert experiment.scheduler.proven_optimal
+    best = rows[('optimal', 'NA', 'NA', 'NA')]
+    assert all(best <= value for value in rows.values())
+
+
+def test_rollback_restores_trucks_and_totals() -> None:
+    """Test that rolling back to a savepoint undoes packing and unpacking,
+    including stops inserted mid-route and reversed routes, and restores
+    the fleet totals, while changes kept by an inner savepoint still roll
+    back with the outer one."""
+    dmap = DistanceMap()
+    dmap.add_distance('Toronto', 'Hamilton', 9)
+    dmap.add_distance('Toronto', 'London', 20)
+    dmap.add_distance('Hamilton', 'London', 12)
+    fleet = Fleet()
+    t1, t2 = Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')
+    fleet.add_truck(t1)
+    fleet.add_truck(t2)
+    p1 = Parcel(1, 4, 'Toronto', 'London')
+    p2 = Parcel(2, 3, 'Toronto', 'Hamilton')
+    t1.pack(p1)
+    t1.pack(p2)
+    before = ([list(t.route) for t in fleet.trucks],
+              [list(t.parcels) for t in fleet.trucks],
+              fleet.total_distance_travelled(dmap),
+              fleet.num_nonempty_trucks(), fleet.average_fullness())
+    outer = fleet.savepoint()
+    assert t1.unpack(p1)
+    assert t2.pack(p1)
+    inner = fleet.savepoint()
+    assert t2.pack(p2, 1)
+    assert t1.unpack(p2)
+    fleet.release(inner)
+    assert t2.route == ['Toronto', 'Hamilton', 'London']
+    assert fleet.num_nonempty_trucks() == 1
+    t2.reverse(1, 2)
+    assert t2.route == ['Toronto', 'London', 'Hamilton']
+    fleet.rollback(outer)
+    fleet.release(outer)
+    assert ([list(t.route) for t in fleet.trucks],
+            [list(t.parcels) for t in fleet.trucks],
+            fleet.total_distance_travelled(dmap),
+            fleet.num_nonempty_trucks(), fleet.average_fullness()) == before
+    assert fleet.total_distance_travelled(dmap) == sum(
+        t.distance(dmap) for t in fleet.trucks)
+
+
+def test_reschedule_repairs_only_touched_trucks(tmp_path: Any) -> None:
+    """Test that rescheduling after cancellations, additions and a breakdown
+    keeps every remaining parcel scheduled at most once, leaves untouched
+    trucks alone, and keeps the fleet totals right."""
+    experiment = SchedulingExperiment(_write_problem(tmp_path))
+    experiment.run()
+    broken, kept = experiment.fleet.trucks
+    kept_before = [p.id_ for p in kept.parcels]
+    cancelled = broken.parcels[0].id_
+    stats = experiment.reschedule(ChangeSet(
+        [Parcel(6, 1, 'Toronto', 'Guelph')], [cancelled], [broken.id_]))
+    assert experiment.fleet.trucks == [kept]
+    assert [p.id_ for p in kept.parcels][:len(kept_before)] == kept_before
+    scheduled = [p.id_ for p in kept.parcels]
+    unscheduled = [p.id_ for p in experiment._unscheduled]
+    assert sorted(scheduled + unscheduled) == \
+        sorted({1, 2, 3, 4, 5, 6} - {cancelled})
+    assert stats['fleet'] == 1
+    assert stats['unscheduled'] == len(unscheduled)
+    assert experiment.fleet.total_distance_travelled(experiment.dmap) == \
+        kept.distance(experiment.dmap)
+    with pytest.raises(ValueError):
+        experiment.reschedule(ChangeSet([], [], [broken.id_]))
+    assert experiment.fleet.trucks == [kept]
+
+
+def test_shared_memory_workers_match_serial_runs(tmp_path: Any) -> None:
+    """Test that scheduling over shared memory gives the same statistics as
+    running the configurations one by one, for every configuration: in
+    worker processes, and in this process with the random algorithm seeded
+    alike, so that its reordering of the parcels is covered too."""
+    config = _write_problem(tmp_path)
+    serial = list(run_configurations(config))
+    shared = list(run_configurations(config, workers=2))
+    assert [c for c, _ in shared] == [c for c, _ in serial]
+    for (run_config, expected), (_, actual) in zip(serial, shared):
+        assert actual['fleet'] == expected['fleet']
+        # Worker processes draw their own random numbers.
+        if run_config['algorithm'] != 'random':
+            assert actual == expected
+
+    parcels, fleet, dmap = load_inputs(config, CityRegistry())
+    rows = [(truck.id_, truck.volume_capacity) for truck in fleet.trucks]
+    with SharedProblem(parcels, dmap) as problem:
+        for run_config, _ in serial:
+            random.seed(148)
+            expected = SchedulingExperiment(run_config).run(report=False)
+            random.seed(148)
+            allocation = schedule_shared(problem.handle, run_config, rows)
+            flt = build_fleet(rows, 'Toronto')
+            savepoint = flt.savepoint()
+            unscheduled = apply_allocation(flt, parcels, problem.handle.cities,
+                                           allocation)
+            assert fleet_stats(flt, dmap, unscheduled) == expected
+            flt.rollback(savepoint)
+            assert all(t.route == ['Toronto'] and not t.parcels
+                       for t in flt.trucks)
+            assert flt.trucks_visiting('London') == []
+
+
+def test_memory_budget_matches_in_memory_order(tmp_path: Any) -> None:
+    """Test that ordering parcels by external merge sort spills to disk but
+    schedules exactly as ordering them in memory does, ties included, with
+    the experiment's own parcels, in this process and in worker processes."""
+    config = dict(_write_problem(tmp_path), parcel_priority='destination',
+                  parcel_order='non-decreasing')
+    expected = SchedulingExperiment(config)
+    stats = expected.run()
+    bounded = SchedulingExperiment(dict(config, memory_budget=2,
+                                        spill_directory=str(tmp_path)))
+    assert bounded.run() == stats
+    for truck, same in zip(bounded.fleet.trucks, expected.fleet.trucks):
+        assert [p.id_ for p in truck.parcels] == [p.id_ for p in same.parcels]
+        assert truck.route == same.route
+    assert bounded.scheduler.spill_report()['spilled_items'] == 5
+    assert bounded.scheduler.spill_report()['spilled_bytes'] > 0
+    assert sorted(tmp_path.iterdir()) == sorted(
+        tmp_path / name for name in ('parcels.txt', 'trucks.txt', 'map.txt'))
+    mine = {id(p) for p in bounded.parcels}
+    assert all(id(p) in mine for t in bounded.fleet.trucks for p in t.parcels)
+    bounded_config = dict(config, memory_budget=2)
+    serial = list(run_configurations(bounded_config))
+    shared = list(run_configurations(bounded_config, workers=2))
+    assert [s for c, s in shared if c['algorithm'] == 'greedy'] == \
+        [s for c, s in serial if c['algorithm'] == 'greedy']
+
+
+@pytest.mark.parametrize('format_', ['ndjson', 'binary'])
+def test_allocation_export(tmp_path: Any, format_: str) -> None:
+    """Test that the CSR export, the streaming iterator and the streamed
+    allocation file all agree with parcel_allocations, and that the fleet
+    stops writing to the file once the run is over."""
+    output = str(tmp_path / 'allocations.out')
+    experiment = SchedulingExperiment(dict(
+        _write_problem(tmp_path), allocation_output=output,
+        allocation_format=format_))
+    experiment.run()
+    fleet = experiment.fleet
+    allocations = fleet.parcel_allocations()
+    truck_ids, offsets, parcel_ids = fleet.allocation_csr()
+    assert list(truck_ids) == list(allocations)
+    assert list(offsets) == [0, len(allocations[1]),
+                             len(allocations[1]) + len(allocations[2])]
+    assert list(parcel_ids) == allocations[1] + allocations[2]
+    assert list(fleet.iter_allocations()) == [
+        (truck_id, parcel_id) for truck_id in allocations
+        for parcel_id in allocations[truck_id]]
+    streamed = {truck_id: [] for truck_id in allocations}
+    for truck_id, parcel_id, packed in read_allocations(output, format_):
+        assert packed
+        streamed[truck_id].append(parcel_id)
+    assert streamed == allocations
+    experiment.reschedule(ChangeSet([Parcel(6, 1, 'Toronto', 'Guelph')],
+                                    [1], []))
+    streamed = {truck_id: [] for truck_id in allocations}
+    for truck_id, parcel_id, packed in read_allocations(output, format_):
+        assert packed
+        streamed[truck_id].append(parcel_id)
+    assert streamed == allocations
+    assert experiment.fleet._watchers == []
+
+
+def test_fleet_lookup_indexes_follow_changes() -> None:
+    """Test that the truck and parcel lookups of a fleet stay up to date
+    through packing, unpacking, rollback, removing a truck and pickling."""
+    fleet = Fleet()
+    t1, t2 = Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')
+    fleet.add_truck(t1)
+    fleet.add_truck(t2)
+    p1 = Parcel(1, 4, 'Toronto', 'London')
+    p2 = Parcel(2, 3, 'Toronto', 'Hamilton')
+    t1.pack(p1)
+    t2.pack(p2)
+    assert fleet.truck_by_id(2) is t2
+    assert fleet.truck_carrying(1) is t1
+    sp = fleet.savepoint()
+    t1.unpack(p1)
+    t2.pack(p1)
+    assert fleet.truck_carrying(1) is t2
+    fleet.rollback(sp)
+    fleet.release(sp)
+    assert fleet.truck_carrying(1) is t1
+    copied = copy.deepcopy(fleet)
+    assert copied.truck_carrying(2) is copied.trucks[1]
+    fleet.remove_truck(t2)
+    assert fleet.truck_by_id(2) is None
+    assert fleet.truck_carrying(2) is None
+    array_fleet = ArrayFleet()
+    array_fleet.add_truck(t1)
+    view = array_fleet.new_truck(3, 10, 'Toronto')
+    view.pack(p2)
+    assert array_fleet.truck_by_id(3) is view
+    assert array_fleet.truck_carrying(1) is array_fleet.truck_by_id(1)
+    assert array_fleet.truck_carrying(2) is view
+
+
+def test_prefer_on_route_adds_no_repeat_stops() -> None:
+    """Test that the city index of a fleet matches its trucks' routes through
+    scheduling and rollback, and that preferring trucks already routed
+    through a parcel's destination never makes a route stop twice at a city.
+    """
+    rng = random.Random(45)
+    cities = ['Hamilton', 'London', 'Guelph', 'Ottawa', 'Kingston']
+    config = {'parcel_priority': 'volume', 'parcel_order': 'non-increasing',
+              'truck_order': 'non-increasing', 'prefer_on_route': True}
+    for _ in range(20):
+        fleet = Fleet()
+        for i in range(4):
+            fleet.add_truck(Truck(i, rng.randint(10, 40), 'Toronto'))
+        parcels = [Parcel(i, rng.randint(1, 10), 'Toronto', rng.choice(cities))
+                   for i in range(30)]
+        sp = fleet.savepoint()
+        GreedyScheduler(config).schedule(parcels, fleet.trucks)
+        for truck in fleet.trucks:
+            assert len(set(truck.route[1:])) == len(truck.route) - 1
+        for city in cities:
+            assert sorted(t.id_ for t in fleet.trucks_visiting(city)) == \
+                [t.id_ for t in fleet.trucks if city in t.route[1:]]
+        fleet.rollback(sp)
+        fleet.release(sp)
+        assert all(not fleet.trucks_visiting(city) for city in cities)
+
+
+def test_simulation_delivers_every_scheduled_parcel(tmp_path: Any) -> None:
+    """Test that simulating a scheduled experiment delivers each scheduled
+    parcel, and brings each truck home after the time its route takes."""
+    experiment = SchedulingExperiment(_write_problem(tmp_path))
+    stats = experiment.run()
+    result = experiment.simulate(speed=2.0)
+    assert result.delivered[-1] == 5 - stats['unscheduled']
+    assert result.on_road[-1] == 0
+    assert list(result.times) == sorted(set(result.times))
+    assert list(result.delivered) == sorted(result.delivered)
+    for truck, back in zip(experiment.fleet.trucks, result.return_times):
+        assert back == truck.distance(experiment.dmap) / 2.0
+    assert result.makespan() == max(result.return_times)
+
+
+def test_many_parcel_files_match_one(tmp_path: Any) -> None:
+    """Test that parcels split over several files, named by a list or a glob,
+    are read in a deterministic order into the same experiment as one file,
+    with an ingest report for each file."""
+    config = _write_problem(tmp_path)
+    lines = (tmp_path / 'parcels.txt').read_text().splitlines(True)
+    parts = []
+    for i in range(0, len(lines), 2):
+        part = tmp_path / f'part-{i // 2}.txt'
+        part.write_text(''.join(lines[i:i + 2]))
+        parts.append(str(part))
+    single = SchedulingExperiment(config)
+    expected = single.run()
+    for spec in (parts, str(tmp_path / 'part-*.txt')):
+        expt = SchedulingExperiment(dict(config, parcel_file=spec,
+                                         ingest_workers=3))
+        assert [p.id_ for p in expt.parcels] == [1, 2, 3, 4, 5]
+        assert expt.run() == expected
+        assert [f['file'] for f in expt.ingest['files']] == parts
+        assert [f['parcels'] for f in expt.ingest['files']] == [2, 2, 1]
+        assert expt.ingest['parcels'] == 5
+    assert experiment_key(dict(config, parcel_file=parts)) != \
+        experiment_key(dict(config, parcel_file=parts[::-1]))
+
+
+@pytest.mark.parametrize('extension', ['.gz', '.bz2', '.xz'])
+def test_compressed_inputs_match_plain(tmp_path: Any, extension: str) -> None:
+    """Test that an experiment reads compressed input files, picked by their
+    extension, into the same schedule as the plain files."""
+    config = _write_problem(tmp_path)
+    expected = SchedulingExperiment(config).run()
+    compressed = dict(config)
+    for key in ('parcel_file', 'truck_file', 'map_file'):
+        compressed[key] = config[key] + extension
+        with open(config[key], 'rb') as source, \
+                COMPRESSED_FORMATS[extension](compressed[key], 'wb') as file:
+            file.write(source.read())
+    assert SchedulingExperiment(compressed).run() == expected
+
+
+def test_coordinate_distances_fill_in_the_map(tmp_path: Any) -> None:
+    """Test that an experiment with a coordinate file computes the distances
+    its map file leaves out, lets the map file's override them, and keeps a
+    bounded number of computed rows."""
+    config = _write_problem(tmp_path)
+    coordinate_file = tmp_path / 'coordinates.txt'
+    coordinate_file.write_text('Toronto, 43.65, -79.38\n'
+                               'Hamilton, 43.26, -79.87\n'
+                               'London, 42.98, -81.25\n'
+                               'Guelph, 43.55, -80.25\n')
+    (tmp_path / 'partial.txt').write_text('Toronto, Hamilton, 9\n')
+    geo = SchedulingExperiment(dict(config, coordinate_file=str(
+        coordinate_file), map_file=str(tmp_path / 'partial.txt')))
+    assert isinstance(geo.dmap, GeoDistanceMap)
+    assert geo.dmap.distance('Hamilton', 'Toronto') == 9
+    assert geo.dmap.distance('Toronto', 'London') == 169
+
+    lines = []
+    for city in geo.dmap.cities():
+        for other, distance in geo.dmap.row(city).items():
+            lines.append(f'{city}, {other}, {distance}\n')
+    (tmp_path / 'full.txt').write_text(''.join(lines))
+    full = SchedulingExperiment(dict(config,
+                                     map_file=str(tmp_path / 'full.txt')))
+    stats = full.run()
+    assert geo.run() == stats
+
+    csr = SchedulingExperiment(dict(config, coordinate_file=str(
+        coordinate_file), map_file=str(tmp_path / 'partial.txt'),
+        distance_backend='csr'))
+    assert isinstance(csr.dmap._base, CSRDistanceMap)
+    assert csr.dmap._distances == {}
+    assert csr.run() == stats
+    csr.dmap.add_distance('Guelph', 'Toronto', 70)
+    assert csr.dmap.distance('Guelph', 'Toronto') == 70
+    assert csr.dmap.distance('Toronto', 'Guelph') == 70
+    csr.dmap.add_distance('Hamilton', 'Toronto', 8, 10)
+    assert csr.dmap.distance('Toronto', 'Hamilton') == 9
+
+    small = GeoDistanceMap(cache_rows=2)
+    for city, (lat, lon) in [('A', (0, 0)), ('B', (0, 1)), ('C', (1, 0))]:
+        small.add_location(city, lat, lon)
+    for city in 'ABCA':
+        small.row(city)
+    assert list(small._rows) == ['C', 'A']
+
+
+def test_csr_distance_map_matches_dict_map(tmp_path: Any) -> None:
+    """Test that a CSRDistanceMap gives the same distances and rows as a
+    DistanceMap built from the same edges, including overridden ones, and
+    that the 'csr' distance backend gives the same experiment and is
+    read-only."""
+    rng = random.Random(50)
+    cities = [f'City{i}' for i in range(30)]
+    edges = []
+    for _ in range(200):
+        a, b = rng.sample(cities, 2)
+        edges.append((a, b, rng.randint(1, 99),
+                      rng.choice([-1, rng.randint(1, 99)])))
+    expected = DistanceMap.from_edges(edges)
+    sparse = CSRDistanceMap.from_edges(edges)
+    assert sorted(sparse.cities()) == sorted(expected.cities())
+    for a in cities + ['Nowhere']:
+        assert sparse.row(a) == expected.row(a)
+        for b in cities + ['Nowhere']:
+            assert sparse.distance(a, b) == expected.distance(a, b)
+
+    config = _write_problem(tmp_path)
+    experiment = SchedulingExperiment(dict(config, distance_backend='csr'))
+    assert isinstance(experiment.dmap, CSRDistanceMap)
+    assert experiment.run() == SchedulingExperiment(config).run()
+    with pytest.raises(TypeError):
+        experiment.dmap.add_distance('Toronto', 'Hamilton', 1)
+
+
+@pytest.mark.parametrize('extra', [{'improve_seconds': 0.1},
+                                   {'improve_seconds': 0.1,
+                                    'improve_workers': 2},
+                                   {'deadline_seconds': 0.1}])
+def test_array_fleet_improves_and_meets_deadline(tmp_path: Any,
+                                                 extra: Dict[str, Any]) \
+        -> None:
+    """Test that the improvement phase and the anytime scheduler work on an
+    ArrayFleet, leaving a valid schedule whose totals match its trucks."""
+    config = dict(_write_problem(tmp_path), fleet_backend='array')
+    greedy = SchedulingExperiment(config).run()
+    experiment = SchedulingExperiment(dict(config, **extra))
+    stats = experiment.run()
+    assert isinstance(experiment.fleet, ArrayFleet)
+    assert stats['unscheduled'] <= greedy['unscheduled']
+    for truck in experiment.fleet.trucks:
+        assert truck.stored == sum(p.volume for p in truck.parcels)
+        assert truck.stored <= truck.volume_capacity
+        assert set(truck.route[1:]) == {p.destination for p in truck.parcels}
+    assert experiment.fleet.total_distance_travelled(experiment.dmap) == sum(
+        t.distance(experiment.dmap) for t in experiment.fleet.trucks)
+
+
 ################################################################################
 # The test below uses pytest.mark.parametrize.
 #
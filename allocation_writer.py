@@ -0,0 +1,131 @@
+"""Assignment 1 - Streaming export of parcel allocations
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class AllocationWriter, which writes each parcel
+assignment to a file as it is made, for downstream systems to consume
+without waiting for, or holding, a whole schedule.
+
+Each record is a (truck ID, parcel ID, packed) triple, where packed is False
+when the parcel was taken off the truck again. Two formats are supported:
+- 'ndjson': one json object per line, such as
+  {"truck": 1, "parcel": 7, "packed": true}
+- 'binary': fixed-size little-endian records of two signed 64-bit integers
+  and one byte.
+"""
+from typing import Iterator, Tuple, Any
+import json
+import struct
+from domain import Parcel, Truck, Fleet
+
+_RECORD = struct.Struct('<qq?')
+FORMATS = ('ndjson', 'binary')
+
+
+class AllocationWriter:
+    """Writes parcel assignments to a file as they are made. Pass it to
+    Fleet.watch, and use it as a context manager or close it at the end.
+
+    === Public Attributes ===
+    path: the path of the file written to.
+    format: the format of the file, one of FORMATS.
+    records: the number of records written so far.
+
+    === Private Attributes ===
+    _file: the open file.
+    """
+    path: str
+    format: str
+    records: int
+    _file: Any
+
+    def __init__(self, path: str, format_: str = 'ndjson') -> None:
+        """Create the file at <path>, to be written in <format_>."""
+        if format_ not in FORMATS:
+            raise ValueError(f'unknown allocation format {format_!r}')
+        self.path = path
+        self.format = format_
+        self.records = 0
+        if format_ == 'binary':
+            self._file = open(path, 'wb', buffering=1 << 16)
+        else:
+            self._file = open(path, 'w', buffering=1 << 16)
+
+    def __call__(self, truck: Truck, parcel: Parcel, packed: bool) -> None:
+        """Write that <parcel> was packed onto <truck>, or unpacked from it
+        if <packed> is False."""
+        self.write(truck.id_, parcel.id_, packed)
+
+    def write(self, truck_id: int, parcel_id: int, packed: bool = True) \
+            -> None:
+        """Write one record."""
+        if self.format == 'binary':
+            self._file.write(_RECORD.pack(truck_id, parcel_id, packed))
+        else:
+            self._file.write(json.dumps({'truck': truck_id,
+                                         'parcel': parcel_id,
+                                         'packed': packed}) + '\n')
+        self.records += 1
+
+    def write_fleet(self, fleet: Fleet) -> None:
+        """Write a record for every parcel packed onto a truck of <fleet>."""
+        for truck_id, parcel_id in fleet.iter_allocations():
+            self.write(truck_id, parcel_id)
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        self._file.close()
+
+    def __enter__(self) -> 'AllocationWriter':
+        """Return this writer, for use in a with statement."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Flush and close the file."""
+        self.close()
+
+
+def read_allocations(path: str, format_: str = 'ndjson') \
+        -> Iterator[Tuple[int, int, bool]]:
+    """Yield the (truck ID, parcel ID, packed) records of the file at <path>,
+    written by an AllocationWriter in <format_>."""
+    if format_ == 'binary':
+        with open(path, 'rb') as file:
+            while True:
+                record = file.read(_RECORD.size)
+                if len(record) < _RECORD.size:
+                    return
+                yield _RECORD.unpack(record)
+    else:
+        with open(path, 'r') as file:
+            for line in file:
+                record = json.loads(line)
+                yield record['truck'], record['parcel'], record['packed']
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['__init__', 'read_allocations'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'json',
+                                   'struct', 'domain'],
+        'disable': ['E1136', 'R1732'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,662 @@
+"""Assignment 1 - Array-backed fleet
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class ArrayFleet, a Fleet that stores its trucks as
+columns of typed arrays instead of as separate Truck objects, and the class
+TruckView, a thin Truck that reads and writes one row of those columns.
+
+The route of each truck is a typed array of city ids, and its load a typed
+array of parcel IDs, resolved to Parcel objects only when a view's parcels
+are asked for. Both are updated in place as the truck is packed and
+unpacked, so reading or changing one truck never costs more than the length
+of its own route or load, and statistics are computed over whole columns at
+once.
+"""
+from typing import List, Dict, Set, Tuple, Iterable, Iterator, Union, \
+    Optional, Any
+from array import array
+from itertools import compress
+from operator import not_, truediv
+from distance_map import DistanceMap
+from domain import Parcel, Truck, Fleet
+from city_registry import CityRegistry
+
+
+class _RouteView:
+    """The route of one truck in an ArrayFleet, as a read-only sequence of
+    city names, read straight from the truck's row.
+    """
+    _fleet: 'ArrayFleet'
+    _index: int
+
+    def __init__(self, fleet: 'ArrayFleet', index: int) -> None:
+        """Create the route view of the truck in row <index> of <fleet>."""
+        self._fleet = fleet
+        self._index = index
+
+    def __getitem__(self, item: Union[int, slice]) -> Any:
+        """Return the city or cities of this route at <item>."""
+        if isinstance(item, slice):
+            return self._fleet._route_names(self._index)[item]
+        stops = self._fleet._stops[self._index]
+        if item < 0:
+            item += len(stops) + 1
+        if item == 0:
+            return self._fleet.cities.name_of(self._fleet.depot[self._index])
+        if not 0 < item <= len(stops):
+            raise IndexError('route index out of range')
+        return self._fleet.cities.name_of(stops[item - 1])
+
+    def __len__(self) -> int:
+        """Return the number of stops in this route, including the depot."""
+        return len(self._fleet._stops[self._index]) + 1
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the cities of this route."""
+        return iter(self._fleet._route_names(self._index))
+
+    def __eq__(self, other: Any) -> bool:
+        """Return True iff <other> lists the same cities as this route."""
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        """Return the cities of this route in list form."""
+        return repr(self._fleet._route_names(self._index))
+
+
+class TruckView(Truck):
+    """A Truck whose attributes are one row of the columns of an ArrayFleet.
+
+    === Private Attributes ===
+    _owner: the ArrayFleet holding this truck.
+    _index: the row of this truck in the columns of <_owner>.
+    """
+    _owner: 'ArrayFleet'
+    _index: int
+    # A view is never attached to a RouteTrie.
+    _routes = None
+    _route_node = None
+
+    def __init__(self, owner: 'ArrayFleet', index: int) -> None:
+        """Create the view of row <index> of <owner>.
+
+        This does not call Truck.__init__: all state lives in <owner>.
+        """
+        # pylint: disable=super-init-not-called
+        self._owner = owner
+        self._index = index
+
+    @property
+    def id_(self) -> int:
+        """The ID of this truck."""
+        return self._owner.ids[self._index]
+
+    @property
+    def volume_capacity(self) -> int:
+        """The maximum amount of volume this truck can carry."""
+        return self._owner.capacity[self._index]
+
+    @property
+    def depot(self) -> str:
+        """The city this truck starts and ends at."""
+        return self._owner.cities.name_of(self._owner.depot[self._index])
+
+    @property
+    def stored(self) -> int:
+        """How much volume is stored on this truck."""
+        return self._owner.stored[self._index]
+
+    @property
+    def _fleet(self) -> 'ArrayFleet':
+        """The fleet this truck belongs to."""
+        return self._owner
+
+    @property
+    def route(self) -> _RouteView:
+        """The cities this truck goes through, starting at its depot."""
+        return _RouteView(self._owner, self._index)
+
+    @property
+    def parcels(self) -> List[Parcel]:
+        """The parcels packed onto this truck, in the order packed, as a
+        new list."""
+        packed = self._owner._parcels
+        return [packed[id_] for id_ in self._owner._loads[self._index]]
+
+    def packable(self, parcel: Parcel) -> bool:
+        """Return True if it is possible to pack <parcel> onto this truck."""
+        i = self._index
+        return parcel.volume + self._owner.stored[i] \
+            <= self._owner.capacity[i]
+
+    def pack(self, parcel: Parcel, position: Optional[int] = None) -> bool:
+        """Pack <parcel> onto this truck as Truck.pack does, writing to the
+        columns of the owning ArrayFleet.
+
+        >>> f = ArrayFleet()
+        >>> t = f.new_truck(1423, 20, 'Toronto')
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> t.pack(Parcel(2, 5, 'Toronto', 'Kingston'), 1)
+        True
+        >>> t.pack(Parcel(3, 5, 'Toronto', 'Ottawa'), 1)
+        True
+        >>> t.route
+        ['Toronto', 'Kingston', 'Ottawa']
+        """
+        if not self.packable(parcel):
+            return False
+        self._owner._pack(self._index, parcel, position)
+        return True
+
+    def visits(self, city: str) -> bool:
+        """Return whether the route of this truck stops at <city> anywhere
+        after leaving the depot."""
+        return self.id_ in self._owner._visiting.get(city, {})
+
+    def unpack(self, parcel: Parcel) -> bool:
+        """Remove <parcel> from this truck as Truck.unpack does, and return
+        True if it was on the truck.
+
+        >>> f = ArrayFleet()
+        >>> t = f.new_truck(1423, 20, 'Toronto')
+        >>> p1, p2 = Parcel(1, 5, 'A', 'Ottawa'), Parcel(2, 5, 'A', 'Kingston')
+        >>> t.pack(p1) and t.pack(p2)
+        True
+        >>> t.unpack(p1), t.unpack(p1)
+        (True, False)
+        >>> t.route, t.stored
+        (['Toronto', 'Kingston'], 5)
+        """
+        return self._owner._unpack(self._index, parcel)
+
+    def reverse(self, start: int, end: int) -> None:
+        """Reverse the order of the stops of this truck's route from index
+        <start> to index <end>, inclusive, as Truck.reverse does.
+
+        Precondition: 1 <= start <= end < len(self.route)
+        """
+        self._owner._flip(self._index, start, end)
+        self._owner._log(('reverse', self, start, end))
+
+    def _reroute(self, route: List[str]) -> None:
+        """Replace the route of this truck with <route>, as
+        Truck._reroute does."""
+        self._owner._set_stops(self._index, route[1:])
+
+    def _undo(self, entry: Tuple[Any, ...]) -> None:
+        """Undo the change to this truck recorded in <entry> of an undo
+        log, as Truck._undo does."""
+        self._owner._revert(self._index, entry)
+
+    def distance(self, dmap: DistanceMap) -> int:
+        """Return the distance travelled by this truck, according to
+        <dmap>."""
+        return self._owner._route_distance(self._index, dmap)
+
+
+class ArrayFleet(Fleet):
+    """A fleet of trucks stored as a struct of arrays.
+
+    === Public Attributes ===
+    trucks: a TruckView of each truck in this fleet, in the order added.
+    ids: the ID of each truck.
+    capacity: the volume capacity of each truck.
+    stored: the volume stored on each truck.
+    depot: the city id of the depot of each truck.
+    last_stop: the city id of the last stop on the route of each truck.
+    distance: the distance travelled by each truck, as last computed by
+      compute_distances.
+    cities: the CityRegistry that numbers the cities in this fleet.
+
+    === Private Attributes ===
+    _stops: the city ids of the route stops after the depot of each truck,
+      in route order.
+    _loads: the IDs of the parcels packed onto each truck, in pack order.
+    _parcels: every parcel packed onto a truck of this fleet, by ID.
+    _measured: the DistanceMap <distance> was last computed with, or None.
+    _measured_version: the version of <_measured> <distance> was computed
+      with.
+    _dirty: the trucks whose route changed since <distance> was computed.
+
+    === Representation Invariants ===
+    - ids, capacity, stored, depot, last_stop, distance, trucks, _stops and
+      _loads all have the same length.
+    - the keys of <_parcels> are exactly the IDs in <_loads>
+    - trucks[i]._index == i for every row i
+    - last_stop[i] == (_stops[i][-1] if _stops[i] else depot[i])
+    """
+    trucks: List[TruckView]
+    ids: array
+    capacity: array
+    stored: array
+    depot: array
+    last_stop: array
+    distance: array
+    cities: CityRegistry
+    _stops: List[array]
+    _loads: List[array]
+    _parcels: Dict[int, Parcel]
+    _measured: Optional[DistanceMap]
+    _measured_version: int
+    _dirty: Set[TruckView]
+
+    def __init__(self, cities: Optional[CityRegistry] = None) -> None:
+        """Create an ArrayFleet with no trucks, numbering cities with
+        <cities>, or with a registry of its own if <cities> is None.
+
+        >>> f = ArrayFleet()
+        >>> f.num_trucks()
+        0
+        """
+        Fleet.__init__(self)
+        self.ids = array('q')
+        self.capacity = array('q')
+        self.stored = array('q')
+        self.depot = array('l')
+        self.last_stop = array('l')
+        self.distance = array('q')
+        self.cities = CityRegistry() if cities is None else cities
+        self._stops = []
+        self._loads = []
+        self._parcels = {}
+        self._measured = None
+        self._measured_version = -1
+        self._dirty = set()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this fleet for pickling and copying, without
+        the DistanceMap its distances were computed with, its open
+        savepoints or its watchers."""
+        state = self.__dict__.copy()
+        state['_measured'] = None
+        state['_undo'] = None
+        state['_savepoints'] = 0
+        state['_watchers'] = []
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore this fleet from <state>."""
+        self.__dict__.update(state)
+
+    def _city(self, name: str) -> int:
+        """Return the city id of <name>, assigning a new one if needed."""
+        return self.cities.id_of(name)
+
+    def new_truck(self, id_: int, volume_capacity: int, depot: str) \
+            -> TruckView:
+        """Add an empty truck to this fleet and return its view.
+
+        >>> f = ArrayFleet()
+        >>> t = f.new_truck(1423, 10, 'Toronto')
+        >>> t.pack(Parcel(1, 4, 'Toronto', 'Hamilton'))
+        True
+        >>> t.stored, t.route[-1], t.fullness()
+        (4, 'Hamilton', 40.0)
+        """
+        city = self._city(depot)
+        self.ids.append(id_)
+        self.capacity.append(volume_capacity)
+        self.stored.append(0)
+        self.depot.append(city)
+        self.last_stop.append(city)
+        self.distance.append(0)
+        self._stops.append(array('l'))
+        self._loads.append(array('q'))
+        view = TruckView(self, len(self.trucks))
+        self.trucks.append(view)
+        self._by_id[id_] = view
+        return view
+
+    def add_truck(self, truck: Truck) -> None:
+        """Add a copy of <truck>, with its parcels and route, to this fleet.
+
+        Precondition: No truck with the same ID as <truck> has already been
+        added to this Fleet.
+
+        >>> f = ArrayFleet()
+        >>> t = Truck(1423, 1000, 'Toronto')
+        >>> f.add_truck(t)
+        >>> f.num_trucks()
+        1
+        """
+        view = self.new_truck(truck.id_, truck.volume_capacity, truck.depot)
+        self._fill_row(view._index, truck.parcels, truck.route[1:])
+
+    def _fill_row(self, i: int, parcels: List[Parcel],
+                  stops: Iterable[Union[str, int]]) -> None:
+        """Load the empty truck in row <i> with <parcels> and the route
+        <stops> after its depot, given as city names or ids, and index them.
+        """
+        view = self.trucks[i]
+        for parcel in parcels:
+            self._loads[i].append(parcel.id_)
+            self._parcels[parcel.id_] = parcel
+            self.stored[i] += parcel.volume
+            self._carrier[parcel.id_] = view
+        route = self._stops[i]
+        route.extend(city if isinstance(city, int) else self._city(city)
+                     for city in stops)
+        for city in dict.fromkeys(route):
+            self._visit_changed(view, self.cities.name_of(city), True)
+        self._route_changed(i)
+
+    def remove_truck(self, truck: Truck) -> None:
+        """Remove <truck> from this fleet. The truck keeps its parcels and
+        route, as the only truck of an ArrayFleet of its own.
+
+        Precondition: <truck> is in this Fleet.
+
+        >>> f = ArrayFleet()
+        >>> t1, t2 = f.new_truck(1, 10, 'Toronto'), f.new_truck(2, 10, 'A')
+        >>> t1.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> f.remove_truck(t1)
+        >>> f.num_trucks(), f.truck_by_id(2) is t2, f.truck_carrying(1)
+        (1, True, None)
+        >>> t1.route, t1.parcels[0].id_, t2.route
+        (['Toronto', 'Ottawa'], 1, ['A'])
+        """
+        i = truck._index
+        parcels = truck.parcels
+        stops = self._stops[i]
+        del self._by_id[truck.id_]
+        for parcel in parcels:
+            self._carrier.pop(parcel.id_, None)
+            del self._parcels[parcel.id_]
+        for city in dict.fromkeys(stops):
+            self._visit_changed(truck, self.cities.name_of(city), False)
+        alone = ArrayFleet(self.cities)
+        alone.new_truck(self.ids[i], self.capacity[i],
+                        self.cities.name_of(self.depot[i]))
+        for column in (self.ids, self.capacity, self.stored, self.depot,
+                       self.last_stop, self.distance, self._stops,
+                       self._loads, self.trucks):
+            column.pop(i)
+        for view in self.trucks[i:]:
+            view._index -= 1
+        self._dirty.discard(truck)
+        # The view of the removed truck moves to a fleet of its own.
+        truck._owner = alone
+        truck._index = 0
+        alone.trucks[0] = truck
+        alone._by_id[truck.id_] = truck
+        alone._fill_row(0, parcels, stops)
+
+    def _pack(self, i: int, parcel: Parcel,
+              position: Optional[int] = None) -> None:
+        """Record <parcel> as packed onto the truck in row <i>, which has
+        room for it, adding a stop at its destination as Truck.pack does for
+        <position>."""
+        view = self.trucks[i]
+        self.stored[i] += parcel.volume
+        self._loads[i].append(parcel.id_)
+        self._parcels[parcel.id_] = parcel
+        city = self._city(parcel.destination)
+        stops = self._stops[i]
+        visited = view.visits(parcel.destination)
+        # The index of the stop added to the route, or -1 if none was.
+        stop = -1
+        if position is not None:
+            if not visited and city != self.depot[i]:
+                stops.insert(position - 1, city)
+                stop = position
+        elif self.last_stop[i] != city:
+            stops.append(city)
+            stop = len(stops)
+        if stop > 0:
+            self._route_changed(i)
+            if not visited:
+                self._visit_changed(view, parcel.destination, True)
+        self._log(('pack', view, parcel, stop))
+
+    def _unpack(self, i: int, parcel: Parcel) -> bool:
+        """Remove <parcel> from the truck in row <i> as Truck.unpack does,
+        and return True iff it was on the truck."""
+        load = self._loads[i]
+        if parcel.id_ not in load or self._parcels[parcel.id_] is not parcel:
+            return False
+        index = load.index(parcel.id_)
+        view = self.trucks[i]
+        load.pop(index)
+        del self._parcels[parcel.id_]
+        self.stored[i] -= parcel.volume
+        destination = parcel.destination
+        packed = self._parcels
+        removed = []
+        if view.visits(destination) \
+                and all(packed[id_].destination != destination
+                        for id_ in load):
+            city = self._city(destination)
+            stops = self._stops[i]
+            removed = [k + 1 for k in range(len(stops)) if stops[k] == city]
+            self._stops[i] = array('l', [c for c in stops if c != city])
+            self._visit_changed(view, destination, False)
+            self._route_changed(i)
+        self._log(('unpack', view, parcel, index, removed))
+        return True
+
+    def _flip(self, i: int, start: int, end: int) -> None:
+        """Reverse the route of the truck in row <i> from index <start> to
+        index <end>, inclusive."""
+        stops = self._stops[i]
+        stops[start - 1:end] = stops[start - 1:end][::-1]
+        self._route_changed(i)
+
+    def _set_stops(self, i: int, stops: List[str]) -> None:
+        """Replace the stops after the depot of the route of the truck in
+        row <i> with the cities <stops>."""
+        view = self.trucks[i]
+        before = set(self._stops[i])
+        self._stops[i] = array('l', [self._city(city) for city in stops])
+        after = set(self._stops[i])
+        for city in before - after:
+            self._visit_changed(view, self.cities.name_of(city), False)
+        for city in after - before:
+            self._visit_changed(view, self.cities.name_of(city), True)
+        self._route_changed(i)
+
+    def _revert(self, i: int, entry: Tuple[Any, ...]) -> None:
+        """Undo the change to the truck in row <i> recorded in <entry> of
+        the undo log, which was the last change made to that truck."""
+        view = self.trucks[i]
+        if entry[0] == 'route':
+            self._set_stops(i, entry[2][1:])
+            return
+        if entry[0] == 'reverse':
+            self._flip(i, entry[2], entry[3])
+            return
+        parcel = entry[2]
+        stops = self._stops[i]
+        if entry[0] == 'pack':
+            del self._parcels[self._loads[i].pop()]
+            self.stored[i] -= parcel.volume
+            if entry[3] > 0:
+                city = stops.pop(entry[3] - 1)
+                if city not in stops:
+                    self._visit_changed(view, parcel.destination, False)
+                self._route_changed(i)
+        else:
+            self._loads[i].insert(entry[3], parcel.id_)
+            self._parcels[parcel.id_] = parcel
+            self.stored[i] += parcel.volume
+            if entry[4]:
+                city = self._city(parcel.destination)
+                for k in entry[4]:
+                    stops.insert(k - 1, city)
+                self._visit_changed(view, parcel.destination, True)
+                self._route_changed(i)
+        self._notify(view, parcel, entry[0] != 'pack')
+
+    def _route_changed(self, i: int) -> None:
+        """Bring the last stop of the truck in row <i> up to date with its
+        route, and mark its distance as out of date."""
+        stops = self._stops[i]
+        self.last_stop[i] = stops[-1] if stops else self.depot[i]
+        self._dirty.add(self.trucks[i])
+
+    def _truck_changed(self, truck: Truck) -> None:
+        """Mark the distance of <truck> as out of date. Every other
+        statistic is read straight from the columns."""
+        self._dirty.add(truck)
+
+    def _route_cities(self, i: int) -> List[int]:
+        """Return the city ids of the route of the truck in row <i>."""
+        return [self.depot[i]] + self._stops[i].tolist()
+
+    def _route_names(self, i: int) -> List[str]:
+        """Return the city names of the route of the truck in row <i>."""
+        names = self.cities.names()
+        return [names[city] for city in self._route_cities(i)]
+
+    def _route_distance(self, i: int, dmap: DistanceMap) -> int:
+        """Return the distance travelled by the truck in row <i>."""
+        names = self.cities.names()
+        route = self._route_cities(i)
+        total = 0
+        for k in range(len(route) - 1):
+            leg = dmap.distance(names[route[k]], names[route[k + 1]])
+            if leg > 0:
+                total += leg
+        if route[-1] != route[0]:
+            final = dmap.distance(names[route[-1]], names[route[0]])
+            if final > 0:
+                total += final
+        return total
+
+    def compute_distances(self, dmap: DistanceMap) -> array:
+        """Fill <distance> with the distance travelled by each truck,
+        according to <dmap>, and return it. Only the trucks whose route
+        changed since it was last computed are measured again, unless <dmap>
+        is not the map it was computed with or has changed since.
+        """
+        if self._measured is dmap and self._measured_version == dmap.version():
+            for view in self._dirty:
+                self.distance[view._index] = \
+                    self._route_distance(view._index, dmap)
+        else:
+            self.distance = array('q', [self._route_distance(i, dmap)
+                                        for i in range(len(self.trucks))])
+            self._measured = dmap
+            self._measured_version = dmap.version()
+        self._dirty.clear()
+        return self.distance
+
+    def num_trucks(self) -> int:
+        """Return the number of trucks in this fleet."""
+        return len(self.ids)
+
+    def num_nonempty_trucks(self) -> int:
+        """Return the number of non-empty trucks in this fleet.
+
+        >>> f = ArrayFleet()
+        >>> f.new_truck(1, 10, 'Toronto').pack(Parcel(1, 5, 'A', 'B'))
+        True
+        >>> _ = f.new_truck(2, 10, 'Toronto')
+        >>> f.num_nonempty_trucks()
+        1
+        """
+        return len(self.stored) - self.stored.count(0)
+
+    def allocation_csr(self) -> Tuple[array, array, array]:
+        """Return the parcel allocations of this fleet in compressed sparse
+        row form, as Fleet.allocation_csr does.
+        """
+        offsets = array('q', [0])
+        parcel_ids = array('q')
+        for load in self._loads:
+            parcel_ids.extend(load)
+            offsets.append(len(parcel_ids))
+        return array('q', self.ids), offsets, parcel_ids
+
+    def iter_allocations(self) -> Iterator[Tuple[int, int]]:
+        """Yield the (truck ID, parcel ID) of every packed parcel, as
+        Fleet.iter_allocations does."""
+        for id_, load in zip(self.ids, self._loads):
+            for parcel_id in load:
+                yield id_, parcel_id
+
+    def total_unused_space(self) -> int:
+        """Return the total unused space, summed over all non-empty trucks in
+        the fleet.
+
+        >>> f = ArrayFleet()
+        >>> f.new_truck(1, 1000, 'Toronto').pack(Parcel(1, 5, 'A', 'B'))
+        True
+        >>> _ = f.new_truck(2, 10, 'Toronto')
+        >>> f.total_unused_space()
+        995
+        """
+        empty = map(not_, self.stored)
+        return sum(self.capacity) - sum(compress(self.capacity, empty)) \
+            - sum(self.stored)
+
+    def _total_fullness(self) -> float:
+        """Return the sum of the fullness of each truck in the fleet."""
+        return 100 * sum(map(truediv, self.stored, self.capacity))
+
+    def average_fullness(self) -> float:
+        """Return the average percent fullness of all non-empty trucks in the
+        fleet.
+
+        Precondition: At least one truck is non-empty.
+        """
+        return self._total_fullness() / self.num_nonempty_trucks()
+
+    def total_distance_travelled(self, dmap: DistanceMap) -> int:
+        """Return the total distance travelled by the trucks in this fleet,
+        according to the distances in <dmap>.
+        """
+        return sum(self.compute_distances(dmap))
+
+    def route_distances(self, dmap: DistanceMap) -> Dict[int, int]:
+        """Return the distance travelled by each truck by truck ID."""
+        return dict(zip(self.ids, self.compute_distances(dmap)))
+
+    def average_distance_travelled(self, dmap: DistanceMap) -> float:
+        """Return the average distance travelled by the trucks in this fleet
+        that travel a non-zero distance, according to <dmap>.
+
+        >>> f = ArrayFleet()
+        >>> f.new_truck(1, 10, 'Toronto').pack(Parcel(1, 5, 'A', 'Hamilton'))
+        True
+        >>> _ = f.new_truck(2, 10, 'Toronto')
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> f.average_distance_travelled(m)
+        18.0
+        """
+        distance = self.compute_distances(dmap)
+        total = sum(distance)
+        if total == 0:
+            return 0
+        return total / (len(distance) - distance.count(0))
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'array', 'itertools', 'operator',
+                                   'distance_map', 'domain', 'city_registry'],
+        'disable': ['E1136', 'W0212'],
+        'max-attributes': 20,
+    })
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,226 @@
+"""Assignment 1 - Experiment result cache
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class ResultCache, a persistent on-disk cache of
+experiment statistics. Each entry is keyed by a hash of the contents of the
+data files named in an experiment configuration, the rest of the
+configuration, and the source code of this directory, so an entry can only be
+reused when rerunning the experiment would produce the same statistics.
+"""
+from typing import Dict, List, Union, Optional, Any
+from collections import OrderedDict
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+# Configuration keys that do not affect the statistics of an experiment.
+_IGNORED_KEYS = ('verbose', 'snapshots', 'ingest_workers', 'spill_directory',
+                 'improve_workers', 'allocation_format')
+
+_code_version = None
+
+
+def code_version() -> str:
+    """Return a hash of the source of every module in this directory.
+    The hash is computed once per process.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(here)):
+            if name.endswith('.py'):
+                digest.update(name.encode())
+                with open(os.path.join(here, name), 'rb') as file:
+                    digest.update(file.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def expand_paths(spec: Union[str, List[str]]) -> List[str]:
+    """Return the paths of the data files named by <spec>: a list of paths,
+    kept in its order, a glob pattern, whose matches are sorted, or a single
+    path.
+
+    >>> expand_paths(['b.txt', 'a.txt'])
+    ['b.txt', 'a.txt']
+    >>> expand_paths('data.txt')
+    ['data.txt']
+    """
+    if isinstance(spec, list):
+        return list(spec)
+    if any(char in spec for char in '*?['):
+        return sorted(glob.glob(spec))
+    return [spec]
+
+
+def _hash_file(path: str, digest: Any) -> None:
+    """Feed the contents of the file at <path> into <digest>."""
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+
+
+def experiment_key(config: Dict[str, Union[str, bool]]) -> str:
+    """Return the cache key of the experiment described by <config>.
+
+    Every key ending in '_file' names data files, as expand_paths reads it,
+    whose contents, rather than their paths, go into the key, in order. All
+    other keys are canonicalized into the key as they are, except those in
+    _IGNORED_KEYS.
+    """
+    digest = hashlib.sha256(code_version().encode())
+    canonical = {}
+    for key in sorted(config):
+        if key in _IGNORED_KEYS:
+            continue
+        if key.endswith('_file'):
+            digest.update(key.encode())
+            for path in expand_paths(config[key]):
+                digest.update(b'\0')
+                _hash_file(path, digest)
+        else:
+            canonical[key] = config[key]
+    digest.update(json.dumps(canonical, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """A directory of cached experiment statistics, evicted in least recently
+    used order once it grows past a size limit.
+
+    === Public Attributes ===
+    directory: the directory holding one json file per entry.
+    max_bytes: the largest total size of all entries, in bytes.
+    hits: the number of lookups that found an entry.
+    misses: the number of lookups that found no entry.
+    evictions: the number of entries removed to respect <max_bytes>.
+
+    === Private Attributes ===
+    _entries: the size of each entry by key, least recently used first.
+    _size: the total size of all entries.
+
+    === Representation Invariants ===
+    - <_size> == sum(<_entries>.values())
+    - <_size> <= <max_bytes>, unless the cache holds a single larger entry.
+    """
+    directory: str
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    _entries: 'OrderedDict[str, int]'
+    _size: int
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 24) -> None:
+        """Open the cache stored in <directory>, creating it if needed."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        found = []
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                info = os.stat(os.path.join(directory, name))
+                found.append((info.st_mtime, name[:-5], info.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._size = sum(self._entries.values())
+
+    def _path(self, key: str) -> str:
+        """Return the path of the entry with <key>."""
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Union[int, float]]]:
+        """Return the statistics cached under <key>, or None if there are
+        none. A hit makes the entry the most recently used one.
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r') as file:
+                stats = json.load(file)
+        except (OSError, ValueError):
+            # The entry was removed or damaged behind our back.
+            self._size -= self._entries.pop(key)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return stats
+
+    def put(self, key: str, stats: Dict[str, Union[int, float]]) -> None:
+        """Cache <stats> under <key>, evicting least recently used entries
+        until the cache fits in <max_bytes>.
+        """
+        data = json.dumps(stats, sort_keys=True)
+        path = self._path(key)
+        # A temporary file of its own, so that jobs sharing this directory
+        # never write over each other's half-written entries.
+        handle, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as file:
+                file.write(data)
+            os.replace(temp, path)
+        except OSError:
+            os.remove(temp)
+            raise
+        if key in self._entries:
+            self._size -= self._entries.pop(key)
+        self._entries[key] = len(data)
+        self._size += len(data)
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            old, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+
+    def __len__(self) -> int:
+        """Return the number of entries in this cache."""
+        return len(self._entries)
+
+    def counters(self) -> Dict[str, int]:
+        """Return the hit, miss and eviction counters of this cache."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self._entries),
+                'bytes': self._size}
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['code_version', '_hash_file', 'get', 'put'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'collections', 'glob', 'hashlib', 'json',
+                                   'os', 'tempfile'],
+        'disable': ['E1136', 'W0603'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,106 @@
+"""Assignment 1 - City registry
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class CityRegistry, which interns city names.
+
+Every occurrence of a city name read through one registry is the same str
+object, so parcels, routes and distance map keys share one copy of each
+name, and comparing two equal names succeeds on object identity without
+comparing characters. The registry also numbers the cities with small ints,
+for code that stores cities in arrays.
+"""
+from typing import Dict, List
+
+
+class CityRegistry:
+    """Interns city names and numbers them in order of first appearance.
+
+    === Private Attributes ===
+    _ids: the id of each interned name.
+    _names: the interned name of each id.
+
+    === Representation Invariants ===
+    - _ids[_names[i]] == i for every id i.
+
+    === Sample Usage ===
+    >>> cities = CityRegistry()
+    >>> a = cities.intern(' '.join(['New', 'York']))
+    >>> b = cities.intern(' '.join(['New', 'York']))
+    >>> a is b
+    True
+    >>> cities.id_of('Toronto'), cities.id_of('New York')
+    (1, 0)
+    >>> cities.name_of(1)
+    'Toronto'
+    """
+    _ids: Dict[str, int]
+    _names: List[str]
+
+    def __init__(self) -> None:
+        """Create an empty CityRegistry."""
+        self._ids = {}
+        self._names = []
+
+    def intern(self, name: str) -> str:
+        """Return the registered copy of <name>, registering it if needed."""
+        city = self._ids.get(name)
+        if city is None:
+            return self._names[self._add(name)]
+        return self._names[city]
+
+    def id_of(self, name: str) -> int:
+        """Return the id of <name>, registering it if needed."""
+        city = self._ids.get(name)
+        if city is None:
+            city = self._add(name)
+        return city
+
+    def name_of(self, city: int) -> str:
+        """Return the name of the city with id <city>."""
+        return self._names[city]
+
+    def names(self) -> List[str]:
+        """Return the names of all registered cities, indexed by id."""
+        return self._names
+
+    def _add(self, name: str) -> int:
+        """Register <name> and return its new id."""
+        city = len(self._names)
+        self._ids[name] = city
+        self._names.append(name)
+        return city
+
+    def __contains__(self, name: str) -> bool:
+        """Return True iff <name> is registered."""
+        return name in self._ids
+
+    def __len__(self) -> int:
+        """Return the number of registered cities."""
+        return len(self._names)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,250 @@
+"""Assignment 1 - Command-line entry point
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module is a command-line entry point for running experiments from
+scripts and batch jobs:
+
+    python cli.py run data/demo.json
+    python cli.py compare data/demo.json
+    python cli.py generate --parcels p.txt --trucks t.txt
+    python cli.py benchmark data/demo.json --repeat 5
+    python cli.py compression data/demo.json --repeat 5
+
+Each command prints a single json object to stdout. Modules that do real
+work are only imported by the command that needs them, and the time spent
+starting up and importing them is reported under the key 'timing'.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+_START = time.perf_counter()
+
+
+class _Timer:
+    """Collects the timings reported by a command.
+
+    === Public Attributes ===
+    timing: the duration of each timed step, in seconds, by name.
+    """
+    timing: Dict[str, float]
+
+    def __init__(self) -> None:
+        """Start timing a command, counting from when this module was
+        loaded."""
+        self.timing = {'startup_seconds': time.perf_counter() - _START}
+
+    def timed(self, name: str, step: Callable[[], Any]) -> Any:
+        """Return the result of calling <step>, adding its duration to the
+        timing called <name>."""
+        start = time.perf_counter()
+        result = step()
+        self.timing[name] = self.timing.get(name, 0.0) \
+            + time.perf_counter() - start
+        return result
+
+
+def _load_config(config_file: str) -> Dict[str, Any]:
+    """Return the experiment configuration in the json file <config_file>."""
+    with open(config_file, 'r') as file:
+        return json.load(file)
+
+
+def _import_experiment() -> Any:
+    """Import and return the experiment module."""
+    # pylint: disable=import-outside-toplevel
+    import experiment
+    return experiment
+
+
+def _run(args: argparse.Namespace, timer: _Timer) -> Dict[str, Any]:
+    """Run the experiment in <args.config>, using the result cache in
+    <args.cache> if given. Without a cache, also report the throughput of
+    reading the parcel files when they were parsed, and how much ordering the
+    parcels spilled to disk if the configuration sets a 'memory_budget'."""
+    config = _load_config(args.config)
+    experiment = timer.timed('import_seconds', _import_experiment)
+    if args.cache is None:
+        expt = timer.timed('load_seconds',
+                           lambda: experiment.SchedulingExperiment(config))
+        stats = timer.timed('run_seconds', expt.run)
+        result = {'stats': stats}
+        if expt.ingest:
+            result['ingest'] = expt.ingest
+        # Only greedy schedulers order parcels within a memory budget.
+        spill_report = getattr(expt.scheduler, 'spill_report', None)
+        if config.get('memory_budget') and spill_report is not None:
+            result['spill'] = spill_report()
+        return result
+    # pylint: disable=import-outside-toplevel
+    from cache import ResultCache
+    cache = ResultCache(args.cache)
+    stats = timer.timed('run_seconds',
+                        lambda: experiment.cached_run(config, cache))
+    return {'stats': stats, 'cache': cache.counters()}
+
+
+def _compare(args: argparse.Namespace, timer: _Timer) -> Dict[str, Any]:
+    """Run every algorithm configuration on the problem in <args.config>,
+    and the optimal one too if <args.optimal> is set, in a pool of
+    <args.workers> processes if it is not 0."""
+    config = _load_config(args.config)
+
+    def _import_explore() -> Any:
+        # pylint: disable=import-outside-toplevel
+        import explore
+        return explore
+    explore = timer.timed('import_seconds', _import_explore)
+    rows = timer.timed('run_seconds', lambda: [
+        {'config': run_config, 'stats': stats}
+        for run_config, stats in explore.run_configurations(
+            config, workers=args.workers, optimal=args.optimal)])
+    return {'results': rows}
+
+
+def _generate(args: argparse.Namespace, timer: _Timer) -> Dict[str, Any]:
+    """Generate random parcel and truck files."""
+    # pylint: disable=import-outside-toplevel
+    import generator
+    timer.timed('run_seconds',
+                lambda: generator.generate(args.parcels, args.trucks))
+    return {'parcel_file': args.parcels, 'truck_file': args.trucks}
+
+
+def _benchmark(args: argparse.Namespace, timer: _Timer) -> Dict[str, Any]:
+    """Time loading and running the experiment in <args.config> several
+    times."""
+    config = _load_config(args.config)
+    experiment = timer.timed('import_seconds', _import_experiment)
+    load_times = []
+    run_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        expt = experiment.SchedulingExperiment(config)
+        loaded = time.perf_counter()
+        stats = expt.run()
+        load_times.append(loaded - start)
+        run_times.append(time.perf_counter() - loaded)
+    return {'stats': stats, 'repeat': args.repeat,
+            'load_seconds': load_times, 'run_seconds': run_times,
+            'best_load_seconds': min(load_times),
+            'best_run_seconds': min(run_times)}
+
+
+def _compression(args: argparse.Namespace, timer: _Timer) -> Dict[str, Any]:
+    """Time loading the input files of the experiment in <args.config>
+    plain and compressed in each supported format, from copies written to a
+    temporary directory."""
+    config = _load_config(args.config)
+    experiment = timer.timed('import_seconds', _import_experiment)
+    openers = experiment.COMPRESSED_FORMATS
+    formats = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in [''] + list(openers):
+            copy = dict(config, snapshots=False)
+            size = 0
+            for key in ('parcel_file', 'truck_file', 'map_file',
+                        'coordinate_file'):
+                if not config.get(key):
+                    continue
+                paths = []
+                for path in experiment.expand_paths(config[key]):
+                    name, old = os.path.splitext(os.path.basename(path))
+                    if old not in openers:
+                        name += old
+                    target = os.path.join(
+                        directory, f'{key}-{len(paths)}-{name}{extension}')
+                    with openers.get(old, open)(path, 'rb') as source, \
+                            openers.get(extension, open)(target, 'wb') as file:
+                        shutil.copyfileobj(source, file)
+                    size += os.path.getsize(target)
+                    paths.append(target)
+                copy[key] = paths if key == 'parcel_file' else paths[0]
+            load_times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                experiment.SchedulingExperiment(copy)
+                load_times.append(time.perf_counter() - start)
+            formats[extension or 'plain'] = {
+                'bytes': size, 'load_seconds': load_times,
+                'best_load_seconds': min(load_times)}
+    return {'repeat': args.repeat, 'formats': formats}
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Return the parser of the command line."""
+    parser = argparse.ArgumentParser(
+        description='Run parcel scheduling experiments.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run one experiment')
+    run.add_argument('config', help='json experiment configuration')
+    run.add_argument('--cache', help='directory of cached results')
+    run.set_defaults(handler=_run)
+
+    compare = commands.add_parser('compare',
+                                  help='run every algorithm configuration')
+    compare.add_argument('config', help='json experiment configuration')
+    compare.add_argument('--optimal', action='store_true',
+                         help='also run the exact optimal scheduler')
+    compare.add_argument('--workers', type=int, default=0,
+                         help='processes that share one copy of the problem '
+                              '(0 runs every configuration in this process)')
+    compare.set_defaults(handler=_compare)
+
+    generate = commands.add_parser('generate',
+                                   help='generate random input files')
+    generate.add_argument('--parcels', default='data/demo-parcel-data.txt')
+    generate.add_argument('--trucks', default='data/demo-truck-data.txt')
+    generate.set_defaults(handler=_generate)
+
+    benchmark = commands.add_parser('benchmark',
+                                    help='time loading and running')
+    benchmark.add_argument('config', help='json experiment configuration')
+    benchmark.add_argument('--repeat', type=int, default=3)
+    benchmark.set_defaults(handler=_benchmark)
+
+    compression = commands.add_parser(
+        'compression', help='time loading plain and compressed input files')
+    compression.add_argument('config', help='json experiment configuration')
+    compression.add_argument('--repeat', type=int, default=3)
+    compression.set_defaults(handler=_compression)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command given by <argv>, or by the process arguments if
+    <argv> is None, print its json result and return the exit status."""
+    args = _parser().parse_args(argv)
+    timer = _Timer()
+    result = args.handler(args, timer)
+    timer.timing['total_seconds'] = time.perf_counter() - _START
+    result['timing'] = timer.timing
+    json.dump(result, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Assignment 1 - Sparse distance maps for very many cities
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class CSRDistanceMap, a read-only DistanceMap that
+stores its distances as a sparse graph in compressed sparse row (CSR) form:
+for each city, numbered by a CityRegistry, the cities it has a distance to,
+in increasing order of number, and those distances, all in typed arrays.
+
+It takes memory in proportion to the number of distances rather than to the
+square of the number of cities, with no Python object per distance, and
+looks a distance up by binary search within the row of its first city.
+It is built from a stream of edges without a Python object per edge either,
+by counting sort of the distances into rows.
+Rows asked for as dictionaries, by row, are built from the arrays and kept
+in a cache of bounded size, least recently used rows being dropped first.
+"""
+from typing import Dict, Iterable, List, Tuple
+from array import array
+from collections import OrderedDict
+from bisect import bisect_left
+from city_registry import CityRegistry
+from distance_map import DistanceMap
+
+
+class CSRDistanceMap(DistanceMap):
+    """A read-only DistanceMap stored as a sparse graph in CSR arrays.
+    Build one with from_edges.
+
+    === Public Attributes ===
+    cache_rows: the largest number of rows kept by row.
+
+    === Private Attributes ===
+    _cities: the numbering of the cities of this map.
+    _offsets: the distances from the city numbered i are at the indexes
+      _offsets[i] to _offsets[i + 1] - 1 of <_targets> and <_weights>.
+    _targets: the number of the city each distance is to, increasing within
+      the distances from each city.
+    _weights: the distances.
+    _rows: the rows built by row, least recently used first.
+
+    === Representation Invariants ===
+    - len(<_rows>) <= cache_rows
+    - len(<_offsets>) == len(<_cities>) + 1
+    - len(<_targets>) == len(<_weights>) == <_offsets>[-1]
+
+    === Sample Usage ===
+    >>> d = CSRDistanceMap.from_edges([('Toronto', 'Montreal', 10, -1)])
+    >>> d.distance('Toronto', 'Montreal'), d.distance('Montreal', 'Toronto')
+    (10, 10)
+    >>> d.distance('Toronto', 'Ottawa')
+    -1
+    """
+    cache_rows: int
+    _cities: CityRegistry
+    _offsets: 'array[int]'
+    _targets: 'array[int]'
+    _weights: 'array[int]'
+    _rows: 'OrderedDict[str, Dict[str, int]]'
+
+    def __init__(self, cache_rows: int = 1024) -> None:
+        """Create an empty map, keeping at most <cache_rows> rows built by
+        row."""
+        DistanceMap.__init__(self)
+        self.cache_rows = cache_rows
+        self._rows = OrderedDict()
+        self._cities = CityRegistry()
+        self._offsets = array('q', [0])
+        self._targets = array('q')
+        self._weights = array('q')
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str, int, int]]) \
+            -> 'CSRDistanceMap':
+        """Return a CSRDistanceMap holding every (city_a, city_b, distance1,
+        distance2) edge in <edges>, as DistanceMap.from_edges would, with
+        the same distances.
+
+        >>> d = CSRDistanceMap.from_edges([('Edmonton', 'Toronto', 40, -1),
+        ...                                ('Toronto', 'Edmonton', 45, 50),
+        ...                                ('Toronto', 'Ottawa', 5, 6)])
+        >>> d.distance('Edmonton', 'Toronto'), d.distance('Toronto', 'Edmonton')
+        (40, 45)
+        >>> d.row('Toronto')
+        {'Edmonton': 45, 'Ottawa': 5}
+        """
+        dmap = cls()
+        cities = dmap._cities
+        # Each edge gives a distance from city_a, which replaces any stored
+        # one, and one from city_b, which, as in add_distance, is only
+        # recorded if no distance is stored for it yet. Both are appended to
+        # typed arrays as the edges stream in, with no object per edge.
+        sources = array('q')
+        targets = array('q')
+        weights = array('q')
+        replaces = array('b')
+        count = 0
+        for city_a, city_b, distance1, distance2 in edges:
+            if distance2 == -1:
+                distance2 = distance1
+            a = cities.id_of(city_a)
+            b = cities.id_of(city_b)
+            sources.extend((a, b))
+            targets.extend((b, a))
+            weights.extend((distance1, distance2))
+            replaces.extend((1, 0))
+            count += 1
+
+        # Counting sort the distances by the city they are from, keeping
+        # them in the order they were given within each city.
+        n = len(cities)
+        starts = array('q', [0]) * (n + 1)
+        for a in sources:
+            starts[a + 1] += 1
+        for i in range(n):
+            starts[i + 1] += starts[i]
+        place = starts[:-1]
+        order = array('q', [0]) * len(sources)
+        for k, a in enumerate(sources):
+            order[place[a]] = k
+            place[a] += 1
+        del sources, place
+
+        # Sort each row by target, stably, and keep one distance per target:
+        # the last one that replaces, or else the first one.
+        offsets = dmap._offsets
+        for i in range(n):
+            row = sorted(order[starts[i]:starts[i + 1]],
+                         key=targets.__getitem__)
+            for j, k in enumerate(row):
+                target = targets[k]
+                if j and target == dmap._targets[-1]:
+                    if replaces[k]:
+                        dmap._weights[-1] = weights[k]
+                else:
+                    dmap._targets.append(target)
+                    dmap._weights.append(weights[k])
+            offsets.append(len(dmap._targets))
+        dmap._version = count
+        return dmap
+
+    def distance(self, city_a: str, city_b: str) -> int:
+        """Return the distance from <city_a> to <city_b>, or -1 if there is
+        none."""
+        if city_a not in self._cities or city_b not in self._cities:
+            return -1
+        a = self._cities.id_of(city_a)
+        b = self._cities.id_of(city_b)
+        high = self._offsets[a + 1]
+        k = bisect_left(self._targets, b, self._offsets[a], high)
+        if k < high and self._targets[k] == b:
+            return self._weights[k]
+        return -1
+
+    def row(self, city: str) -> Dict[str, int]:
+        """Return the distances from <city> to other cities, by city. The
+        result must not be mutated."""
+        row = self._rows.get(city)
+        if row is not None:
+            self._rows.move_to_end(city)
+            return row
+        if city not in self._cities:
+            return {}
+        a = self._cities.id_of(city)
+        names = self._cities.names()
+        low, high = self._offsets[a], self._offsets[a + 1]
+        row = {names[b]: distance for b, distance in
+               zip(self._targets[low:high], self._weights[low:high])}
+        self._rows[city] = row
+        if len(self._rows) > self.cache_rows:
+            self._rows.popitem(last=False)
+        return row
+
+    def cities(self) -> List[str]:
+        """Return every city that has a distance recorded from it."""
+        return list(self._cities.names())
+
+    def add_distance(self, city_a: str, city_b: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """Raise TypeError, since a CSRDistanceMap is read-only.
+
+        >>> CSRDistanceMap().add_distance('Toronto', 'Ottawa', 5)
+        Traceback (most recent call last):
+        ...
+        TypeError: CSRDistanceMap is read-only; build it with from_edges
+        """
+        raise TypeError('CSRDistanceMap is read-only; build it with '
+                        'from_edges')
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'array',
+                                   'bisect', 'collections', 'city_registry',
+                                   'distance_map'],
+        'disable': ['E1136', 'W0212'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -23,7 +23,7 @@ from the map file. (All reading from files is done in module experiment.)
 Instead, it provides public methods that can be called to store and look up
 distances.
 """
-from typing import Dict
+from typing import Dict, List, Iterable, Tuple
 
 
 class DistanceMap:
@@ -31,6 +31,8 @@ class DistanceMap:
     === Public Attributes ===
     === Private Attributes ===
     _distances: records of distances from one city to another city in dict form.
+    _version: the number of times distances have been added, so that cached
+      results computed from this map can tell when they are stale.
     === Representation Invariants ===
     The distance between cities must not be negative.
     If the distance from city A to city B is recorded, the distance from city B
@@ -44,10 +46,78 @@ class DistanceMap:
     -1
     """
     _distances: Dict[str, Dict[str, int]]
+    _version: int
 
     def __init__(self) -> None:
         """Create a distance record."""
         self._distances = {}
+        self._version = 0
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str, int, int]]) \
+            -> 'DistanceMap':
+        """Return a DistanceMap holding every (city_a, city_b, distance1,
+        distance2) edge in <edges>, as if add_distance had been called on each
+        edge in order. A distance2 of -1 means it is the same as distance1.
+
+        The edges are added in a single loop without a method call per edge.
+
+        >>> d = DistanceMap.from_edges([('Edmonton', 'Toronto', 40, -1),
+        ...                             ('Toronto', 'Edmonton', 45, 50),
+        ...                             ('Toronto', 'Ottawa', 5, 6)])
+        >>> d.distance('Edmonton', 'Toronto'), d.distance('Toronto', 'Edmonton')
+        (40, 45)
+        >>> d.distance('Ottawa', 'Toronto')
+        6
+        """
+        dmap = cls()
+        distances = dmap._distances
+        count = 0
+        for city_a, city_b, distance1, distance2 in edges:
+            if distance2 == -1:
+                distance2 = distance1
+            row = distances.get(city_a)
+            if row is None:
+                distances[city_a] = {city_b: distance1}
+            else:
+                row[city_b] = distance1
+            # as in add_distance, the reverse direction is only recorded if
+            # no distance is stored for it yet
+            row = distances.get(city_b)
+            if row is None:
+                distances[city_b] = {city_a: distance2}
+            elif city_a not in row:
+                row[city_a] = distance2
+            count += 1
+        dmap._version = count
+        return dmap
+
+    def row(self, city: str) -> Dict[str, int]:
+        """Return the distances stored from <city> to other cities, by city.
+        The result must not be mutated.
+
+        >>> d = DistanceMap()
+        >>> d.add_distance('Edmonton', 'Toronto', 40)
+        >>> d.row('Toronto')
+        {'Edmonton': 40}
+        >>> d.row('Ottawa')
+        {}
+        """
+        return self._distances.get(city, {})
+
+    def cities(self) -> List[str]:
+        """Return every city that has a distance recorded from it.
+
+        >>> d = DistanceMap()
+        >>> d.add_distance('Edmonton', 'Toronto', 40)
+        >>> d.cities()
+        ['Edmonton', 'Toronto']
+        """
+        return list(self._distances)
+
+    def version(self) -> int:
+        """Return a number that changes whenever a distance is added."""
+        return self._version
 
     def add_distance(self, city_a: str, city_b: str, distance1: int,
                      distance2: int = -1) -> None:
@@ -68,6 +138,7 @@ class DistanceMap:
         """
         if distance2 == -1:  # check if <distance2> is not passed
             distance2 = distance1
+        self._version += 1
         # check if <self._distances> already has values for <city_a>
         if city_a in self._distances:
             self._distances[city_a][city_b] = distance1
@@ -20,8 +20,10 @@ Sophia Huynh, Myriam Majedi, and Jaisie Sin.
 This module contains the classes required to represent the entities
 in the simulation: Parcel, Truck and Fleet.
 """
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Any, Callable, Iterator
+from array import array
 from distance_map import DistanceMap
+from route_trie import RouteNode, RouteTrie, route_distance
 
 
 class Parcel:
@@ -72,10 +74,18 @@ class Truck:
     stored: how much volume is stored onto the Truck.
     route: an ordered List of city names that a truck is supposed to go through.
     parcels: the parcels allocated for the truck to deliver.
+    === Private Attributes ===
+    _routes: the RouteTrie holding this truck's route, or None if the truck
+      is not in a Fleet.
+    _route_node: the node of <route> in <_routes>, or None.
+    _fleet: the Fleet this truck belongs to, or None.
+    _visits: the number of stops <route> makes at each city after leaving
+      the depot, for the cities it stops at.
     === Representation Invariants ===
     - 0 <= stored <= volume_capacity
     - volume_capacity > 0
     - route[0] == depot
+    - _visits[city] == route[1:].count(city) for every city in route[1:]
 
     === Sample Usage ===
     >>> t = Truck(1200, 10, 'Toronto')
@@ -98,6 +108,10 @@ class Truck:
     stored: int
     route: List[str]
     parcels: List[Parcel]
+    _routes: Optional[RouteTrie]
+    _route_node: Optional[RouteNode]
+    _fleet: Optional['Fleet']
+    _visits: Dict[str, int]
 
     def __init__(self, id_: int, volume_capacity: int, depot: str) -> None:
         """Create a Truck. A Truck will always initially be empty and will
@@ -109,6 +123,93 @@ class Truck:
         self.stored = 0
         self.route = [self.depot]
         self.parcels = []
+        self._routes = None
+        self._route_node = None
+        self._fleet = None
+        self._visits = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this truck for pickling and copying, without
+        its place in a RouteTrie or Fleet. A Fleet reattaches its trucks when
+        it is unpickled."""
+        state = self.__dict__.copy()
+        state['_routes'] = None
+        state['_route_node'] = None
+        state['_fleet'] = None
+        return state
+
+    def _attach_routes(self, routes: RouteTrie) -> None:
+        """Record this truck's route in <routes>."""
+        self._routes = routes
+        self._set_route_node(routes.node_for(self.route))
+
+    def _set_route_node(self, node: Optional[RouteNode]) -> None:
+        """Hold <route> at <node> of <_routes> instead of at its old node,
+        which is pruned from the trie if no other route needs it."""
+        old = self._route_node
+        if node is not None:
+            node.hold()
+        self._route_node = node
+        if old is not None:
+            old.release()
+
+    def _route_moved(self) -> None:
+        """Find the node of <route> again, and count its stops again, after
+        it was changed other than by appending a city."""
+        if self._routes is not None:
+            self._set_route_node(self._routes.node_for(self.route))
+        visits = {}
+        for city in self.route[1:]:
+            visits[city] = visits.get(city, 0) + 1
+        if self._fleet is not None:
+            for city in self._visits.keys() - visits.keys():
+                self._fleet._visit_changed(self, city, False)
+            for city in visits.keys() - self._visits.keys():
+                self._fleet._visit_changed(self, city, True)
+        self._visits = visits
+
+    def _add_visit(self, city: str) -> None:
+        """Count a stop at <city> appended to <route>."""
+        count = self._visits.get(city, 0)
+        self._visits[city] = count + 1
+        if count == 0 and self._fleet is not None:
+            self._fleet._visit_changed(self, city, True)
+
+    def _drop_visit(self, city: str) -> None:
+        """Stop counting a stop at <city> popped off the end of <route>."""
+        count = self._visits[city]
+        if count > 1:
+            self._visits[city] = count - 1
+        else:
+            del self._visits[city]
+            if self._fleet is not None:
+                self._fleet._visit_changed(self, city, False)
+
+    def visits(self, city: str) -> bool:
+        """Return whether the route of this truck stops at <city> anywhere
+        after leaving the depot.
+
+        >>> t = Truck(1000, 20, 'Toronto')
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> t.pack(Parcel(2, 5, 'Toronto', 'Kingston'))
+        True
+        >>> t.visits('Ottawa'), t.visits('Toronto'), t.visits('Guelph')
+        (True, False, False)
+        """
+        return city in self._visits
+
+    def _current_node(self) -> Optional[RouteNode]:
+        """Return the node of <route> in <_routes>, refreshing it if <route>
+        was changed without going through this truck, or None if the truck
+        is not in a RouteTrie."""
+        node = self._route_node
+        if node is None:
+            return None
+        if node.depth != len(self.route) - 1 or node.city != self.route[-1]:
+            node = self._routes.node_for(self.route)
+            self._set_route_node(node)
+        return node
 
     def packable(self, parcel: Parcel) -> bool:
         """
@@ -131,12 +232,26 @@ class Truck:
         """
         return parcel.volume + self.stored <= self.volume_capacity
 
-    def pack(self, parcel: Parcel) -> bool:
+    def pack(self, parcel: Parcel, position: Optional[int] = None) -> bool:
         """Pack the Truck with a Parcel, return True if it has been
         successfully packed. Return False if stored exceeds
         volume_capacity.
         Add the parcel's destination to the end of the Truck's route unless the
         LAST item is equal to the destination.
+        If <position> is given, instead insert the destination into the route
+        at index <position>, unless the route already visits it anywhere.
+
+        Precondition: 1 <= position <= len(self.route) if it is given.
+
+        >>> t = Truck(1000, 20, 'Toronto')
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> t.pack(Parcel(2, 5, 'Toronto', 'Kingston'), 1)
+        True
+        >>> t.pack(Parcel(3, 5, 'Toronto', 'Ottawa'), 1)
+        True
+        >>> t.route
+        ['Toronto', 'Kingston', 'Ottawa']
         >>> t = Truck(1000, 10, 'Toronto')
         >>> p1 = Parcel(1, 5, 'Toronto', 'Ottawa')
         >>> p2 = Parcel(2, 6, 'Toronto', 'Calgary')
@@ -154,14 +269,140 @@ class Truck:
             # Add the parcel to the Truck.
             self.stored += parcel.volume
             self.parcels.append(parcel)
+            # The index of the stop added to the route, or -1 if none was.
+            stop = -1
+            if position is not None:
+                if not self.visits(parcel.destination) \
+                        and parcel.destination != self.route[0]:
+                    self.route.insert(position, parcel.destination)
+                    self._route_moved()
+                    stop = position
             # Don't modify route if the last item is the same as the
             # parcel's destination.
-            if self.route[-1] != parcel.destination:
+            elif self.route[-1] != parcel.destination:
+                stop = len(self.route)
                 self.route.append(parcel.destination)
+                self._add_visit(parcel.destination)
+                if self._route_node is not None:
+                    self._set_route_node(self._route_node.child(
+                        parcel.destination))
+            if self._fleet is not None:
+                self._fleet._truck_changed(self)
+                self._fleet._log(('pack', self, parcel, stop))
             return True
         # At this point we know the parcel doesn't fit.
         return False
 
+    def unpack(self, parcel: Parcel) -> bool:
+        """Remove <parcel> from this truck, and return True if it was on the
+        truck. Return False, changing nothing, if it was not.
+        If no other parcel on the truck goes to the parcel's destination,
+        every stop at that destination is removed from the route.
+
+        >>> t = Truck(1000, 20, 'Toronto')
+        >>> p1 = Parcel(1, 5, 'Toronto', 'Ottawa')
+        >>> p2 = Parcel(2, 5, 'Toronto', 'Kingston')
+        >>> p3 = Parcel(3, 5, 'Toronto', 'Ottawa')
+        >>> t.pack(p1) and t.pack(p2) and t.pack(p3)
+        True
+        >>> t.route
+        ['Toronto', 'Ottawa', 'Kingston', 'Ottawa']
+        >>> t.unpack(p2)
+        True
+        >>> t.route, t.stored
+        (['Toronto', 'Ottawa', 'Ottawa'], 10)
+        >>> t.unpack(p1)
+        True
+        >>> t.unpack(p1)
+        False
+        >>> t.route
+        ['Toronto', 'Ottawa', 'Ottawa']
+        """
+        index = next((i for i, p in enumerate(self.parcels) if p is parcel),
+                     None)
+        if index is None:
+            return False
+        self.parcels.pop(index)
+        self.stored -= parcel.volume
+        city = parcel.destination
+        stops = []
+        if all(p.destination != city for p in self.parcels):
+            stops = [k for k in range(1, len(self.route))
+                     if self.route[k] == city]
+            if stops:
+                self.route[1:] = [c for c in self.route[1:] if c != city]
+                self._route_moved()
+        if self._fleet is not None:
+            self._fleet._truck_changed(self)
+            self._fleet._log(('unpack', self, parcel, index, stops))
+        return True
+
+    def reverse(self, start: int, end: int) -> None:
+        """Reverse the order of the stops of this truck's route from index
+        <start> to index <end>, inclusive.
+
+        Precondition: 1 <= start <= end < len(self.route)
+
+        >>> t = Truck(1000, 20, 'Toronto')
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> t.pack(Parcel(2, 5, 'Toronto', 'Kingston'))
+        True
+        >>> t.reverse(1, 2)
+        >>> t.route
+        ['Toronto', 'Kingston', 'Ottawa']
+        """
+        self.route[start:end + 1] = self.route[start:end + 1][::-1]
+        self._route_moved()
+        if self._fleet is not None:
+            self._fleet._truck_changed(self)
+            self._fleet._log(('reverse', self, start, end))
+
+    def _reroute(self, route: List[str]) -> None:
+        """Replace the route of this truck with <route>, without telling
+        its fleet."""
+        self.route[:] = route
+        self._route_moved()
+
+    def _undo(self, entry: Tuple[Any, ...]) -> None:
+        """Undo the pack, unpack, reversal or new route of this truck
+        recorded in <entry> of an undo log, which was the last change made
+        to this truck."""
+        if entry[0] == 'route':
+            self._reroute(entry[2])
+            if self._fleet is not None:
+                self._fleet._truck_changed(self)
+            return
+        if entry[0] == 'reverse':
+            _, _, start, end = entry
+            self.route[start:end + 1] = self.route[start:end + 1][::-1]
+            self._route_moved()
+            if self._fleet is not None:
+                self._fleet._truck_changed(self)
+            return
+        if entry[0] == 'pack':
+            _, _, parcel, stop = entry
+            self.parcels.pop()
+            self.stored -= parcel.volume
+            if stop == len(self.route) - 1 and self._route_node is not None \
+                    and self._route_node.depth == stop:
+                self._drop_visit(self.route.pop())
+                self._set_route_node(self._route_node.parent)
+            elif stop > 0:
+                self.route.pop(stop)
+                self._route_moved()
+        else:
+            _, _, parcel, index, stops = entry
+            self.parcels.insert(index, parcel)
+            self.stored += parcel.volume
+            for k in stops:
+                self.route.insert(k, parcel.destination)
+            if stops:
+                self._route_moved()
+        if self._fleet is not None:
+            self._fleet._truck_changed(self)
+            self._fleet._notify(self, parcel, entry[0] != 'pack')
+
     def fullness(self) -> float:
         """Return the percentage of a Truck's fullness.
         >>> t = Truck(1000, 10, 'Toronto')
@@ -188,6 +429,9 @@ class Truck:
         >>> t.distance(m)
         18
         """
+        node = self._current_node()
+        if node is not None:
+            return route_distance(node, self.depot, dmap)
         i = 0
         d_total = 0
         while i < len(self.route) - 1:
@@ -207,8 +451,67 @@ class Fleet:
     ===== Public Attributes =====
     trucks:
       List of all Truck objects in this fleet.
+    ===== Private Attributes =====
+    _routes:
+      The RouteTrie shared by the routes of all trucks in this fleet.
+    _truck_stats:
+      The (stored, fullness, distance) of each truck by ID, as last folded
+      into the running totals below.
+    _nonempty:
+      The number of non-empty trucks.
+    _stored:
+      The total volume stored on all trucks.
+    _used_capacity:
+      The total volume capacity of the non-empty trucks.
+    _fullness_sum:
+      The sum of the fullness of all trucks.
+    _dmap:
+      The DistanceMap that <_total_distance> and <_travelling> are kept for,
+      or None if distances are not being kept yet.
+    _dmap_version:
+      The version of <_dmap> that the distances were computed with.
+    _total_distance:
+      The total distance travelled by all trucks according to <_dmap>.
+    _travelling:
+      The number of trucks that travel a non-zero distance according to
+      <_dmap>.
+    _undo:
+      The log of every pack, unpack, route reversal and new route of a
+      truck in this
+      fleet since the outermost open savepoint, oldest first, or None if no
+      savepoint is open.
+    _savepoints:
+      The number of open savepoints.
+    _watchers:
+      The functions called with (truck, parcel, True) each time a parcel is
+      packed onto a truck of this fleet, and with False instead of True each
+      time one is unpacked.
+    _by_id:
+      Each truck in this fleet, by ID.
+    _carrier:
+      The truck carrying each parcel packed onto a truck of this fleet, by
+      parcel ID.
+    _visiting:
+      For each city, the trucks of this fleet whose route stops there, by
+      truck ID.
     """
     trucks: List[Truck]
+    _routes: RouteTrie
+    _truck_stats: Dict[int, Tuple[int, float, int]]
+    _nonempty: int
+    _stored: int
+    _used_capacity: int
+    _fullness_sum: float
+    _dmap: Optional[DistanceMap]
+    _dmap_version: int
+    _total_distance: int
+    _travelling: int
+    _undo: Optional[List[Tuple[Any, ...]]]
+    _savepoints: int
+    _watchers: List[Callable[[Truck, Parcel, bool], None]]
+    _by_id: Dict[int, Truck]
+    _carrier: Dict[int, Truck]
+    _visiting: Dict[str, Dict[int, Truck]]
 
     def __init__(self) -> None:
         """Create a Fleet with no trucks.
@@ -218,6 +521,212 @@ class Fleet:
         0
         """
         self.trucks = []
+        self._routes = RouteTrie()
+        self._truck_stats = {}
+        self._nonempty = 0
+        self._stored = 0
+        self._used_capacity = 0
+        self._fullness_sum = 0.0
+        self._dmap = None
+        self._dmap_version = -1
+        self._total_distance = 0
+        self._travelling = 0
+        self._undo = None
+        self._savepoints = 0
+        self._watchers = []
+        self._by_id = {}
+        self._carrier = {}
+        self._visiting = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this fleet for pickling and copying, without
+        its RouteTrie, lookup indexes, the DistanceMap its distances are kept
+        for, its open savepoints or its watchers."""
+        state = self.__dict__.copy()
+        del state['_routes']
+        del state['_by_id']
+        del state['_carrier']
+        del state['_visiting']
+        state['_dmap'] = None
+        state['_undo'] = None
+        state['_savepoints'] = 0
+        state['_watchers'] = []
+        return state
+
+    def savepoint(self) -> int:
+        """Return a savepoint that rollback can later return the trucks of
+        this fleet to. Savepoints may be nested.
+
+        Only packing, unpacking, reversing routes of trucks and setting them
+        with set_route is undone by rollback; every savepoint should be
+        released once it is no longer needed, so that packing stops being
+        logged.
+
+        >>> f = Fleet()
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> p = Parcel(1, 5, 'Toronto', 'Ottawa')
+        >>> sp = f.savepoint()
+        >>> t.pack(p)
+        True
+        >>> f.rollback(sp)
+        >>> t.parcels, t.route, f.num_nonempty_trucks()
+        ([], ['Toronto'], 0)
+        >>> f.release(sp)
+        """
+        if self._undo is None:
+            self._undo = []
+        self._savepoints += 1
+        return len(self._undo)
+
+    def rollback(self, savepoint: int) -> None:
+        """Undo every pack, unpack, route reversal and new route made since
+        <savepoint> was taken, most recent first. <savepoint> stays open.
+
+        Each change is undone in constant time, except for restoring a stop
+        that was removed from or inserted into the middle of a route.
+
+        Precondition: <savepoint> was returned by self.savepoint and has not
+        been released.
+        """
+        while len(self._undo) > savepoint:
+            entry = self._undo.pop()
+            entry[1]._undo(entry)
+
+    def release(self, savepoint: int) -> None:
+        """Keep the changes made since <savepoint> and close it. Once the
+        outermost savepoint is released, packing stops being logged.
+
+        Precondition: <savepoint> was returned by self.savepoint, and every
+        savepoint taken after it has been released.
+        """
+        self._savepoints -= 1
+        if self._savepoints == 0:
+            self._undo = None
+
+    def _log(self, entry: Tuple[Any, ...]) -> None:
+        """Record <entry> in the undo log, if a savepoint is open, and tell
+        the watchers about it if it packs or unpacks a parcel."""
+        if self._undo is not None:
+            self._undo.append(entry)
+        if entry[0] in ('pack', 'unpack'):
+            self._notify(entry[1], entry[2], entry[0] == 'pack')
+
+    def watch(self, watcher: Callable[[Truck, Parcel, bool], None]) -> None:
+        """Call <watcher> with (truck, parcel, True) each time a parcel is
+        packed onto a truck of this fleet from now on, and with False instead
+        of True each time one is unpacked, including by rollback.
+
+        >>> f = Fleet()
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> f.watch(lambda truck, parcel, packed: print(truck.id_, parcel.id_,
+        ...                                             packed))
+        >>> t.pack(Parcel(7, 5, 'Toronto', 'Ottawa'))
+        1 7 True
+        True
+        """
+        self._watchers.append(watcher)
+
+    def unwatch(self, watcher: Callable[[Truck, Parcel, bool], None]) -> None:
+        """Stop calling <watcher>, which was passed to watch, when parcels
+        are packed or unpacked.
+
+        >>> f = Fleet()
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> f.watch(print)
+        >>> f.unwatch(print)
+        >>> t.pack(Parcel(7, 5, 'Toronto', 'Ottawa'))
+        True
+        """
+        self._watchers.remove(watcher)
+
+    def _notify(self, truck: Truck, parcel: Parcel, packed: bool) -> None:
+        """Record that <parcel> was packed onto <truck>, or unpacked from it
+        if <packed> is False, and call every watcher with (<truck>, <parcel>,
+        <packed>)."""
+        if packed:
+            self._carrier[parcel.id_] = truck
+        else:
+            self._carrier.pop(parcel.id_, None)
+        for watcher in self._watchers:
+            watcher(truck, parcel, packed)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore this fleet from <state>, rebuilding its RouteTrie and
+        lookup indexes."""
+        self.__dict__.update(state)
+        self._routes = RouteTrie()
+        self._by_id = {}
+        self._carrier = {}
+        self._visiting = {}
+        for truck in self.trucks:
+            truck._attach_routes(self._routes)
+            truck._fleet = self
+            self._index_truck(truck)
+
+    def _index_truck(self, truck: Truck) -> None:
+        """Add <truck>, its parcels and its stops to the lookup indexes."""
+        self._by_id[truck.id_] = truck
+        for parcel in truck.parcels:
+            self._carrier[parcel.id_] = truck
+        for city in truck._visits:
+            self._visit_changed(truck, city, True)
+
+    def _visit_changed(self, truck: Truck, city: str, visited: bool) -> None:
+        """Record that the route of <truck> now stops at <city>, or no
+        longer does if <visited> is False."""
+        if visited:
+            self._visiting.setdefault(city, {})[truck.id_] = truck
+        else:
+            trucks = self._visiting[city]
+            del trucks[truck.id_]
+            if not trucks:
+                del self._visiting[city]
+
+    def _truck_changed(self, truck: Truck) -> None:
+        """Update the running totals of this fleet after the load or route
+        of <truck> changed."""
+        old_stored, old_fullness, old_distance = self._truck_stats[truck.id_]
+        stored = truck.stored
+        fullness = truck.fullness()
+        if old_stored == 0 and stored != 0:
+            self._nonempty += 1
+            self._used_capacity += truck.volume_capacity
+        elif old_stored != 0 and stored == 0:
+            self._nonempty -= 1
+            self._used_capacity -= truck.volume_capacity
+        self._stored += stored - old_stored
+        if self._nonempty == 0:
+            # Don't let rounding errors build up once every truck is empty.
+            self._fullness_sum = 0.0
+        else:
+            self._fullness_sum += fullness - old_fullness
+        distance = old_distance
+        if self._dmap is not None:
+            distance = truck.distance(self._dmap)
+            self._total_distance += distance - old_distance
+            self._travelling += (distance > 0) - (old_distance > 0)
+        self._truck_stats[truck.id_] = (stored, fullness, distance)
+
+    def _keep_distances(self, dmap: DistanceMap) -> None:
+        """Keep the distance totals of this fleet according to <dmap> from now
+        on, recomputing them unless they are already kept for <dmap> as it
+        is now."""
+        if self._dmap is dmap and self._dmap_version == dmap.version():
+            return
+        self._routes.fill(dmap)
+        self._dmap = dmap
+        self._dmap_version = dmap.version()
+        self._total_distance = 0
+        self._travelling = 0
+        for truck in self.trucks:
+            stored, fullness, _ = self._truck_stats[truck.id_]
+            distance = truck.distance(dmap)
+            self._total_distance += distance
+            self._travelling += distance > 0
+            self._truck_stats[truck.id_] = (stored, fullness, distance)
 
     def add_truck(self, truck: Truck) -> None:
         """Add <truck> to this fleet.
@@ -231,6 +740,127 @@ class Fleet:
         1
         """
         self.trucks.append(truck)
+        truck._attach_routes(self._routes)
+        truck._fleet = self
+        self._index_truck(truck)
+        self._truck_stats[truck.id_] = (0, 0.0, 0)
+        self._truck_changed(truck)
+
+    def truck_by_id(self, id_: int) -> Optional[Truck]:
+        """Return the truck in this fleet with ID <id_>, or None if there is
+        none.
+
+        >>> f = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> f.truck_by_id(1423) is t, f.truck_by_id(1)
+        (True, None)
+        """
+        return self._by_id.get(id_)
+
+    def truck_carrying(self, parcel_id: int) -> Optional[Truck]:
+        """Return the truck in this fleet carrying the parcel with ID
+        <parcel_id>, or None if no truck carries it.
+
+        Precondition: parcel IDs are unique.
+
+        >>> f = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> p = Parcel(27, 5, 'Toronto', 'Hamilton')
+        >>> t.pack(p)
+        True
+        >>> f.truck_carrying(27) is t
+        True
+        >>> t.unpack(p)
+        True
+        >>> f.truck_carrying(27) is None
+        True
+        """
+        return self._carrier.get(parcel_id)
+
+    def trucks_visiting(self, city: str) -> List[Truck]:
+        """Return the trucks in this fleet whose route stops at <city> after
+        leaving the depot, in the order they first did.
+
+        >>> f = Fleet()
+        >>> t1, t2 = Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')
+        >>> f.add_truck(t1)
+        >>> f.add_truck(t2)
+        >>> t2.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> t1.pack(Parcel(2, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> [t.id_ for t in f.trucks_visiting('Ottawa')]
+        [2, 1]
+        >>> f.trucks_visiting('Toronto')
+        []
+        """
+        return list(self._visiting.get(city, {}).values())
+
+    def set_route(self, truck: Truck, route: List[str]) -> None:
+        """Replace the route of <truck>, a truck of this fleet, with
+        <route>, keeping the lookups and running totals of this fleet up to
+        date and logging the change for rollback.
+
+        Precondition: <route> starts at the depot of <truck> and stops at
+        the destination of every parcel on it.
+
+        >>> f = Fleet()
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> t.pack(Parcel(2, 5, 'Toronto', 'Kingston'))
+        True
+        >>> sp = f.savepoint()
+        >>> f.set_route(t, ['Toronto', 'Kingston', 'Ottawa'])
+        >>> t.route, [u.id_ for u in f.trucks_visiting('Kingston')]
+        (['Toronto', 'Kingston', 'Ottawa'], [1])
+        >>> f.rollback(sp)
+        >>> f.release(sp)
+        >>> t.route
+        ['Toronto', 'Ottawa', 'Kingston']
+        """
+        old = list(truck.route)
+        truck._reroute(route)
+        self._truck_changed(truck)
+        self._log(('route', truck, old))
+
+    def remove_truck(self, truck: Truck) -> None:
+        """Remove <truck> from this fleet. The truck keeps its parcels and
+        route.
+
+        Precondition: <truck> is in this Fleet.
+        >>> f = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Ottawa'))
+        True
+        >>> f.remove_truck(t)
+        >>> f.num_trucks(), f.num_nonempty_trucks(), t.parcels[0].id_
+        (0, 0, 1)
+        """
+        self.trucks.remove(truck)
+        del self._by_id[truck.id_]
+        for parcel in truck.parcels:
+            self._carrier.pop(parcel.id_, None)
+        for city in truck._visits:
+            self._visit_changed(truck, city, False)
+        stored, fullness, distance = self._truck_stats.pop(truck.id_)
+        if stored != 0:
+            self._nonempty -= 1
+            self._used_capacity -= truck.volume_capacity
+        self._stored -= stored
+        if self._nonempty == 0:
+            self._fullness_sum = 0.0
+        else:
+            self._fullness_sum -= fullness
+        self._total_distance -= distance
+        self._travelling -= distance > 0
+        truck._set_route_node(None)
+        truck._routes = None
+        truck._fleet = None
 
     # We will not test the format of the string that you return -- it is up
     # to you.
@@ -292,11 +922,7 @@ class Fleet:
         >>> f.num_nonempty_trucks()
         2
         """
-        count = 0
-        for truck in self.trucks:
-            if truck.stored != 0:
-                count += 1
-        return count
+        return self._nonempty
 
     def parcel_allocations(self) -> Dict[int, List[int]]:
         """Return a dictionary in which each key is the ID of a truck in this
@@ -320,12 +946,41 @@ class Fleet:
         >>> f.parcel_allocations() == {1423: [27, 12], 1333: [28]}
         True
         """
-        allocations = {}
+        truck_ids, offsets, parcel_ids = self.allocation_csr()
+        return {id_: parcel_ids[offsets[i]:offsets[i + 1]].tolist()
+                for i, id_ in enumerate(truck_ids)}
+
+    def allocation_csr(self) -> Tuple[array, array, array]:
+        """Return the parcel allocations of this fleet in compressed sparse
+        row form, as three arrays of integers: the ID of each truck, in the
+        order added, the offsets, and the parcel IDs. The parcels of the i-th
+        truck are parcel_ids[offsets[i]:offsets[i + 1]], in pack order.
+
+        >>> f = Fleet()
+        >>> t1, t2 = Truck(1423, 10, 'Toronto'), Truck(1333, 10, 'Toronto')
+        >>> f.add_truck(t1)
+        >>> f.add_truck(t2)
+        >>> t2.pack(Parcel(28, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> [list(column) for column in f.allocation_csr()]
+        [[1423, 1333], [0, 0, 1], [28]]
+        """
+        truck_ids = array('q', [truck.id_ for truck in self.trucks])
+        offsets = array('q', [0])
+        parcel_ids = array('q')
+        for truck in self.trucks:
+            parcel_ids.extend(parcel.id_ for parcel in truck.parcels)
+            offsets.append(len(parcel_ids))
+        return truck_ids, offsets, parcel_ids
+
+    def iter_allocations(self) -> Iterator[Tuple[int, int]]:
+        """Yield the (truck ID, parcel ID) of every parcel packed onto a
+        truck of this fleet, truck by truck in the order added, and parcels
+        in pack order, without building any list.
+        """
         for truck in self.trucks:
-            allocations[truck.id_] = []
             for parcel in truck.parcels:
-                allocations[truck.id_].append(parcel.id_)
-        return allocations
+                yield truck.id_, parcel.id_
 
     def total_unused_space(self) -> int:
         """Return the total unused space, summed over all non-empty trucks in
@@ -343,12 +998,7 @@ class Fleet:
         >>> f.total_unused_space()
         995
         """
-        unused_space = 0
-        for truck in self.trucks:
-            stored = truck.stored
-            if stored != 0:
-                unused_space += (truck.volume_capacity - stored)
-        return unused_space
+        return self._used_capacity - self._stored
 
     def _total_fullness(self) -> float:
         """Return the sum of truck.fullness() for each non-empty truck in the
@@ -367,10 +1017,7 @@ class Fleet:
         >>> f._total_fullness()
         50.0
         """
-        flt_fullness = 0
-        for truck in self.trucks:
-            flt_fullness += truck.fullness()
-        return flt_fullness
+        return self._fullness_sum
 
     def average_fullness(self) -> float:
         """Return the average percent fullness of all non-empty trucks in the
@@ -412,12 +1059,34 @@ class Fleet:
         >>> f.total_distance_travelled(m)
         36
         """
-        total_d = 0
-        for truck in self.trucks:
-            dist = truck.distance(dmap)
-            if dist > 0:
-                total_d += dist
-        return total_d
+        self._keep_distances(dmap)
+        return self._total_distance
+
+    def route_distances(self, dmap: DistanceMap) -> Dict[int, int]:
+        """Return the distance travelled by each truck in this fleet by truck
+        ID, according to the distances in <dmap>. Routes that share a prefix
+        share the work of measuring it.
+
+        >>> f = Fleet()
+        >>> t1 = Truck(1423, 10, 'Toronto')
+        >>> t2 = Truck(1333, 10, 'Toronto')
+        >>> f.add_truck(t1)
+        >>> f.add_truck(t2)
+        >>> t1.pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t2.pack(Parcel(2, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t2.pack(Parcel(3, 5, 'Toronto', 'London'))
+        True
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> m.add_distance('Hamilton', 'London', 12)
+        >>> m.add_distance('London', 'Toronto', 20)
+        >>> f.route_distances(m) == {1423: 18, 1333: 41}
+        True
+        """
+        self._routes.fill(dmap)
+        return {truck.id_: truck.distance(dmap) for truck in self.trucks}
 
     def average_distance_travelled(self, dmap: DistanceMap) -> float:
         """Return the average distance travelled by the trucks in this fleet,
@@ -449,20 +1118,16 @@ class Fleet:
         total = self.total_distance_travelled(dmap)
         if total == 0:
             return 0
-        count = 0
-        for truck in self.trucks:
-            # Only add trucks that have travelled a non-zero distance.
-            if truck.distance(dmap) > 0:
-                count += 1
-        return total / count
+        # Only trucks that have travelled a non-zero distance are counted.
+        return total / self._travelling
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'distance_map'],
-        'disable': ['E1136'],
+                                   'distance_map', 'route_trie'],
+        'disable': ['E1136', 'W0212'],
         'max-attributes': 15,
     })
     import doctest
@@ -23,12 +23,42 @@ run the experiment, generate statistics as the result of the experiment, and
 (optionally) report the statistics.
 
 This module is responsible for all the reading of data from the data files.
+Data files compressed with gzip, bzip2 or xz, named with the extension .gz,
+.bz2 or .xz, are decompressed as they are read.
 """
-from typing import List, Dict, Union
+from typing import List, Dict, Tuple, Iterator, Union, Optional, Callable, \
+    Any, Iterable
+from concurrent.futures import ThreadPoolExecutor
+import bz2
+import gzip
+import io
 import json
-from scheduler import RandomScheduler, GreedyScheduler, Scheduler
+import lzma
+import os
+import time
+from scheduler import RandomScheduler, GreedyScheduler, InsertionScheduler, \
+    AnytimeScheduler, ChangeSet, Scheduler
 from domain import Parcel, Truck, Fleet
+from array_fleet import ArrayFleet
+from city_registry import CityRegistry
+from snapshot import SnapshotStore
 from distance_map import DistanceMap
+from geo_distance_map import GeoDistanceMap
+from csr_distance_map import CSRDistanceMap
+from cache import ResultCache, experiment_key, expand_paths
+from improve import ImprovementResult, improve
+from optimal import OptimalScheduler
+from allocation_writer import AllocationWriter
+from simulation import SimulationResult, simulate
+
+
+# The functions opening compressed data files in binary mode, for reading or
+# writing, by extension.
+COMPRESSED_FORMATS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open,
+                      '.lzma': lzma.open}
+
+# The size of the read buffer of each data file, in bytes.
+_BUFFER_SIZE = 1 << 20
 
 
 class SchedulingExperiment:
@@ -54,6 +84,17 @@ class SchedulingExperiment:
       The trucks that parcels are scheduled to in this experiment.
     dmap:
       The distances between cities in this experiment.
+    cities:
+      The registry interning every city name read for this experiment.
+    snapshots:
+      The SnapshotStore the input files were loaded through, or None if they
+      were parsed directly.
+    improvement:
+      The result of the local-search improvement phase, or None if the
+      configuration asks for none or <self>.run has not been called.
+    ingest:
+      The throughput of reading the parcel files, as read_parcel_files
+      reports it, or an empty dictionary if they were loaded from snapshots.
 
     === Private Attributes ===
     _stats:
@@ -76,25 +117,48 @@ class SchedulingExperiment:
     parcels: List[Parcel]
     fleet: Fleet
     dmap: DistanceMap
+    cities: CityRegistry
+    snapshots: Optional[SnapshotStore]
+    improvement: Optional[ImprovementResult]
+    ingest: Dict[str, Any]
     _stats: Dict[str, Union[int, float]]
     _unscheduled: List[Parcel]
+    _improve: Dict[str, Union[int, float]]
+    _output: Optional[Tuple[str, str]]
 
-    def __init__(self, config: Dict[str, Union[str, bool]]) -> None:
+    def __init__(self, config: Dict[str, Union[str, bool]],
+                 snapshots: Optional[SnapshotStore] = None) -> None:
         """Initialize a new experiment with the configuration specified in
         <config>.
 
+        If <config> has a true value for 'snapshots', load the input files
+        through <snapshots>, or through a new SnapshotStore if <snapshots> is
+        None.
+
         Precondition: <config> contains keys and values as specified
         in Assignment 1.
         """
         self.verbose = config['verbose']
-        if config['algorithm'] == 'random':
-            self.scheduler = RandomScheduler()
-        else:
-            self.scheduler = GreedyScheduler(config)
-        self.parcels = read_parcels(config['parcel_file'])
-        self.fleet = read_trucks(config['truck_file'],
-                                 config['depot_location'])
-        self.dmap = read_distance_map(config['map_file'])
+        self.cities = CityRegistry()
+        if config.get('snapshots') and snapshots is None:
+            snapshots = SnapshotStore()
+        elif not config.get('snapshots'):
+            snapshots = None
+        self.snapshots = snapshots
+        self.ingest = {}
+        self.parcels, self.fleet, self.dmap = \
+            load_inputs(config, self.cities, snapshots, self.ingest)
+        self.scheduler = make_scheduler(config, self.dmap)
+        self.improvement = None
+        self._improve = {
+            'seconds': config.get('improve_seconds', 0),
+            'restarts': config.get('improve_restarts', 1),
+            'workers': config.get('improve_workers', 0)
+        }
+        self._output = None
+        if config.get('allocation_output'):
+            self._output = (config['allocation_output'],
+                            config.get('allocation_format', 'ndjson'))
 
         self._stats = {}
         self._unscheduled = []
@@ -107,15 +171,71 @@ class SchedulingExperiment:
 
         If <self.verbose> is True, print step-by-step details
         regarding the scheduling algorithm as it runs.
+
+        If the configuration has an 'allocation_output' file, each parcel
+        assignment is written to it, in the 'allocation_format' of the
+        configuration, as it is made.
         """
-        trks = self.fleet.trucks
-        vbose = self.verbose
-        self._unscheduled = self.scheduler.schedule(self.parcels, trks, vbose)
+        writer = None
+        watched = self.fleet
+        if self._output is not None:
+            writer = AllocationWriter(*self._output)
+            watched.watch(writer)
+        try:
+            trks = self.fleet.trucks
+            vbose = self.verbose
+            self._unscheduled = self.scheduler.schedule(self.parcels, trks,
+                                                        vbose)
+            if self._improve['seconds'] > 0:
+                before = self.fleet
+                self._improve_schedule()
+                if writer is not None:
+                    # The improved fleet is a copy: replace every assignment.
+                    for truck_id, parcel_id in before.iter_allocations():
+                        writer.write(truck_id, parcel_id, False)
+                    writer.write_fleet(self.fleet)
+        finally:
+            if writer is not None:
+                # The improved fleet is a copy, without the watcher.
+                watched.unwatch(writer)
+                writer.close()
         self._compute_stats()
         if report:
             self._print_report()
         return self._stats
 
+    def reschedule(self, changes: ChangeSet) -> Dict[str, Union[int, float]]:
+        """Update the schedule made by run for <changes>, repairing only the
+        trucks the changes touch, and return the new statistics.
+
+        Precondition: run has been called, and <self.scheduler> is a
+        GreedyScheduler.
+        """
+        self._unscheduled = self.scheduler.repair(
+            self.fleet, self._unscheduled, changes, self.verbose)
+        self._compute_stats()
+        return self._stats
+
+    def simulate(self, speed: float = 1.0) -> SimulationResult:
+        """Simulate the trucks of this experiment driving their scheduled
+        routes at <speed>, and return the time series of trucks on the road
+        and parcels delivered.
+
+        Precondition: run has been called.
+        """
+        return simulate(self.fleet, self.dmap, speed)
+
+    def _improve_schedule(self) -> None:
+        """Replace the schedule made by <self.scheduler> with the best one
+        found by the local-search improvement phase.
+        """
+        self.improvement = improve(self.fleet, self._unscheduled, self.dmap,
+                                   self._improve['seconds'],
+                                   self._improve['restarts'],
+                                   self._improve['workers'])
+        self.fleet = self.improvement.fleet
+        self._unscheduled = self.improvement.unscheduled
+
     def _compute_stats(self) -> None:
         """Compute the statistics for this experiment, and store in
         <self>.stats.
@@ -133,15 +253,7 @@ class SchedulingExperiment:
         fit onto any truck).
         Precondition: _run has already been called.
         """
-        flt = self.fleet
-        self._stats = {
-            'fleet': flt.num_trucks(),
-            'unused_trucks': flt.num_trucks() - flt.num_nonempty_trucks(),
-            'avg_distance': flt.average_distance_travelled(self.dmap),
-            'avg_fullness': flt.average_fullness(),
-            'unused_space': flt.total_unused_space(),
-            'unscheduled': len(self._unscheduled)
-        }
+        self._stats = fleet_stats(self.fleet, self.dmap, self._unscheduled)
 
     def _print_report(self) -> None:
         """Report on the statistics for this experiment.
@@ -161,49 +273,283 @@ class SchedulingExperiment:
 # ----- Helper functions -----
 
 
-def read_parcels(parcel_file: str) -> List[Parcel]:
+def _interner(cities: Optional[CityRegistry]) -> Callable[[str], str]:
+    """Return the function that interns city names with <cities>, or one
+    that returns names unchanged if <cities> is None."""
+    if cities is None:
+        return str
+    return cities.intern
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    """Open the data file at <path> for reading text through a large buffer,
+    decompressing it as it is read if its extension is one of those of
+    COMPRESSED_FORMATS."""
+    decompressor = COMPRESSED_FORMATS.get(os.path.splitext(path)[1])
+    if decompressor is None:
+        return open(path, 'r', buffering=_BUFFER_SIZE)
+    return io.TextIOWrapper(io.BufferedReader(decompressor(path, 'rb'),
+                                              _BUFFER_SIZE))
+
+
+def read_parcels(parcel_file: Union[str, List[str]],
+                 cities: Optional[CityRegistry] = None) -> List[Parcel]:
     """Read parcel data from <parcel_file> and return.
     Parcel file format: <parcel_id>, <source>, <destination>, <parcel_volume>
+    <parcel_file> may also be a list of paths or a glob pattern, in which case
+    the files are read as read_parcel_files reads them.
+    City names are interned with <cities>, if given.
     Precondition: <parcel_file> is the path to a file containing parcel data in
                   the form specified in Assignment 1.
     """
-    plist = []
-    # read and add the parcels to the list.
-    with open(parcel_file, 'r') as file:
+    paths = expand_paths(parcel_file)
+    if paths == [parcel_file]:
+        return list(iter_parcels(parcel_file, cities))
+    return read_parcel_files(paths, cities)[0]
+
+
+def read_parcel_files(paths: List[str],
+                      cities: Optional[CityRegistry] = None,
+                      workers: Optional[int] = None) \
+        -> Tuple[List[Parcel], Dict[str, Any]]:
+    """Read the parcel files at <paths> on a pool of <workers> threads, one
+    per file (up to 32) if <workers> is None, and return their parcels with
+    a report of ingest throughput.
+
+    Reading one file overlaps with parsing another. The parcels are returned
+    in the order of <paths>, and of the lines of each file, however the
+    reads interleave, and city names are interned with <cities>, if given, in
+    that same order.
+
+    The report has the number of 'parcels' and 'bytes' read (as stored on
+    disk, so compressed for compressed files), the wall-clock 'seconds'
+    taken and the resulting 'parcels_per_second' and 'bytes_per_second', and
+    under 'files' the same numbers for each file, in order, with its path
+    under 'file'.
+    """
+    start = time.perf_counter()
+    if len(paths) == 1:
+        results = [_read_parcel_file(paths[0], cities)]
+    else:
+        with ThreadPoolExecutor(workers or min(32, len(paths) or 1)) as pool:
+            results = list(pool.map(_read_parcel_file, paths))
+        # Interning on this thread, in file order, registers cities in the
+        # same order on every run.
+        intern = _interner(cities)
+        for chunk, _ in results:
+            for parcel in chunk:
+                parcel.source = intern(parcel.source)
+                parcel.destination = intern(parcel.destination)
+    parcels = [parcel for chunk, _ in results for parcel in chunk]
+    report = _throughput(len(parcels),
+                         sum(file['bytes'] for _, file in results),
+                         time.perf_counter() - start)
+    report['files'] = [file for _, file in results]
+    return parcels, report
+
+
+def _read_parcel_file(path: str, cities: Optional[CityRegistry] = None) \
+        -> Tuple[List[Parcel], Dict[str, Any]]:
+    """Return the parcels in the file at <path>, interning city names with
+    <cities> if given, with the throughput of reading them."""
+    start = time.perf_counter()
+    parcels = list(iter_parcels(path, cities))
+    report = _throughput(len(parcels), os.path.getsize(path),
+                         time.perf_counter() - start)
+    report['file'] = path
+    return parcels, report
+
+
+def _throughput(parcels: int, size: int, seconds: float) -> Dict[str, Any]:
+    """Return the ingest report of reading <parcels> parcels in <size> bytes
+    in <seconds>."""
+    return {'parcels': parcels, 'bytes': size, 'seconds': seconds,
+            'parcels_per_second': parcels / seconds if seconds else 0.0,
+            'bytes_per_second': size / seconds if seconds else 0.0}
+
+
+def iter_parcels(parcel_file: str,
+                 cities: Optional[CityRegistry] = None) -> Iterator[Parcel]:
+    """Yield the parcels in <parcel_file> one at a time, as read_parcels
+    reads them, without holding the whole file in memory.
+    """
+    intern = _interner(cities)
+    with _open_text(parcel_file) as file:
         for line in file:
             tokens = line.strip().split(',')
             pid = int(tokens[0].strip())
-            source = tokens[1].strip()
-            destination = tokens[2].strip()
+            source = intern(tokens[1].strip())
+            destination = intern(tokens[2].strip())
             volume = int(tokens[3].strip())
-            plist.append(Parcel(pid, volume, source, destination))
-    return plist
+            yield Parcel(pid, volume, source, destination)
 
 
-def read_distance_map(distance_map_file: str) -> DistanceMap:
+def read_distance_map(distance_map_file: str,
+                      cities: Optional[CityRegistry] = None,
+                      sparse: bool = False) -> DistanceMap:
     """Read distance data from <distance_map_file> and return a DistanceMap
     that records it.
+    If <sparse> is True, return a read-only CSRDistanceMap instead.
     Map file format: <city1>, <city2>, <distance1> [, <distance2> ]
+    City names are interned with <cities>, if given.
     === Preconditions ===
     <distance_map_file> is the path to a file containing distance data in the
     form specified in Assignment 1.
     """
-    dmap = DistanceMap()
-    with open(distance_map_file, 'r') as file:
+    intern = _interner(cities)
+    # Build the map in a single pass over the lines as they are read (and
+    # decompressed), rather than calling add_distance once per line.
+    with _open_text(distance_map_file) as file:
+        if sparse:
+            return CSRDistanceMap.from_edges(_parse_edges(file, intern))
+        return DistanceMap.from_edges(_parse_edges(file, intern))
+
+
+def read_coordinates(coordinate_file: str,
+                     cities: Optional[CityRegistry] = None) \
+        -> Dict[str, Tuple[float, float]]:
+    """Read the (latitude, longitude) of each city in <coordinate_file> and
+    return them by city.
+    Coordinate file format: <city>, <latitude>, <longitude>
+    in degrees. City names are interned with <cities>, if given.
+    """
+    intern = _interner(cities)
+    coordinates = {}
+    with _open_text(coordinate_file) as file:
         for line in file:
-            tokens = line.strip().split(',')
-            c1 = tokens[0].strip()
-            c2 = tokens[1].strip()
-            distance1 = int(tokens[2].strip())
-            distance2 = int(tokens[3].strip()) if len(tokens) == 4 \
-                else distance1
-            dmap.add_distance(c1, c2, distance1, distance2)
-    return dmap
-
-
-def read_trucks(truck_file: str, depot_location: str) -> Fleet:
+            tokens = line.split(',')
+            if len(tokens) < 3:
+                continue
+            coordinates[intern(tokens[0].strip())] = (float(tokens[1]),
+                                                      float(tokens[2]))
+    return coordinates
+
+
+def _parse_edges(lines: Iterable[str], intern: Callable[[str], str]) \
+        -> Iterator[Tuple[str, str, int, int]]:
+    """Yield the (city1, city2, distance1, distance2) edge of each non-blank
+    line in <lines> of a map file, with -1 for a missing distance2."""
+    for line in lines:
+        tokens = line.split(',')
+        if len(tokens) < 3:
+            continue
+        distance2 = int(tokens[3]) if len(tokens) == 4 else -1
+        yield (intern(tokens[0].strip()), intern(tokens[1].strip()),
+               int(tokens[2]), distance2)
+
+
+def fleet_stats(flt: Fleet, dmap: DistanceMap,
+                unscheduled: List[Parcel]) -> Dict[str, Union[int, float]]:
+    """Return the statistics of the schedule of <flt>, which left
+    <unscheduled> unscheduled, with distances from <dmap>, as
+    SchedulingExperiment.run reports them."""
+    return {
+        'fleet': flt.num_trucks(),
+        'unused_trucks': flt.num_trucks() - flt.num_nonempty_trucks(),
+        'avg_distance': flt.average_distance_travelled(dmap),
+        'avg_fullness': flt.average_fullness(),
+        'unused_space': flt.total_unused_space(),
+        'unscheduled': len(unscheduled)
+    }
+
+
+def make_scheduler(config: Dict[str, Union[str, bool]],
+                   dmap: DistanceMap) -> Scheduler:
+    """Return the scheduler configured by <config>, for a problem with the
+    distances in <dmap>.
+
+    The 'optimal' algorithm gets an OptimalScheduler, visiting at most the
+    'node_limit' of <config> search nodes if it has one.
+    A greedy configuration with a 'deadline_seconds' gets an
+    AnytimeScheduler. Otherwise, a greedy configuration whose 'routing' is
+    'insertion' gets an InsertionScheduler, and any other greedy
+    configuration a GreedyScheduler.
+    """
+    if config['algorithm'] == 'random':
+        return RandomScheduler()
+    if config['algorithm'] == 'optimal':
+        return OptimalScheduler(config.get('node_limit', 1000000))
+    if config.get('deadline_seconds'):
+        return AnytimeScheduler(config, dmap)
+    if config.get('routing') == 'insertion':
+        return InsertionScheduler(config, dmap)
+    return GreedyScheduler(config)
+
+
+def load_inputs(config: Dict[str, Union[str, bool]], cities: CityRegistry,
+                snapshots: Optional[SnapshotStore] = None,
+                ingest: Optional[Dict[str, Any]] = None) \
+        -> Tuple[List[Parcel], Fleet, DistanceMap]:
+    """Return the parcels, fleet and distance map of the experiment
+    configured by <config>, interning city names with <cities>.
+
+    The 'parcel_file' of <config> may be a path, a list of paths or a glob
+    pattern. Parcel files are read on the number of threads given by the
+    'ingest_workers' config key, if any, and the throughput of reading them
+    is stored in <ingest>, if given. The parcels are always read into a list,
+    which an experiment keeps to report on and reschedule, so a
+    'memory_budget' does not bound the memory they take here, only the
+    memory ordering them takes (see GreedyScheduler).
+
+    If the 'distance_backend' of <config> is 'csr', the distances of the map
+    file are held in a CSRDistanceMap. If <config> has a 'coordinate_file',
+    the distance map is instead a
+    GeoDistanceMap computing the distances the map file does not give from
+    the coordinates of cities in that file.
+
+    If <snapshots> is not None, each file is loaded from its snapshot when
+    that is up to date, and parsed and snapshotted otherwise.
+    """
+    parcel_paths = expand_paths(config['parcel_file'])
+    truck_file = config['truck_file']
+    map_file = config['map_file']
+    coordinate_file = config.get('coordinate_file')
+    array_backed = config.get('fleet_backend') == 'array'
+    sparse = config.get('distance_backend') == 'csr'
+    if snapshots is None:
+        parcels, report = read_parcel_files(parcel_paths, cities,
+                                            config.get('ingest_workers'))
+        if ingest is not None:
+            ingest.update(report)
+        fleet = read_trucks(truck_file, config['depot_location'],
+                            array_backed, cities)
+        dmap = read_distance_map(map_file, cities, sparse)
+        if coordinate_file:
+            dmap = GeoDistanceMap.from_map(
+                dmap, read_coordinates(coordinate_file, cities))
+        return parcels, fleet, dmap
+
+    # Snapshots hold their own copies of city names. The map is loaded first
+    # so that its names become the registered ones.
+    dmap = snapshots.load(map_file, 'csr-map' if sparse else 'map',
+                          lambda: read_distance_map(map_file, sparse=sparse))
+    if coordinate_file:
+        dmap = GeoDistanceMap.from_map(
+            dmap, snapshots.load(coordinate_file, 'coordinates',
+                                 lambda: read_coordinates(coordinate_file)))
+    for city in dmap.cities():
+        cities.intern(city)
+    parcels = []
+    for path in parcel_paths:
+        parcels.extend(snapshots.load(path, 'parcels',
+                                      lambda p=path: read_parcels(p)))
+    for parcel in parcels:
+        parcel.source = cities.intern(parcel.source)
+        parcel.destination = cities.intern(parcel.destination)
+    rows = snapshots.load(truck_file, 'trucks',
+                          lambda: _read_truck_rows(truck_file))
+    fleet = build_fleet(rows, config['depot_location'], array_backed,
+                        cities)
+    return parcels, fleet, dmap
+
+
+def read_trucks(truck_file: str, depot_location: str,
+                array_backed: bool = False,
+                cities: Optional[CityRegistry] = None) -> Fleet:
     """Read truck data from <truck_file> and return a Fleet containing these
     trucks, with each truck starting at the <depot_location>.
+    If <array_backed> is True, return an ArrayFleet instead.
+    The depot name is interned with <cities>, if given.
     Truck file format: <truck_id>, <truck_volume>
     === Preconditions ===
     <truck_file> is a path to a file containing truck data in the form specified
@@ -211,16 +557,62 @@ def read_trucks(truck_file: str, depot_location: str) -> Fleet:
     Truck IDs may occur in any order and need not be consecutive, but no truck
     ID occurs more than once in the file.
     """
-    flt = Fleet()
-    with open(truck_file, 'r') as file:
+    return build_fleet(_read_truck_rows(truck_file), depot_location,
+                       array_backed, cities)
+
+
+def _read_truck_rows(truck_file: str) -> List[Tuple[int, int]]:
+    """Return the (truck ID, capacity) of each truck in <truck_file>."""
+    rows = []
+    with _open_text(truck_file) as file:
         for line in file:
             tokens = line.strip().split(',')
-            tid = int(tokens[0])
-            capacity = int(tokens[1])
+            rows.append((int(tokens[0]), int(tokens[1])))
+    return rows
+
+
+def build_fleet(rows: List[Tuple[int, int]], depot_location: str,
+                array_backed: bool = False,
+                cities: Optional[CityRegistry] = None) -> Fleet:
+    """Return a Fleet with an empty truck for each (truck ID, capacity) in
+    <rows>, starting at <depot_location>. If <array_backed> is True, return an
+    ArrayFleet instead. The depot name is interned with <cities>, if given.
+    """
+    if cities is not None:
+        depot_location = cities.intern(depot_location)
+    if array_backed:
+        flt = ArrayFleet(cities)
+        for tid, capacity in rows:
+            flt.new_truck(tid, capacity, depot_location)
+    else:
+        flt = Fleet()
+        for tid, capacity in rows:
             flt.add_truck(Truck(tid, capacity, depot_location))
     return flt
 
 
+def cached_run(config: Dict[str, Union[str, bool]],
+               cache: ResultCache) -> Dict[str, Union[int, float]]:
+    """Return the statistics of the experiment configured by <config>,
+    taking them from <cache> when possible and storing them there otherwise.
+
+    On a hit, no data file is parsed and no scheduling is done. Experiments
+    using the random algorithm, a deadline or a time-budgeted improvement
+    phase are never cached, since rerunning them need not give the same
+    statistics, and neither are experiments writing an allocation file.
+    """
+    if config['algorithm'] == 'random' or config.get('improve_seconds') \
+            or config.get('deadline_seconds') \
+            or config.get('allocation_output'):
+        return SchedulingExperiment(config).run()
+    key = experiment_key(config)
+    stats = cache.get(key)
+    if stats is None:
+        stats = SchedulingExperiment(config).run()
+        cache.put(key, stats)
+    return stats
+
+
 def simple_check(config_file: str) -> None:
     """Configure and run a single experiment on the scheduling problem
     defined in <config_file>.
@@ -233,16 +625,26 @@ def simple_check(config_file: str) -> None:
     # Create and run an experiment with that configuration.
     experiment = SchedulingExperiment(configuration)
     experiment.run(report=True)
+    if experiment.snapshots is not None:
+        print(f'Input snapshots: {experiment.snapshots.report()}')
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-io': ['read_parcels', 'read_distance_map', 'read_trucks',
-                       '_print_report', 'simple_check'],
+                       'read_coordinates',
+                       '_print_report', 'simple_check', '_open_text'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'json', 'scheduler', 'domain',
-                                   'distance_map'],
+                                   'json', 'os', 'time', 'concurrent',
+                                   'bz2', 'gzip', 'io', 'lzma',
+                                   'scheduler', 'domain',
+                                   'distance_map', 'geo_distance_map',
+                                   'csr_distance_map',
+                                   'cache', 'array_fleet',
+                                   'city_registry', 'snapshot', 'improve',
+                                   'optimal', 'allocation_writer',
+                                   'simulation'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
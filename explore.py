@@ -20,16 +20,74 @@ Sophia Huynh, Myriam Majedi, and Jaisie Sin.
 This module reads from a json file (whose name is hard-coded in the
 compare_algorithms block) to determine the parcel, truck and map files to use.
 It then constructs all nine possible algorithm configurations, and runs each
-on this same data.  Results are printed to a csv file called 'results.csv'.
+on this same data, optionally along with the exact 'optimal' algorithm to
+show how far the others are from the best possible schedule.  Results are
+printed to a csv file called 'results.csv'.
 
 You have no tasks associated with this module.  It is provided to you so that
 you can compare the performance of the algorithms and notice any patterns or
 conclusions you might draw.  You may also find that reviewing the comparison
 reveals bugs in your code.
 """
-from typing import TextIO, Dict, Union
+from typing import TextIO, Dict, List, Union, Optional, Iterator, Tuple
+from concurrent.futures import ProcessPoolExecutor
 import json
-from experiment import SchedulingExperiment
+from city_registry import CityRegistry
+from experiment import SchedulingExperiment, build_fleet, fleet_stats, \
+    load_inputs
+from shared_data import SharedProblem, apply_allocation, schedule_shared
+from snapshot import SnapshotStore
+
+
+# List of possible configurations for the scheduling algorithm.
+ALGORITHM_CONFIGURATIONS = [
+    # --- Random
+    {'algorithm': 'random',
+     'parcel_priority': 'NA',
+     'parcel_order': 'NA',
+     'truck_order': 'NA'},
+    # --- Greedy by volume, with 4 sub-configurations
+    {'algorithm': 'greedy',
+     'parcel_priority': 'volume',
+     'parcel_order': 'non-decreasing',
+     'truck_order': 'non-decreasing'},
+    {'algorithm': 'greedy',
+     'parcel_priority': 'volume',
+     'parcel_order': 'non-decreasing',
+     'truck_order': 'non-increasing'},
+    {'algorithm': 'greedy',
+     'parcel_priority': 'volume',
+     'parcel_order': 'non-increasing',
+     'truck_order': 'non-decreasing'},
+    {'algorithm': 'greedy',
+     'parcel_priority': 'volume',
+     'parcel_order': 'non-increasing',
+     'truck_order': 'non-increasing'},
+    # --- Greedy by destination, with 4 sub-configurations
+    {'algorithm': 'greedy',
+     'parcel_priority': 'destination',
+     'parcel_order': 'non-decreasing',
+     'truck_order': 'non-decreasing'},
+    {'algorithm': 'greedy',
+     'parcel_priority': 'destination',
+     'parcel_order': 'non-decreasing',
+     'truck_order': 'non-increasing'},
+    {'algorithm': 'greedy',
+     'parcel_priority': 'destination',
+     'parcel_order': 'non-increasing',
+     'truck_order': 'non-decreasing'},
+    {'algorithm': 'greedy',
+     'parcel_priority': 'destination',
+     'parcel_order': 'non-increasing',
+     'truck_order': 'non-increasing'}
+]
+
+# The exact branch and bound configuration, run as a yardstick for the others
+# only when asked for, since its search can take very long on large problems.
+OPTIMAL_CONFIGURATION = {'algorithm': 'optimal',
+                         'parcel_priority': 'NA',
+                         'parcel_order': 'NA',
+                         'truck_order': 'NA'}
 
 
 def print_table_title(file: TextIO) -> None:
@@ -59,11 +117,15 @@ def print_table_row(config: Dict[str, Union[str, bool]],
                f'{stats["unscheduled"]}\n')
 
 
-def compare_algorithms(config_file: str) -> None:
+def compare_algorithms(config_file: str, optimal: bool = False,
+                       workers: int = 0) -> None:
     """Compare all algorithms on a single problem.
 
-    Run the random algorithm and every configuration of the greedy
-    algorithm on the scheduling problem defined in <config_file>.
+    Run the random algorithm and every configuration of the greedy algorithm
+    on the scheduling problem defined in <config_file>, and the optimal
+    algorithm too if <optimal> is True.  If <workers> is not 0, the
+    configurations run in a pool of <workers> processes that share one copy
+    of the problem.
 
     Precondition: <config_file> a path to a json file with keys and values
     as in the dictionary format defined in Assignment 1.
@@ -76,61 +138,71 @@ def compare_algorithms(config_file: str) -> None:
     # If it has any other keys, we will ignore them.  Instead of taking the
     # algorithm configuration from a file, we try all possible configurations.
 
-    # List of possible configurations for the scheduling algorithm.
-    algorithm_configurations = [
-        # --- Random
-        {'algorithm': 'random',
-         'parcel_priority': 'NA',
-         'parcel_order': 'NA',
-         'truck_order': 'NA'},
-        # --- Greedy by volume, with 4 sub-configurations
-        {'algorithm': 'greedy',
-         'parcel_priority': 'volume',
-         'parcel_order': 'non-decreasing',
-         'truck_order': 'non-decreasing'},
-        {'algorithm': 'greedy',
-         'parcel_priority': 'volume',
-         'parcel_order': 'non-decreasing',
-         'truck_order': 'non-increasing'},
-        {'algorithm': 'greedy',
-         'parcel_priority': 'volume',
-         'parcel_order': 'non-increasing',
-         'truck_order': 'non-decreasing'},
-        {'algorithm': 'greedy',
-         'parcel_priority': 'volume',
-         'parcel_order': 'non-increasing',
-         'truck_order': 'non-increasing'},
-        # --- Greedy by destination, with 4 sub-configurations
-        {'algorithm': 'greedy',
-         'parcel_priority': 'destination',
-         'parcel_order': 'non-decreasing',
-         'truck_order': 'non-decreasing'},
-        {'algorithm': 'greedy',
-         'parcel_priority': 'destination',
-         'parcel_order': 'non-decreasing',
-         'truck_order': 'non-increasing'},
-        {'algorithm': 'greedy',
-         'parcel_priority': 'destination',
-         'parcel_order': 'non-increasing',
-         'truck_order': 'non-decreasing'},
-        {'algorithm': 'greedy',
-         'parcel_priority': 'destination',
-         'parcel_order': 'non-increasing',
-         'truck_order': 'non-increasing'}
-    ]
-
+    # When snapshots are enabled, every configuration shares one store, so
+    # only the first run can miss.
+    snapshots = SnapshotStore() if basic_config.get('snapshots') else None
     with open('data/results.csv', 'w') as file:
         print_table_title(file)
-        for item in algorithm_configurations:
-            # Start with the basic configuration <config>, and add the
-            # algorithm details from this item in our list of configurations.
-            config = basic_config.copy()
-            config.update(item)
-            # Run an experiment on this configuration and print the results
-            # to our csv file.
-            expt = SchedulingExperiment(config)
-            results = expt.run(report=False)
+        for config, results in run_configurations(basic_config, snapshots,
+                                                  workers, optimal):
             print_table_row(config, results, file)
+    if snapshots is not None:
+        print(f'Input snapshots: {snapshots.report()}')
+
+
+def run_configurations(basic_config: Dict[str, Union[str, bool]],
+                       snapshots: Optional[SnapshotStore] = None,
+                       workers: int = 0, optimal: bool = False) \
+        -> Iterator[Tuple[Dict[str, Union[str, bool]],
+                          Dict[str, Union[int, float]]]]:
+    """Run every configuration in ALGORITHM_CONFIGURATIONS, followed by
+    OPTIMAL_CONFIGURATION if <optimal> is True, on the problem defined by
+    <basic_config>, and yield each full configuration with the statistics
+    it resulted in.
+
+    If <workers> is not 0, the configurations run in a pool of <workers>
+    processes that share one copy of the parcels and distances.
+    """
+    items = ALGORITHM_CONFIGURATIONS
+    if optimal:
+        items = items + [OPTIMAL_CONFIGURATION]
+    if workers:
+        yield from _run_shared(basic_config, snapshots, workers, items)
+        return
+    for item in items:
+        # Start with the basic configuration <config>, and add the
+        # algorithm details from this item in our list of configurations.
+        config = basic_config.copy()
+        config.update(item)
+        expt = SchedulingExperiment(config, snapshots)
+        yield config, expt.run(report=False)
+
+
+def _run_shared(basic_config: Dict[str, Union[str, bool]],
+                snapshots: Optional[SnapshotStore], workers: int,
+                items: List[Dict[str, str]]) \
+        -> Iterator[Tuple[Dict[str, Union[str, bool]],
+                          Dict[str, Union[int, float]]]]:
+    """Run every configuration in <items> on the problem defined by
+    <basic_config> in a pool of <workers> processes, as run_configurations
+    does.
+
+    The input files are read once, here, and published in shared memory;
+    each worker sends back only the arrays of its allocation.
+    """
+    parcels, fleet, dmap = load_inputs(dict(basic_config, fleet_backend=None),
+                                       CityRegistry(), snapshots)
+    rows = [(truck.id_, truck.volume_capacity) for truck in fleet.trucks]
+    configs = [dict(basic_config, **item) for item in items]
+    with SharedProblem(parcels, dmap) as problem, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(schedule_shared, problem.handle, config, rows)
+                   for config in configs]
+        for config, future in zip(configs, futures):
+            flt = build_fleet(rows, config['depot_location'])
+            unscheduled = apply_allocation(flt, parcels, problem.handle.cities,
+                                           future.result())
+            yield config, fleet_stats(flt, dmap, unscheduled)
 
 
 if __name__ == '__main__':
@@ -138,13 +210,17 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-io': ['compare_algorithms'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'json', 'experiment'],
+                                   'concurrent.futures', 'json',
+                                   'city_registry', 'experiment',
+                                   'shared_data', 'snapshot'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
     # ------------------------------------------------------------------------
     # The following code can be used to explore how the different scheduling
     # algorithms compare on one example configuration.  It creates a report
-    # in file 'data/results.csv'.
+    # in file 'data/results.csv'.  The configurations run in two worker
+    # processes that share one copy of the problem; pass workers=0 to run
+    # them one after another in this process instead.
     # ------------------------------------------------------------------------
-    compare_algorithms('data/demo.json')
+    compare_algorithms('data/demo.json', workers=2)
@@ -0,0 +1,193 @@
+"""Assignment 1 - Bounded-memory sorting
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class ExternalSorter, which puts items in the same
+order as a PriorityQueue would remove them, while holding only a bounded
+number of them in memory.
+
+Items are read in runs of at most the budgeted size. Each run is sorted in
+memory and, unless it is the only one, written (pickled) to a temporary file.
+The runs are then merged lazily, holding one item per run in memory. Both
+the sort and the merge are stable, and the runs are merged in the order they
+were read, so items of equal priority keep their first-in-first-out order.
+
+When the items are given as a sequence, the runs hold only their indexes in
+it, which are all that is spilled, and the items themselves are yielded.
+Items of any other iterable are spilled whole, and come back as copies.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, \
+    Sequence
+from functools import cmp_to_key
+import heapq
+import os
+import pickle
+import tempfile
+
+
+# Marks the end of the items being sorted.
+_END = object()
+
+
+def _run_items(path: str) -> Iterator[Any]:
+    """Yield the items of the run written to the file at <path>."""
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+class ExternalSorter:
+    """Sorts items by priority in bounded memory, spilling sorted runs to
+    disk.
+
+    === Public Attributes ===
+    run_size: the largest number of items held in memory while reading.
+    directory: the directory temporary run files are made in, or None for
+      the system default.
+    spilled_runs: the number of runs written to disk by the last sort.
+    spilled_items: the number of items written to disk by the last sort.
+    spilled_bytes: the number of bytes written to disk by the last sort.
+
+    === Private Attributes ===
+    _key: the sort key equivalent to the priority function.
+
+    === Representation Invariants ===
+    - run_size > 0
+    """
+    run_size: int
+    directory: Any
+    spilled_runs: int
+    spilled_items: int
+    spilled_bytes: int
+    _key: Callable[[Any], Any]
+
+    def __init__(self, higher_priority: Callable[[Any, Any], bool],
+                 run_size: int, directory: Any = None) -> None:
+        """Initialize this to sort so that, if <higher_priority>(x, y) is
+        true, x comes before y, holding at most <run_size> items in memory
+        while reading.
+        """
+        def compare(a: Any, b: Any) -> int:
+            if higher_priority(a, b):
+                return -1
+            return 1 if higher_priority(b, a) else 0
+        self._key = cmp_to_key(compare)
+        self.run_size = run_size
+        self.directory = directory
+        self.spilled_runs = 0
+        self.spilled_items = 0
+        self.spilled_bytes = 0
+
+    def sort(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Yield <items> from the highest priority to the lowest, those of
+        equal priority in the order they came in.
+
+        If <items> is a sequence, the items themselves are yielded, and only
+        their indexes are spilled to disk. Otherwise, items that were spilled
+        to disk are yielded as unpickled copies.
+
+        >>> sorter = ExternalSorter(lambda a, b: a[0] < b[0], 2)
+        >>> items = [(2, 'a'), (1, 'b'), (2, 'c'), (1, 'd'), (0, 'e')]
+        >>> ordered = list(sorter.sort(items))
+        >>> ordered
+        [(0, 'e'), (1, 'b'), (1, 'd'), (2, 'a'), (2, 'c')]
+        >>> ordered[0] is items[4]
+        True
+        >>> sorter.spilled_runs, sorter.spilled_items
+        (3, 5)
+        >>> list(sorter.sort(iter(items))) == ordered
+        True
+        """
+        self.spilled_runs = 0
+        self.spilled_items = 0
+        self.spilled_bytes = 0
+        if isinstance(items, Sequence):
+            key = self._key
+            for index in self._sort(iter(range(len(items))),
+                                    lambda i: key(items[i])):
+                yield items[index]
+        else:
+            yield from self._sort(iter(items), self._key)
+
+    def _sort(self, source: Iterator[Any], key: Callable[[Any], Any]) \
+            -> Iterator[Any]:
+        """Yield the items of <source> in increasing order of <key>, those
+        with equal keys in the order they came in, spilling runs to disk if
+        there are more than <run_size> items."""
+        run = self._next_run(source, key)
+        peeked = next(source, _END)
+        if peeked is _END:
+            # Everything fit in memory: no need to touch the disk.
+            yield from run
+            return
+        with tempfile.TemporaryDirectory(dir=self.directory) as directory:
+            paths = [self._spill(run, directory, 0)]
+            while peeked is not _END:
+                run = self._next_run(source, key, peeked)
+                paths.append(self._spill(run, directory, len(paths)))
+                peeked = next(source, _END)
+            yield from heapq.merge(*[_run_items(path) for path in paths],
+                                   key=key)
+
+    def _next_run(self, source: Iterator[Any], key: Callable[[Any], Any],
+                  first: Any = _END) -> List[Any]:
+        """Return the next run of at most <run_size> items of <source>,
+        starting with <first> if it is given, sorted by <key>."""
+        run = [] if first is _END else [first]
+        if len(run) == self.run_size:
+            return run
+        for item in source:
+            run.append(item)
+            if len(run) == self.run_size:
+                break
+        run.sort(key=key)
+        return run
+
+    def _spill(self, run: List[Any], directory: str, number: int) -> str:
+        """Write <run> to a new file in <directory> and return its path."""
+        path = os.path.join(directory, f'run{number}.pickle')
+        with open(path, 'wb') as file:
+            for item in run:
+                pickle.dump(item, file, pickle.HIGHEST_PROTOCOL)
+            self.spilled_bytes += file.tell()
+        self.spilled_runs += 1
+        self.spilled_items += len(run)
+        return path
+
+    def report(self) -> Dict[str, int]:
+        """Return how much the last sort spilled to disk."""
+        return {'spilled_runs': self.spilled_runs,
+                'spilled_items': self.spilled_items,
+                'spilled_bytes': self.spilled_bytes}
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['_run_items', '_spill'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'functools', 'heapq', 'os', 'pickle',
+                                   'tempfile'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
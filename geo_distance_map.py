@@ -0,0 +1,230 @@
+"""Assignment 1 - Distances computed from city coordinates
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class GeoDistanceMap, a DistanceMap that knows the
+latitude and longitude of cities and computes the distance between any two
+of them by the haversine (great-circle) formula, rounded to the nearest
+whole unit. Distances added explicitly, such as those of a map file,
+override the computed ones.
+
+Only the coordinates and the explicit distances are stored, so a map of n
+cities takes O(n) space rather than the O(n^2) of listing every pair. The
+explicit distances may also be those of another DistanceMap, such as a
+CSRDistanceMap read from a map file, which is wrapped rather than copied. Whole
+rows of distances, as asked for by row, are computed in one pass over the
+cities and kept in a cache of bounded size, least recently used rows being
+dropped first.
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from math import asin, cos, radians, sin, sqrt
+from distance_map import DistanceMap
+
+# The mean radius of the Earth, in kilometres.
+EARTH_RADIUS = 6371.0
+
+
+class GeoDistanceMap(DistanceMap):
+    """A DistanceMap that computes the distances it has not been given from
+    the coordinates of cities.
+
+    === Public Attributes ===
+    radius: the radius of the sphere distances are measured on, in the units
+      distances are given in.
+    cache_rows: the largest number of computed rows kept.
+
+    === Private Attributes ===
+    _base: the map whose distances are explicit distances of this one,
+      below those added to this map, or None.
+    _locations: the latitude and longitude, in radians, and the cosine of
+      the latitude of each city with coordinates.
+    _rows: the rows computed by row, least recently used first.
+
+    === Representation Invariants ===
+    - len(<_rows>) <= cache_rows
+    - radius > 0
+
+    === Sample Usage ===
+    >>> d = GeoDistanceMap()
+    >>> d.add_location('Toronto', 43.65, -79.38)
+    >>> d.add_location('Ottawa', 45.42, -75.70)
+    >>> d.distance('Toronto', 'Ottawa')
+    352
+    >>> d.add_distance('Toronto', 'Ottawa', 450)
+    >>> d.distance('Toronto', 'Ottawa'), d.distance('Toronto', 'Montreal')
+    (450, -1)
+    """
+    radius: float
+    cache_rows: int
+    _base: Optional[DistanceMap]
+    _locations: Dict[str, Tuple[float, float, float]]
+    _rows: 'OrderedDict[str, Dict[str, int]]'
+
+    def __init__(self, radius: float = EARTH_RADIUS,
+                 cache_rows: int = 1024) -> None:
+        """Create a map of distances on a sphere of <radius>, keeping at most
+        <cache_rows> computed rows."""
+        DistanceMap.__init__(self)
+        self.radius = radius
+        self.cache_rows = cache_rows
+        self._base = None
+        self._locations = {}
+        self._rows = OrderedDict()
+
+    @classmethod
+    def from_map(cls, dmap: DistanceMap,
+                 coordinates: Dict[str, Tuple[float, float]],
+                 cache_rows: int = 1024) -> 'GeoDistanceMap':
+        """Return a GeoDistanceMap with the distances stored in <dmap> and
+        the (latitude, longitude), in degrees, of each city in
+        <coordinates>. <dmap> is used as it is, not copied, so it must not
+        be changed afterwards.
+
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Ottawa', 450)
+        >>> d = GeoDistanceMap.from_map(m, {'Toronto': (43.65, -79.38),
+        ...                                 'Montreal': (45.50, -73.57)})
+        >>> d.distance('Ottawa', 'Toronto'), d.distance('Montreal', 'Toronto')
+        (450, 504)
+        """
+        geo = cls(cache_rows=cache_rows)
+        geo._base = dmap
+        for city, (latitude, longitude) in coordinates.items():
+            geo.add_location(city, latitude, longitude)
+        return geo
+
+    def add_location(self, city: str, latitude: float,
+                     longitude: float) -> None:
+        """Record that <city> is at <latitude> and <longitude>, in degrees.
+        """
+        lat = radians(latitude)
+        self._locations[city] = (lat, radians(longitude), cos(lat))
+        self._version += 1
+        self._rows.clear()
+
+    def add_distance(self, city_a: str, city_b: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """Add <distance1> and <distance2> for <city_a> and <city_b>, as
+        DistanceMap.add_distance does, overriding their computed distances.
+        """
+        kept = self._base is not None and city_a not in \
+            self._distances.get(city_b, {}) and \
+            self._base.distance(city_b, city_a) != -1
+        DistanceMap.add_distance(self, city_a, city_b, distance1, distance2)
+        if kept:
+            # As in DistanceMap, a stored reverse distance is not replaced.
+            del self._distances[city_b][city_a]
+        self._rows.pop(city_a, None)
+        self._rows.pop(city_b, None)
+
+    def distance(self, city_a: str, city_b: str) -> int:
+        """Return the distance from <city_a> to <city_b>: the one added, if
+        any, or else the one computed from their coordinates. Return -1 if
+        there is neither."""
+        row = self._rows.get(city_a)
+        if row is not None:
+            return row.get(city_b, -1)
+        explicit = self._distances.get(city_a)
+        if explicit is not None and city_b in explicit:
+            return explicit[city_b]
+        if self._base is not None:
+            distance = self._base.distance(city_a, city_b)
+            if distance != -1:
+                return distance
+        a = self._locations.get(city_a)
+        b = self._locations.get(city_b)
+        if a is None or b is None or city_a == city_b:
+            return -1
+        return self._haversine(a, b)
+
+    def row(self, city: str) -> Dict[str, int]:
+        """Return the distances from <city> to every other city, by city.
+        The result must not be mutated.
+
+        >>> d = GeoDistanceMap(cache_rows=1)
+        >>> d.add_location('Toronto', 43.65, -79.38)
+        >>> d.add_location('Ottawa', 45.42, -75.70)
+        >>> d.add_distance('Toronto', 'Hamilton', 60)
+        >>> d.row('Toronto')
+        {'Ottawa': 352, 'Hamilton': 60}
+        >>> d.row('Hamilton')
+        {'Toronto': 60}
+        """
+        row = self._rows.get(city)
+        if row is not None:
+            self._rows.move_to_end(city)
+            return row
+        row = self._computed_row(city)
+        if self._base is not None:
+            row.update(self._base.row(city))
+        row.update(self._distances.get(city, {}))
+        self._rows[city] = row
+        if len(self._rows) > self.cache_rows:
+            self._rows.popitem(last=False)
+        return row
+
+    def cities(self) -> List[str]:
+        """Return every city that has coordinates or a distance recorded from
+        it."""
+        base = self._base.cities() if self._base is not None else []
+        return list(dict.fromkeys(list(self._locations) + base
+                                  + list(self._distances)))
+
+    def version(self) -> int:
+        """Return a number that changes whenever a distance or location is
+        added."""
+        if self._base is None:
+            return self._version
+        return self._version + self._base.version()
+
+    def _computed_row(self, city: str) -> Dict[str, int]:
+        """Return the distances computed from the coordinates of <city> to
+        every other city with coordinates, in one pass."""
+        origin = self._locations.get(city)
+        if origin is None:
+            return {}
+        lat_a, lon_a, cos_a = origin
+        scale = 2 * self.radius
+        row = {}
+        for other, (lat_b, lon_b, cos_b) in self._locations.items():
+            if other != city:
+                h = sin((lat_b - lat_a) / 2) ** 2 \
+                    + cos_a * cos_b * sin((lon_b - lon_a) / 2) ** 2
+                row[other] = round(scale * asin(sqrt(min(1.0, h))))
+        return row
+
+    def _haversine(self, a: Tuple[float, float, float],
+                   b: Tuple[float, float, float]) -> int:
+        """Return the great-circle distance between the locations <a> and
+        <b>, rounded to the nearest unit."""
+        h = sin((b[0] - a[0]) / 2) ** 2 \
+            + a[2] * b[2] * sin((b[1] - a[1]) / 2) ** 2
+        return round(2 * self.radius * asin(sqrt(min(1.0, h))))
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'collections', 'math', 'distance_map'],
+        'disable': ['E1136', 'W0212'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
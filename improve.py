@@ -0,0 +1,376 @@
+"""Assignment 1 - Local-search improvement of a schedule
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class LocalSearch and the function improve, which
+take a finished schedule (such as the one made by GreedyScheduler) and try
+to make it better within a wall-clock budget.
+
+A schedule is scored by its objective: the volume of unscheduled parcels,
+then the number of trucks used, then the total distance travelled, where
+smaller is better and earlier parts matter more. The moves tried are:
+- packing an unscheduled parcel onto a truck with room for it,
+- relocating a parcel to another truck,
+- swapping two parcels between trucks,
+- reversing part of a truck's route (2-opt).
+A move is kept only if it makes the objective smaller. Moves are scored from
+the running totals kept by Fleet and undone by rolling back to a Fleet
+savepoint, so no move costs more than the routes of the trucks it touches.
+"""
+from typing import List, Tuple, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heapify, heappop
+import copy
+import random
+import time
+from distance_map import DistanceMap
+from domain import Parcel, Truck, Fleet
+
+Objective = Tuple[int, int, int]
+
+# How many trucks are tried as the destination of a relocated parcel.
+_RELOCATE_CANDIDATES = 8
+
+
+def leg_length(dmap: DistanceMap, city_a: str, city_b: str) -> int:
+    """Return the distance from <city_a> to <city_b> in <dmap>, counting a
+    missing or non-positive distance as 0, as Truck.distance does."""
+    distance = dmap.distance(city_a, city_b)
+    return distance if distance > 0 else 0
+
+
+def cheapest_position(route: List[str], depot: str, city: str,
+                      dmap: DistanceMap) -> int:
+    """Return the index at which inserting <city> into <route>, which ends
+    with a leg back to <depot>, adds the least distance.
+
+    >>> m = DistanceMap()
+    >>> m.add_distance('A', 'B', 5)
+    >>> m.add_distance('A', 'C', 1)
+    >>> m.add_distance('B', 'C', 4)
+    >>> cheapest_position(['A', 'B'], 'A', 'C', m)
+    1
+    """
+    best = 1
+    best_cost = None
+    for k in range(1, len(route) + 1):
+        nxt = route[k] if k < len(route) else depot
+        cost = leg_length(dmap, route[k - 1], city) \
+            + leg_length(dmap, city, nxt) - leg_length(dmap, route[k - 1], nxt)
+        if best_cost is None or cost < best_cost:
+            best, best_cost = k, cost
+    return best
+
+
+class LocalSearch:
+    """Improves the schedule of a fleet in place, one move at a time.
+
+    === Public Attributes ===
+    fleet: the fleet being improved.
+    unscheduled: the parcels not on any truck of <fleet>.
+    dmap: the distances used to measure routes.
+
+    === Private Attributes ===
+    _rng: the source of randomness for choosing moves.
+    _unscheduled_volume: the total volume of <unscheduled>.
+    _candidates: a heap of the (volume, order, parcel) of each parcel in
+      <unscheduled>, smallest volume first.
+
+    === Representation Invariants ===
+    - <fleet> is always a valid schedule: between moves, no truck is over
+      capacity and every truck's route visits the destination of each of its
+      parcels.
+    - <_candidates> holds exactly the parcels in <unscheduled>.
+    """
+    fleet: Fleet
+    unscheduled: List[Parcel]
+    dmap: DistanceMap
+    _rng: random.Random
+    _unscheduled_volume: int
+    _candidates: List[Tuple[int, int, Parcel]]
+
+    def __init__(self, fleet: Fleet, unscheduled: List[Parcel],
+                 dmap: DistanceMap, seed: int = 0) -> None:
+        """Prepare to improve <fleet>, which left <unscheduled> unscheduled,
+        choosing moves at random from <seed>."""
+        self.fleet = fleet
+        self.unscheduled = list(unscheduled)
+        self.dmap = dmap
+        self._rng = random.Random(seed)
+        self._unscheduled_volume = sum(p.volume for p in unscheduled)
+        self._candidates = [(parcel.volume, order, parcel)
+                            for order, parcel in enumerate(unscheduled)]
+        heapify(self._candidates)
+
+    def objective(self) -> Objective:
+        """Return the (unscheduled volume, trucks used, total distance) of
+        the current schedule. Each part is read from the running totals of
+        the fleet in constant time."""
+        return (self._unscheduled_volume, self.fleet.num_nonempty_trucks(),
+                self.fleet.total_distance_travelled(self.dmap))
+
+    def run(self, deadline: float,
+            on_improve: Optional[Callable[[float, Objective], None]] = None) \
+            -> List[Tuple[float, Objective]]:
+        """Make moves until time.monotonic() reaches <deadline>, and return the
+        (seconds elapsed, objective) after each improvement, starting with
+        the objective before any move. <on_improve> is called with the same
+        pair after each improvement, if given.
+        """
+        start = time.monotonic()
+        telemetry = [(0.0, self.objective())]
+        stale = 0
+        while time.monotonic() < deadline and stale < 1000:
+            if self.step():
+                stale = 0
+                telemetry.append((time.monotonic() - start, self.objective()))
+                if on_improve is not None:
+                    on_improve(*telemetry[-1])
+            else:
+                stale += 1
+        return telemetry
+
+    def step(self) -> bool:
+        """Try one move, and return True iff it improved the schedule."""
+        if self._candidates and self._pack_unscheduled():
+            return True
+        trucks = [t for t in self.fleet.trucks if t.parcels]
+        if not trucks:
+            return False
+        roll = self._rng.random()
+        if roll < 0.5:
+            return self._relocate(self._rng.choice(trucks))
+        if roll < 0.8:
+            return self._swap(self._rng.choice(trucks))
+        return self._two_opt(self._rng.choice(trucks))
+
+    # ----- Moves -----
+
+    def _pack_unscheduled(self) -> bool:
+        """Pack the smallest unscheduled parcel onto the truck where its
+        stop adds the least distance, if any truck has room for it. Return
+        True iff a parcel was packed.
+
+        If the smallest parcel fits on no truck, neither does any other, so
+        only one parcel is ever tried.
+        """
+        volume, _, parcel = self._candidates[0]
+        room = max((truck.volume_capacity - truck.stored
+                    for truck in self.fleet.trucks), default=0)
+        if volume > room:
+            return False
+        best = None
+        best_cost = None
+        for truck in self.fleet.trucks:
+            if truck.packable(parcel):
+                cost = self._insertion_cost(truck, parcel)
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = truck, cost
+        heappop(self._candidates)
+        self.unscheduled.remove(parcel)
+        self._unscheduled_volume -= volume
+        _put(best, parcel, self.dmap)
+        return True
+
+    def _insertion_cost(self, truck: Truck, parcel: Parcel) -> int:
+        """Return how much longer the route of <truck> gets if <parcel> is
+        packed onto it. Using an empty truck costs more than any route."""
+        route = truck.route
+        city = parcel.destination
+        if city in route:
+            return 0
+        k = cheapest_position(route, truck.depot, city, self.dmap)
+        nxt = route[k] if k < len(route) else truck.depot
+        cost = leg_length(self.dmap, route[k - 1], city) \
+            + leg_length(self.dmap, city, nxt) \
+            - leg_length(self.dmap, route[k - 1], nxt)
+        if not truck.parcels:
+            cost += 1 << 40
+        return cost
+
+    def _relocate(self, source: Truck) -> bool:
+        """Try moving a random parcel of <source> to another truck. Return
+        True iff the move was kept."""
+        parcel = self._rng.choice(source.parcels)
+        targets = [t for t in self.fleet.trucks
+                   if t is not source and t.packable(parcel)]
+        if len(targets) > _RELOCATE_CANDIDATES:
+            targets = self._rng.sample(targets, _RELOCATE_CANDIDATES)
+        before = self.objective()
+        for target in targets:
+            savepoint = self.fleet.savepoint()
+            source.unpack(parcel)
+            _put(target, parcel, self.dmap)
+            if self._keep_if_better(savepoint, before):
+                return True
+        return False
+
+    def _swap(self, first: Truck) -> bool:
+        """Try swapping a random parcel of <first> with a random parcel of
+        another non-empty truck. Return True iff the swap was kept."""
+        others = [t for t in self.fleet.trucks if t is not first and t.parcels]
+        if not others:
+            return False
+        second = self._rng.choice(others)
+        p = self._rng.choice(first.parcels)
+        q = self._rng.choice(second.parcels)
+        if first.stored - p.volume + q.volume > first.volume_capacity or \
+                second.stored - q.volume + p.volume > second.volume_capacity:
+            return False
+        before = self.objective()
+        savepoint = self.fleet.savepoint()
+        first.unpack(p)
+        second.unpack(q)
+        _put(first, q, self.dmap)
+        _put(second, p, self.dmap)
+        return self._keep_if_better(savepoint, before)
+
+    def _keep_if_better(self, savepoint: int, before: Objective) -> bool:
+        """Keep the changes made since <savepoint> if they made the objective
+        smaller than <before>, or else roll them back. Release <savepoint>
+        either way, and return True iff the changes were kept."""
+        better = self.objective() < before
+        if not better:
+            self.fleet.rollback(savepoint)
+        self.fleet.release(savepoint)
+        return better
+
+    def _two_opt(self, truck: Truck) -> bool:
+        """Reverse the part of the route of <truck> whose reversal shortens
+        the route the most, if any does. Return True iff the route changed.
+
+        Every candidate reversal is priced in O(1) from prefix sums of the
+        forward and backward leg lengths along the route.
+        """
+        route = truck.route
+        n = len(route)
+        if n < 3:
+            return False
+        dmap = self.dmap
+        forward = [0] * n
+        backward = [0] * n
+        for k in range(1, n):
+            forward[k] = forward[k - 1] \
+                + leg_length(dmap, route[k - 1], route[k])
+            backward[k] = backward[k - 1] \
+                + leg_length(dmap, route[k], route[k - 1])
+        best = None
+        best_delta = 0
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                nxt = route[j + 1] if j + 1 < n else truck.depot
+                delta = leg_length(dmap, route[i - 1], route[j]) \
+                    + backward[j] - backward[i] \
+                    + leg_length(dmap, route[i], nxt) \
+                    - leg_length(dmap, route[i - 1], route[i]) \
+                    - (forward[j] - forward[i]) \
+                    - leg_length(dmap, route[j], nxt)
+                if delta < best_delta:
+                    best, best_delta = (i, j), delta
+        if best is None:
+            return False
+        truck.reverse(*best)
+        return True
+
+
+# ----- Changing one truck -----
+
+
+def _put(truck: Truck, parcel: Parcel, dmap: DistanceMap) -> None:
+    """Pack <parcel> onto <truck>, which has room for it, inserting its
+    destination where it adds the least distance."""
+    truck.pack(parcel, cheapest_position(truck.route, truck.depot,
+                                         parcel.destination, dmap))
+
+
+# ----- Restarts -----
+
+
+class ImprovementResult:
+    """The best schedule found by improve.
+
+    === Public Attributes ===
+    fleet: the best fleet found.
+    unscheduled: the parcels not on any truck of <fleet>.
+    objective: the (unscheduled volume, trucks used, total distance) of
+      <fleet>.
+    telemetry: for each restart, the (seconds elapsed, objective) after each
+      improvement it made.
+    """
+    fleet: Fleet
+    unscheduled: List[Parcel]
+    objective: Objective
+    telemetry: List[List[Tuple[float, Objective]]]
+
+    def __init__(self, fleet: Fleet, unscheduled: List[Parcel],
+                 objective: Objective,
+                 telemetry: List[List[Tuple[float, Objective]]]) -> None:
+        """Record the result of improve."""
+        self.fleet = fleet
+        self.unscheduled = unscheduled
+        self.objective = objective
+        self.telemetry = telemetry
+
+
+def _restart(fleet: Fleet, unscheduled: List[Parcel], dmap: DistanceMap,
+             seconds: float, seed: int) \
+        -> Tuple[Objective, Fleet, List[Parcel], List[Tuple[float, Objective]]]:
+    """Improve <fleet> for <seconds> from random <seed>, and return the
+    objective, fleet, unscheduled parcels and telemetry reached."""
+    search = LocalSearch(fleet, unscheduled, dmap, seed)
+    telemetry = search.run(time.monotonic() + seconds)
+    return search.objective(), search.fleet, search.unscheduled, telemetry
+
+
+def improve(fleet: Fleet, unscheduled: List[Parcel], dmap: DistanceMap,
+            seconds: float, restarts: int = 1, workers: int = 0,
+            seed: int = 0) -> ImprovementResult:
+    """Return the best schedule found by <restarts> local searches from the
+    schedule of <fleet>, which left <unscheduled> unscheduled.
+
+    With <workers> of 0, the restarts run one after another in this process
+    and share the budget of <seconds>; otherwise each runs for <seconds> in
+    a pool of <workers> processes. Each restart works on its own copy, so
+    <fleet> and <unscheduled> are never mutated.
+    """
+    jobs = [seed + k for k in range(restarts)]
+    if workers == 0:
+        results = [_restart(copy.deepcopy(fleet), list(unscheduled), dmap,
+                            seconds / restarts, job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_restart, fleet, unscheduled, dmap,
+                                   seconds, job) for job in jobs]
+            results = [future.result() for future in futures]
+    best = min(results, key=lambda result: result[0])
+    return ImprovementResult(best[1], best[2], best[0],
+                             [result[3] for result in results])
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'concurrent.futures', 'copy', 'heapq',
+                                   'random',
+                                   'time', 'distance_map', 'domain'],
+        'disable': ['E1136', 'W0212'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
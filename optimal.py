@@ -0,0 +1,284 @@
+"""Assignment 1 - Exact scheduling by branch and bound
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class OptimalScheduler, an exact scheduler used to
+measure how far the other schedulers are from the best possible schedule.
+It minimizes the volume of unscheduled parcels and then the number of trucks
+used; routes are built in the usual way from the parcels each truck gets.
+
+The search decides, largest parcel first, which truck each parcel goes on or
+whether it is left unscheduled. A branch is cut as soon as a lower bound on
+its best outcome is no better than the best schedule found so far, trucks
+with the same capacity and load are only tried once per parcel, and each
+(parcel, truck loads) subproblem is only explored again when it is reached
+with less volume left unscheduled.
+"""
+from typing import List, Dict, Tuple
+from bisect import bisect_left
+from scheduler import Scheduler
+from domain import Parcel, Truck
+
+# The largest number of subproblems remembered by the search.
+_MEMO_LIMIT = 1 << 21
+
+
+class OptimalScheduler(Scheduler):
+    """
+    A scheduler that finds a schedule with the least unscheduled volume, and
+    among those one using the fewest trucks, by branch and bound. Meant for
+    instances of up to a few hundred parcels.
+
+    === Public Attributes ===
+    node_limit: the largest number of search nodes visited per schedule call.
+    nodes: the number of search nodes visited by the last schedule call.
+    proven_optimal: whether the last schedule call finished its search, so
+      that its schedule is known to be optimal. If not, the schedule is the
+      best one found within <node_limit> nodes.
+
+    === Private Attributes ===
+    _volumes: the volumes of the parcels being scheduled, largest first.
+    _negated: the negations of <_volumes>, in increasing order for bisect.
+    _suffix: _suffix[i] is the total of _volumes[i:].
+    _capacities: the capacity of each truck.
+    _loads: the volume packed so far onto each truck.
+    _choice: for each parcel, the index of its truck, or -1 if unscheduled.
+    _unscheduled: the volume left unscheduled so far.
+    _used: the number of trucks with a non-zero load.
+    _best: the (unscheduled volume, trucks used) of the best schedule found.
+    _best_choice: the value of <_choice> for the best schedule found.
+    _memo: for each subproblem, the least unscheduled volume it was
+      explored with.
+
+    === Representation Invariants ===
+    - len(<_volumes>) == len(<_choice>) == len(<_suffix>) - 1
+    - len(<_capacities>) == len(<_loads>)
+    - 0 <= <_loads>[j] <= <_capacities>[j] for every truck j
+    """
+    node_limit: int
+    nodes: int
+    proven_optimal: bool
+    _volumes: List[int]
+    _negated: List[int]
+    _suffix: List[int]
+    _capacities: List[int]
+    _loads: List[int]
+    _choice: List[int]
+    _unscheduled: int
+    _used: int
+    _best: Tuple[float, float]
+    _best_choice: List[int]
+    _memo: Dict[Tuple[int, Tuple[Tuple[int, int], ...]], int]
+
+    def __init__(self, node_limit: int = 1000000) -> None:
+        """initialize OptimalScheduler to visit at most <node_limit> search
+        nodes per schedule"""
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.proven_optimal = False
+        self._volumes = []
+        self._negated = []
+        self._suffix = [0]
+        self._capacities = []
+        self._loads = []
+        self._choice = []
+        self._unscheduled = 0
+        self._used = 0
+        self._best = (float('inf'), float('inf'))
+        self._best_choice = []
+        self._memo = {}
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks> so that as
+        little volume as possible is left unscheduled, using as few trucks as
+        possible.
+
+        >>> s = OptimalScheduler()
+        >>> t1, t2 = Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')
+        >>> s.schedule([Parcel(1, 6, 'Toronto', 'Hamilton'),
+        ...             Parcel(2, 7, 'Toronto', 'London'),
+        ...             Parcel(3, 4, 'Toronto', 'London'),
+        ...             Parcel(4, 3, 'Toronto', 'Guelph')], [t1, t2])
+        []
+        >>> sorted(p.id_ for p in t1.parcels), sorted(p.id_ for p in t2.parcels)
+        ([2, 4], [1, 3])
+        >>> s.proven_optimal
+        True
+        """
+        ordered = sorted(parcels, key=lambda p: (-p.volume, p.id_))
+        self._volumes = [p.volume for p in ordered]
+        self._negated = [-v for v in self._volumes]
+        self._suffix = [0] * (len(ordered) + 1)
+        for i in range(len(ordered) - 1, -1, -1):
+            self._suffix[i] = self._suffix[i + 1] + self._volumes[i]
+        self._capacities = [t.volume_capacity - t.stored for t in trucks]
+        self._loads = [0] * len(trucks)
+        self._choice = [-1] * len(ordered)
+        self._unscheduled = 0
+        self._used = 0
+        self._best = (float('inf'), float('inf'))
+        self._best_choice = list(self._choice)
+        self._memo = {}
+        self.nodes = 0
+        self.proven_optimal = self._search()
+
+        unscheduled = []
+        for parcel, j in zip(ordered, self._best_choice):
+            if j < 0:
+                unscheduled.append(parcel)
+            else:
+                trucks[j].pack(parcel)
+        if verbose:
+            print(f'Optimal search: {self.nodes} nodes, '
+                  f'proven optimal: {self.proven_optimal}')
+        return unscheduled
+
+    def _search(self) -> bool:
+        """Try every way of scheduling the parcels, depth first. Return False
+        iff the search was cut short by <node_limit>.
+
+        The search keeps its own stack rather than recursing, so that it is
+        not limited by the recursion limit on long lists of parcels. Each
+        frame holds a parcel index, the choices left to try for it, and the
+        choice it is on now (None before the first).
+        """
+        stack: List[List] = []
+        i = 0
+        while True:
+            self.nodes += 1
+            if self.nodes > self.node_limit:
+                return False
+            branches = self._branches(i)
+            if branches:
+                stack.append([i, iter(branches), None])
+            while stack:
+                frame = stack[-1]
+                i = frame[0]
+                if frame[2] is not None:
+                    self._place(i, frame[2], -1)
+                frame[2] = next(frame[1], None)
+                if frame[2] is not None:
+                    self._place(i, frame[2], 1)
+                    i += 1
+                    break
+                stack.pop()
+            else:
+                return True
+
+    def _branches(self, i: int) -> List[int]:
+        """Return the choices worth trying for the parcel at index <i>, given
+        the choices made for the parcels before it: the indexes of trucks to
+        pack it on, then -1 to leave it unscheduled. Record the schedule if
+        every parcel has a choice, and return [] then or if no schedule of
+        the rest can beat the best found so far."""
+        if i == len(self._volumes):
+            if (self._unscheduled, self._used) < self._best:
+                self._best = (self._unscheduled, self._used)
+                self._best_choice = list(self._choice)
+            return []
+        if self._bounded(i) or self._seen(i):
+            return []
+
+        volume = self._volumes[i]
+        loads = self._loads
+        capacities = self._capacities
+        # Trucks already in use are tried tightest first, then empty trucks
+        # largest first; a truck with the same capacity and load as one
+        # already tried would lead to the same schedules, so is skipped.
+        order = sorted(range(len(loads)),
+                       key=lambda j: (loads[j] == 0,
+                                      capacities[j] - loads[j] if loads[j]
+                                      else -capacities[j]))
+        branches = []
+        tried = set()
+        for j in order:
+            shape = (capacities[j], loads[j])
+            if loads[j] + volume > capacities[j] or shape in tried:
+                continue
+            tried.add(shape)
+            branches.append(j)
+        branches.append(-1)
+        return branches
+
+    def _place(self, i: int, j: int, sign: int) -> None:
+        """Make (if <sign> is 1) or undo (if <sign> is -1) the choice <j>
+        for the parcel at index <i>: packing it on truck <j>, or leaving it
+        unscheduled if <j> is -1."""
+        volume = sign * self._volumes[i]
+        if j < 0:
+            self._unscheduled += volume
+            return
+        if self._loads[j] == 0:
+            self._used += 1
+        self._loads[j] += volume
+        if self._loads[j] == 0:
+            self._used -= 1
+        self._choice[i] = j if sign > 0 else -1
+
+    def _bounded(self, i: int) -> bool:
+        """Return whether no schedule of the parcels from index <i> on can
+        beat the best schedule found so far."""
+        free = [c - load for c, load in zip(self._capacities, self._loads)]
+        # Parcels bigger than the largest free space can never be packed;
+        # the rest can at best fill the free space.
+        k = bisect_left(self._negated, -max(free, default=0), i)
+        least = self._unscheduled + self._suffix[i] - self._suffix[k] \
+            + max(0, self._suffix[k] - sum(free))
+        if least != self._best[0]:
+            return least > self._best[0]
+
+        # Beating the best schedule now means leaving no more than its
+        # unscheduled volume, so packing the rest, and whatever does not fit
+        # in trucks already in use needs empty trucks.
+        needed = self._suffix[i] - (self._best[0] - self._unscheduled)
+        needed -= sum(f for f, load in zip(free, self._loads) if load)
+        extra = 0
+        for capacity in sorted((c for c, load in
+                                zip(self._capacities, self._loads)
+                                if not load), reverse=True):
+            if needed <= 0:
+                break
+            needed -= capacity
+            extra += 1
+        return needed > 0 or self._used + extra >= self._best[1]
+
+    def _seen(self, i: int) -> bool:
+        """Return whether the subproblem of scheduling the parcels from index
+        <i> on, onto trucks loaded as they are now, has already been explored
+        with no more volume left unscheduled, remembering it if not."""
+        key = (i, tuple(sorted(zip(self._capacities, self._loads))))
+        previous = self._memo.get(key)
+        if previous is not None and previous <= self._unscheduled:
+            return True
+        if previous is not None or len(self._memo) < _MEMO_LIMIT:
+            self._memo[key] = self._unscheduled
+        return False
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['schedule'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'bisect', 'scheduler', 'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
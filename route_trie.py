@@ -0,0 +1,247 @@
+"""Assignment 1 - Route-prefix trie
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the classes RouteNode and RouteTrie. A RouteTrie stores
+the routes of many trucks, sharing the nodes of common route prefixes. Each
+node caches the distance from the depot to its city along its prefix, so the
+length of every route in a fleet can be found by visiting each distinct
+prefix once.
+
+Each node counts the routes that end at it, and a node that no route ends at
+and no longer prefix extends is removed from the trie as soon as the last
+route leaves it, so a trie only holds the prefixes of routes in use.
+"""
+from typing import Dict, List, Optional, Tuple
+from distance_map import DistanceMap
+
+
+class RouteNode:
+    """One route prefix in a RouteTrie.
+
+    === Public Attributes ===
+    city: the last city of this prefix.
+    parent: the node of this prefix without its last city, or None if this
+      prefix is just the depot.
+    depth: the number of legs in this prefix.
+    children: the nodes of the prefixes that extend this one, by their last
+      city.
+
+    === Private Attributes ===
+    _cumulative: the sum of the positive leg distances along this prefix,
+      valid for the DistanceMap <_dmap> at version <_version>.
+    _dmap: the DistanceMap <_cumulative> was computed with, or None.
+    _version: the version of <_dmap> that <_cumulative> was computed with.
+    _refs: the number of routes held at this node.
+
+    === Representation Invariants ===
+    - depth == 0 if parent is None, else parent.depth + 1
+    - _refs >= 0
+    """
+    city: str
+    parent: Optional['RouteNode']
+    depth: int
+    children: Dict[str, 'RouteNode']
+    _cumulative: int
+    _dmap: Optional[DistanceMap]
+    _version: int
+    _refs: int
+
+    def __init__(self, city: str, parent: Optional['RouteNode'] = None) \
+            -> None:
+        """Create the node for the prefix <parent> followed by <city>."""
+        self.city = city
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.children = {}
+        self._cumulative = 0
+        self._dmap = None
+        self._version = -1
+        self._refs = 0
+
+    def child(self, city: str) -> 'RouteNode':
+        """Return the node for this prefix followed by <city>, creating it if
+        needed.
+
+        >>> root = RouteNode('Toronto')
+        >>> root.child('Hamilton') is root.child('Hamilton')
+        True
+        >>> root.child('Hamilton').depth
+        1
+        """
+        node = self.children.get(city)
+        if node is None:
+            node = RouteNode(city, self)
+            self.children[city] = node
+        return node
+
+    def hold(self) -> None:
+        """Count one more route ending at this node."""
+        self._refs += 1
+
+    def release(self) -> None:
+        """Stop counting one route ending at this node, then remove this
+        node, and each of its ancestors in turn, from the trie while no route
+        ends at it and no longer prefix extends it. Roots are kept.
+
+        Precondition: a route held at this node has not been released.
+
+        >>> root = RouteNode('Toronto')
+        >>> node = root.child('Hamilton').child('London')
+        >>> node.hold()
+        >>> root.child('Hamilton').hold()
+        >>> node.release()
+        >>> list(root.children), root.children['Hamilton'].children
+        (['Hamilton'], {})
+        """
+        self._refs -= 1
+        node = self
+        while node.parent is not None and node._refs == 0 \
+                and not node.children:
+            del node.parent.children[node.city]
+            node = node.parent
+
+    def cumulative_distance(self, dmap: DistanceMap) -> int:
+        """Return the sum of the positive leg distances along this prefix,
+        according to <dmap>. Only the part of the prefix not yet computed for
+        <dmap> is walked.
+
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> m.add_distance('Hamilton', 'London', 12)
+        >>> node = RouteNode('Toronto').child('Hamilton').child('London')
+        >>> node.cumulative_distance(m)
+        21
+        """
+        pending = []
+        node = self
+        while node.parent is not None and not node._valid_for(dmap):
+            pending.append(node)
+            node = node.parent
+        total = 0 if node.parent is None else node._cumulative
+        for node in reversed(pending):
+            leg = dmap.distance(node.parent.city, node.city)
+            if leg > 0:
+                total += leg
+            node._cumulative = total
+            node._dmap = dmap
+            node._version = dmap.version()
+        return total
+
+    def _valid_for(self, dmap: DistanceMap) -> bool:
+        """Return True iff <_cumulative> was computed with <dmap> as it is
+        now."""
+        return self._dmap is dmap and self._version == dmap.version()
+
+
+class RouteTrie:
+    """A trie of truck routes, with one root per depot.
+
+    === Private Attributes ===
+    _roots: the root node of each depot.
+    """
+    _roots: Dict[str, RouteNode]
+
+    def __init__(self) -> None:
+        """Create an empty RouteTrie."""
+        self._roots = {}
+
+    def root(self, depot: str) -> RouteNode:
+        """Return the node of the route that only visits <depot>."""
+        node = self._roots.get(depot)
+        if node is None:
+            node = RouteNode(depot)
+            self._roots[depot] = node
+        return node
+
+    def node_for(self, route: List[str]) -> RouteNode:
+        """Return the node of <route>, whose first city is its depot.
+
+        >>> trie = RouteTrie()
+        >>> a = trie.node_for(['Toronto', 'Hamilton', 'London'])
+        >>> b = trie.node_for(['Toronto', 'Hamilton'])
+        >>> a.parent is b
+        True
+        >>> trie.num_nodes()
+        3
+        """
+        node = self.root(route[0])
+        for city in route[1:]:
+            node = node.child(city)
+        return node
+
+    def num_nodes(self) -> int:
+        """Return the number of distinct route prefixes in this trie."""
+        count = 0
+        stack = list(self._roots.values())
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children.values())
+        return count
+
+    def fill(self, dmap: DistanceMap) -> None:
+        """Compute the cumulative distance of every prefix in this trie
+        according to <dmap>, visiting each prefix once.
+        """
+        version = dmap.version()
+        stack: List[Tuple[RouteNode, int]] = \
+            [(root, 0) for root in self._roots.values()]
+        while stack:
+            node, total = stack.pop()
+            for child in node.children.values():
+                if child._valid_for(dmap):
+                    stack.append((child, child._cumulative))
+                    continue
+                leg = dmap.distance(node.city, child.city)
+                child_total = total + leg if leg > 0 else total
+                child._cumulative = child_total
+                child._dmap = dmap
+                child._version = version
+                stack.append((child, child_total))
+
+
+def route_distance(node: RouteNode, depot: str, dmap: DistanceMap) -> int:
+    """Return the length of the route ending at <node>, including the final
+    leg back to <depot>, according to <dmap>. Legs with no positive distance
+    in <dmap> count as 0.
+
+    >>> m = DistanceMap()
+    >>> m.add_distance('Toronto', 'Hamilton', 9)
+    >>> route_distance(RouteTrie().node_for(['Toronto', 'Hamilton']),
+    ...                'Toronto', m)
+    18
+    """
+    total = node.cumulative_distance(dmap)
+    if node.city != depot:
+        final = dmap.distance(node.city, depot)
+        if final > 0:
+            total += final
+    return total
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'distance_map'],
+        'disable': ['E1136', 'W0212'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
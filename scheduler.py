@@ -13,12 +13,20 @@ Sophia Huynh, Myriam Majedi, and Jaisie Sin.
 ===== Module Description =====
 This module contains the abstract Scheduler class, as well as the two
 subclasses RandomScheduler and GreedyScheduler, which implement the two
-scheduling algorithms described in the handout.
+scheduling algorithms described in the handout. InsertionScheduler refines
+the routes built by GreedyScheduler, and AnytimeScheduler keeps improving a
+greedy schedule until a deadline.
 """
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Iterable, Iterator, Union, Set, \
+    Tuple, Optional
 from random import shuffle, choice
+from itertools import groupby
+import time
 from container import PriorityQueue
-from domain import Parcel, Truck
+from external_sort import ExternalSorter
+from domain import Parcel, Truck, Fleet
+from distance_map import DistanceMap
+from improve import LocalSearch, leg_length
 
 
 class Scheduler:
@@ -85,6 +93,29 @@ class RandomScheduler(Scheduler):
         return unpacked
 
 
+class ChangeSet:
+    """Changes to a scheduling problem after its parcels were scheduled.
+
+    === Public Attributes ===
+    added: the new parcels to schedule.
+    cancelled: the IDs of the parcels that no longer need delivering.
+    broken: the IDs of the trucks that can no longer make deliveries.
+    """
+    added: List[Parcel]
+    cancelled: List[int]
+    broken: List[int]
+
+    def __init__(self, added: Optional[List[Parcel]] = None,
+                 cancelled: Optional[List[int]] = None,
+                 broken: Optional[List[int]] = None) -> None:
+        """Create a ChangeSet adding the parcels in <added>, cancelling the
+        parcels with IDs in <cancelled> and removing the trucks with IDs in
+        <broken>."""
+        self.added = [] if added is None else added
+        self.cancelled = [] if cancelled is None else cancelled
+        self.broken = [] if broken is None else broken
+
+
 class GreedyScheduler(Scheduler):
     """
     A scheduler that allocate parcels to trucks based on parcel order and truck
@@ -93,35 +124,197 @@ class GreedyScheduler(Scheduler):
     === Private Attributes ===
     _par_method: comparison function for ordering parcel for allocation
     _truck_order: the order of trucks to get parcel allocation
+    _grouped: whether each run of consecutive parcels with the same
+      destination is packed as a group. Set by the 'group_by_destination'
+      config key, and most useful with parcel_priority 'destination'.
+    _on_route: whether trucks whose route already stops anywhere at a
+      parcel's destination are preferred for it, and take it without adding
+      a stop, rather than only trucks whose last stop is there. Set by the
+      'prefer_on_route' config key.
+    _sorter: the ExternalSorter ordering parcels in at most the
+      'memory_budget' of the config parcels at a time, or None if parcels
+      are ordered in memory. The budget bounds the memory the ordering
+      takes, not the memory of a list of parcels given to schedule.
     """
     _par_method: Callable[[Parcel, Parcel], bool]
     _truck_order: str
+    _grouped: bool
+    _on_route: bool
+    _sorter: Optional[ExternalSorter]
 
-    def __init__(self, config: Dict[str, str]) -> None:
+    def __init__(self, config: Dict[str, Union[str, bool]]) -> None:
         """initialize GreedyScheduler"""
         pf = {'non-decreasing': {'volume': _pvnd, 'destination': _pdnd},
               'non-increasing': {'volume': _pvni, 'destination': _pdni}}
         self._par_method = pf[config['parcel_order']][config['parcel_priority']]
         self._truck_order = config['truck_order']
+        self._grouped = bool(config.get('group_by_destination', False))
+        self._on_route = bool(config.get('prefer_on_route', False))
+        self._sorter = None
+        if config.get('memory_budget'):
+            self._sorter = ExternalSorter(self._par_method,
+                                          int(config['memory_budget']),
+                                          config.get('spill_directory'))
 
     def schedule(self, parcels: List[Parcel], trucks: List[Truck],
                  verbose: bool = False) -> List[Parcel]:
         """Schedule the given <parcels> onto the given <trucks> by Parcel
-        priority, parcel order, and truck order """
+        priority, parcel order, and truck order
+
+        >>> s = GreedyScheduler({'parcel_priority': 'volume',
+        ...                      'parcel_order': 'non-increasing',
+        ...                      'truck_order': 'non-increasing',
+        ...                      'prefer_on_route': True})
+        >>> f = Fleet()
+        >>> t1, t2 = Truck(1, 20, 'Toronto'), Truck(2, 10, 'Toronto')
+        >>> f.add_truck(t1)
+        >>> f.add_truck(t2)
+        >>> s.schedule([Parcel(1, 8, 'Toronto', 'Ottawa'),
+        ...             Parcel(2, 6, 'Toronto', 'Kingston'),
+        ...             Parcel(3, 2, 'Toronto', 'Ottawa')], f.trucks)
+        []
+        >>> t1.route, [p.id_ for p in t1.parcels]
+        (['Toronto', 'Ottawa', 'Kingston'], [1, 2, 3])
+        """
         unpacked = []
-        ordered_parcels = self._order_parcels(parcels)
-        while not ordered_parcels.is_empty():
-            priority_parcel = ordered_parcels.remove()
-            eligible_trucks = _eligible_trucks(trucks, priority_parcel)
+        visiting = self._visiting(trucks)
+        ordered_parcels = self._parcel_stream(parcels)
+        if self._grouped:
+            for _, group in groupby(ordered_parcels, _destination):
+                self._pack_group(group, trucks, unpacked, visiting)
+            return unpacked
+        for priority_parcel in ordered_parcels:
+            eligible_trucks = _eligible_trucks(trucks, priority_parcel,
+                                               visiting)
             if not eligible_trucks:
                 unpacked.append(priority_parcel)
             else:
                 ordered_trucks = self._order_trucks(eligible_trucks)
-                ordered_trucks.remove().pack(priority_parcel)
+                self._pack(ordered_trucks.remove(), priority_parcel)
         return unpacked
 
+    def repair(self, fleet: Fleet, unscheduled: List[Parcel],
+               changes: ChangeSet, verbose: bool = False) -> List[Parcel]:
+        """Update the schedule of <fleet>, which left <unscheduled>
+        unscheduled, for <changes>, and return the parcels now unscheduled.
+
+        Cancelled parcels are unpacked from their trucks, and broken trucks
+        are removed from <fleet>. Only the parcels of broken trucks, the
+        added parcels and the parcels in <unscheduled> (which may fit in the
+        space freed by cancellations) are then scheduled, onto the trucks of
+        <fleet> as they are, by the same rules as schedule. Trucks that no
+        change touches keep their parcels and routes.
+
+        Raise ValueError, leaving <fleet> unchanged, if a broken truck is
+        not in <fleet>.
+
+        >>> s = GreedyScheduler({'parcel_priority': 'volume',
+        ...                      'parcel_order': 'non-increasing',
+        ...                      'truck_order': 'non-increasing'})
+        >>> f = Fleet()
+        >>> t1, t2 = Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')
+        >>> f.add_truck(t1)
+        >>> f.add_truck(t2)
+        >>> s.schedule([Parcel(1, 8, 'Toronto', 'Ottawa'),
+        ...             Parcel(2, 6, 'Toronto', 'Kingston')], f.trucks)
+        []
+        >>> c = ChangeSet([Parcel(3, 2, 'Toronto', 'Guelph')], [2], [1])
+        >>> left = s.repair(f, [], c)
+        >>> [p.id_ for p in left], [p.id_ for p in t2.parcels], t2.route
+        ([], [1, 3], ['Toronto', 'Ottawa', 'Guelph'])
+        >>> s.repair(f, [], ChangeSet([], [], [7]))
+        Traceback (most recent call last):
+        ...
+        ValueError: broken truck 7 is not in the fleet
+        """
+        broken = [fleet.truck_by_id(truck_id) for truck_id in changes.broken]
+        for truck_id, truck in zip(changes.broken, broken):
+            if truck is None:
+                raise ValueError(f'broken truck {truck_id} is not in the fleet')
+        cancelled = set(changes.cancelled)
+        pending = [p for p in unscheduled if p.id_ not in cancelled]
+        for parcel_id in changes.cancelled:
+            truck = fleet.truck_carrying(parcel_id)
+            if truck is not None:
+                truck.unpack(next(p for p in truck.parcels
+                                  if p.id_ == parcel_id))
+        for truck in broken:
+            fleet.remove_truck(truck)
+            pending.extend(truck.parcels)
+        pending.extend(changes.added)
+        return self.schedule(pending, fleet.trucks, verbose)
+
+    def _pack_group(self, group: Iterable[Parcel], trucks: List[Truck],
+                    unpacked: List[Parcel],
+                    visiting: Optional[Callable[[str], List[Truck]]]) \
+            -> None:
+        """Pack <group>, parcels that share a destination, onto <trucks>.
+
+        A truck is chosen for the first parcel by the usual eligibility rules
+        and truck order, and the following parcels go onto the same truck
+        for as long as they fit. Only then is a truck chosen again.
+        Parcels that fit on no truck are appended to <unpacked>.
+        """
+        truck = None
+        for parcel in group:
+            if truck is None or not truck.packable(parcel):
+                eligible_trucks = _eligible_trucks(trucks, parcel, visiting)
+                if not eligible_trucks:
+                    unpacked.append(parcel)
+                    continue
+                truck = self._order_trucks(eligible_trucks).remove()
+            self._pack(truck, parcel)
+
+    def _pack(self, truck: Truck, parcel: Parcel) -> None:
+        """Pack <parcel> onto <truck>, which has room for it."""
+        if self._on_route and truck.visits(parcel.destination):
+            # Inserting a stop the route already makes adds none.
+            truck.pack(parcel, len(truck.route))
+        else:
+            truck.pack(parcel)
+
+    def _visiting(self, trucks: List[Truck]) \
+            -> Optional[Callable[[str], List[Truck]]]:
+        """Return the function giving the trucks of <trucks> whose route
+        stops at a city, if trucks on the route to a parcel's destination
+        are preferred, or None if not.
+
+        The fleet's index is used when <trucks> are exactly the trucks of a
+        fleet; otherwise <trucks> are scanned.
+        """
+        if not self._on_route:
+            return None
+        fleet = trucks[0]._fleet if trucks else None
+        if fleet is not None and fleet.trucks is trucks:
+            return fleet.trucks_visiting
+        return lambda city: [t for t in trucks if t.visits(city)]
+
     # ----- Helper methods for Parcels -----
 
+    def spill_report(self) -> Dict[str, int]:
+        """Return how much ordering the parcels of the last schedule spilled
+        to disk."""
+        if self._sorter is None:
+            return {'spilled_runs': 0, 'spilled_items': 0,
+                    'spilled_bytes': 0}
+        return self._sorter.report()
+
+    def _parcel_stream(self, parcels: Iterable[Parcel]) -> Iterator[Parcel]:
+        """Yield <parcels> in the order they should be scheduled.
+
+        With a memory budget, <parcels> are ordered by an external merge
+        sort. If <parcels> is a list, only their indexes are spilled to disk
+        and the parcels themselves are yielded. It may also be any other
+        iterable, such as experiment.iter_parcels, but then parcels spilled
+        to disk are scheduled as copies, with city names no longer interned.
+        """
+        if self._sorter is not None:
+            yield from self._sorter.sort(parcels)
+            return
+        ordered_parcels = self._order_parcels(parcels)
+        while not ordered_parcels.is_empty():
+            yield ordered_parcels.remove()
+
     def _order_parcels(self, parcels: List[Parcel]) -> PriorityQueue:
         """Transform the <parcels> into a Queue based on parcel_order in either
         non-decreasing or non-increasing order."""
@@ -144,13 +337,244 @@ class GreedyScheduler(Scheduler):
         return ordered_trucks
 
 
-def _eligible_trucks(trucks: List[Truck], parcel: Parcel) \
+class InsertionScheduler(GreedyScheduler):
+    """
+    A GreedyScheduler that, instead of appending each new stop to the end of
+    the chosen truck's route, inserts it where it adds the least distance to
+    the route (including the final leg back to the depot). A parcel whose
+    destination is already on the route adds no stop.
+
+    === Private Attributes ===
+    _dmap: the distances used to price insertions.
+    _legs: for each truck by ID, the length of each leg of its route, the
+      last being the leg back to the depot, as known to this scheduler.
+    _stops: for each truck by ID, the cities on its route.
+    """
+    _dmap: DistanceMap
+    _legs: Dict[int, List[int]]
+    _stops: Dict[int, Set[str]]
+
+    def __init__(self, config: Dict[str, Union[str, bool]],
+                 dmap: DistanceMap) -> None:
+        """initialize InsertionScheduler to price insertions with <dmap>"""
+        GreedyScheduler.__init__(self, config)
+        self._dmap = dmap
+        self._legs = {}
+        self._stops = {}
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks> by Parcel
+        priority, parcel order, and truck order, inserting each new stop at
+        its cheapest position.
+
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> m.add_distance('Toronto', 'London', 20)
+        >>> m.add_distance('Hamilton', 'London', 12)
+        >>> s = InsertionScheduler({'parcel_priority': 'volume',
+        ...                         'parcel_order': 'non-increasing',
+        ...                         'truck_order': 'non-increasing'}, m)
+        >>> t = Truck(1, 10, 'Toronto')
+        >>> s.schedule([Parcel(1, 5, 'Toronto', 'London'),
+        ...             Parcel(2, 4, 'Toronto', 'Hamilton')], [t])
+        []
+        >>> t.route, t.distance(m)
+        (['Toronto', 'Hamilton', 'London'], 41)
+        """
+        self._legs = {}
+        self._stops = {}
+        return GreedyScheduler.schedule(self, parcels, trucks, verbose)
+
+    def _route_of(self, truck: Truck) -> Tuple[List[int], Set[str]]:
+        """Return the cached leg lengths and stops of <truck>, computing them
+        if the truck is new to this scheduler or its route was changed by
+        something else."""
+        legs = self._legs.get(truck.id_)
+        if legs is None or len(legs) != len(truck.route):
+            route = truck.route
+            legs = [leg_length(self._dmap, route[i], route[i + 1])
+                    for i in range(len(route) - 1)]
+            legs.append(leg_length(self._dmap, route[-1], truck.depot)
+                        if route[-1] != truck.depot else 0)
+            self._legs[truck.id_] = legs
+            self._stops[truck.id_] = set(route)
+        return legs, self._stops[truck.id_]
+
+    def _pack(self, truck: Truck, parcel: Parcel) -> None:
+        """Pack <parcel> onto <truck>, which has room for it, inserting its
+        destination where it adds the least distance."""
+        legs, stops = self._route_of(truck)
+        city = parcel.destination
+        if city in stops:
+            truck.pack(parcel, len(truck.route))
+            return
+        route = truck.route
+        depot = truck.depot
+        # Each candidate is priced in O(1) from two distance lookups and the
+        # cached length of the leg it replaces.
+        distance = self._dmap.distance
+        best = 0
+        best_cost = None
+        for k in range(1, len(route) + 1):
+            before = distance(route[k - 1], city)
+            after = distance(city, route[k] if k < len(route) else depot)
+            cost = (before if before > 0 else 0) \
+                + (after if after > 0 else 0) - legs[k - 1]
+            if best_cost is None or cost < best_cost:
+                best, best_cost = k, cost
+        nxt = route[best] if best < len(route) else depot
+        legs[best - 1:best] = [
+            leg_length(self._dmap, route[best - 1], city),
+            leg_length(self._dmap, city, nxt)]
+        stops.add(city)
+        truck.pack(parcel, best)
+
+
+class AnytimeScheduler(Scheduler):
+    """
+    A scheduler that can be stopped at a deadline and still give a valid
+    schedule. It first makes a fast greedy schedule, then improves it with
+    local search (see improve.LocalSearch), restarting the search from the
+    best schedule so far with a new random seed whenever it stalls, until
+    the deadline or until a whole search finds no improvement. Since the
+    search only ever keeps moves that improve the schedule, the trucks hold
+    the best schedule found at every point.
+
+    === Private Attributes ===
+    _first: the scheduler making the initial greedy schedule.
+    _dmap: the distances used to measure routes.
+    _seconds: the time allowed to schedule when schedule is called.
+    """
+    _first: GreedyScheduler
+    _dmap: DistanceMap
+    _seconds: float
+
+    def __init__(self, config: Dict[str, Union[str, bool]],
+                 dmap: DistanceMap) -> None:
+        """initialize AnytimeScheduler to finish within the
+        'deadline_seconds' of <config>, starting from the greedy schedule
+        <config> describes."""
+        if config.get('routing') == 'insertion':
+            self._first = InsertionScheduler(config, dmap)
+        else:
+            self._first = GreedyScheduler(config)
+        self._dmap = dmap
+        self._seconds = float(config.get('deadline_seconds', 1.0))
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the given <parcels> onto the given <trucks>, taking at
+        most about <self._seconds> seconds.
+
+        <trucks> are improved together as the trucks of their fleet if they
+        are exactly those trucks, or of a fleet made for the purpose, which
+        they leave again afterwards, if they are in no fleet. Trucks that
+        are only some of the trucks of a fleet are scheduled greedily, with
+        no improvement, since moves are priced on a whole fleet.
+
+        If <verbose> is True, print the statistics of the fleet each time
+        the schedule improves.
+        """
+        progress = print if verbose else None
+        deadline = time.monotonic() + self._seconds
+        fleet = trucks[0]._fleet if trucks else None
+        if fleet is not None and fleet.trucks is trucks:
+            return self.schedule_until(parcels, fleet, deadline, progress)
+        if any(truck._fleet is not None for truck in trucks):
+            return self._first.schedule(parcels, trucks, verbose)
+        fleet = Fleet()
+        for truck in trucks:
+            fleet.add_truck(truck)
+        try:
+            return self.schedule_until(parcels, fleet, deadline, progress)
+        finally:
+            for truck in trucks:
+                fleet.remove_truck(truck)
+
+    def schedule_until(self, parcels: List[Parcel], fleet: Fleet,
+                       deadline: float,
+                       progress: Optional[Callable[
+                           [Dict[str, Union[int, float]]], None]] = None) \
+            -> List[Parcel]:
+        """Schedule <parcels> onto the trucks of <fleet>, improving the
+        schedule until time.monotonic() reaches <deadline> or a search from
+        a new seed finds no improvement, and return the parcels left
+        unscheduled.
+
+        <progress>, if given, is called with the statistics of the fleet
+        after the greedy schedule and after each improvement; the search
+        carries on when it returns.
+
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> m.add_distance('Toronto', 'London', 20)
+        >>> m.add_distance('Hamilton', 'London', 12)
+        >>> s = AnytimeScheduler({'parcel_priority': 'volume',
+        ...                       'parcel_order': 'non-increasing',
+        ...                       'truck_order': 'non-increasing'}, m)
+        >>> f = Fleet()
+        >>> f.add_truck(Truck(1, 10, 'Toronto'))
+        >>> f.add_truck(Truck(2, 10, 'Toronto'))
+        >>> seen = []
+        >>> s.schedule_until([Parcel(1, 6, 'Toronto', 'Hamilton'),
+        ...                   Parcel(2, 4, 'Toronto', 'London')], f,
+        ...                  time.monotonic() + 0.05, seen.append)
+        []
+        >>> [stats['trucks_used'] for stats in seen]
+        [2, 1]
+        >>> g = Fleet()
+        >>> g.add_truck(Truck(3, 10, 'Toronto'))
+        >>> left = s.schedule_until([Parcel(3, 11, 'Toronto', 'London')], g,
+        ...                         time.monotonic() + 0.05, seen.append)
+        >>> [p.id_ for p in left], seen[-1]['avg_fullness']
+        ([3], 0.0)
+        """
+        unscheduled = self._first.schedule(parcels, fleet.trucks)
+        search = LocalSearch(fleet, unscheduled, self._dmap)
+
+        def _report(*_: object) -> None:
+            if progress is not None:
+                progress(self._stats(fleet, search.unscheduled))
+        _report()
+        seed = 0
+        while time.monotonic() < deadline:
+            if len(search.run(deadline, _report)) == 1:
+                # Not one improvement: the schedule is a local optimum.
+                break
+            seed += 1
+            search = LocalSearch(fleet, search.unscheduled, self._dmap, seed)
+        return search.unscheduled
+
+    def _stats(self, fleet: Fleet, unscheduled: List[Parcel]) \
+            -> Dict[str, Union[int, float]]:
+        """Return the statistics of the schedule of <fleet>, which left
+        <unscheduled> unscheduled, all read from the fleet's running
+        totals. The average fullness is 0.0 while every truck is empty."""
+        used = fleet.num_nonempty_trucks()
+        return {'trucks_used': used,
+                'avg_distance': fleet.average_distance_travelled(self._dmap),
+                'avg_fullness': fleet.average_fullness() if used else 0.0,
+                'unused_space': fleet.total_unused_space(),
+                'unscheduled': len(unscheduled)}
+
+
+def _eligible_trucks(trucks: List[Truck], parcel: Parcel,
+                     visiting: Optional[Callable[[str], List[Truck]]] = None) \
         -> List[Truck]:
     """Filter eligible trucks for <parcel> from <trucks>.
     An eligible truck must have enough unused space for <parcel>.
-    If there are trucks with the same last stop as the parcel destination,
-    then only these trucks will be eligible.
+    If <visiting> is given, it gives the trucks whose route stops at a city,
+    and if any of them that stop at the parcel destination have room, only
+    these trucks will be eligible.
+    Otherwise, if there are trucks with the same last stop as the parcel
+    destination, then only these trucks will be eligible.
     """
+    if visiting is not None:
+        on_route = [truck for truck in visiting(parcel.destination)
+                    if truck.packable(parcel)]
+        if on_route:
+            return on_route
     packable_trucks = []
     for truck in trucks:
         if truck.packable(parcel):
@@ -165,6 +589,11 @@ def _eligible_trucks(trucks: List[Truck], parcel: Parcel) \
     return eligible
 
 
+def _destination(parcel: Parcel) -> str:
+    """Return the destination of <parcel>."""
+    return parcel.destination
+
+
 def _pvnd(p1: Parcel, p2: Parcel) -> bool:
     """verify if <p1> is smaller in volume than <p2>.
     pvnd: parcel volume non-decreasing
@@ -241,7 +670,9 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'allowed-io': ['compare_algorithms'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'random', 'container', 'domain'],
-        'disable': ['E1136'],
+                                   'random', 'itertools', 'time',
+                                   'container', 'external_sort', 'domain',
+                                   'distance_map', 'improve'],
+        'disable': ['E1136', 'W0212'],
         'max-attributes': 15,
     })
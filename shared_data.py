@@ -0,0 +1,342 @@
+"""Assignment 1 - Shared-memory problem data for worker processes
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module lets worker processes schedule the same problem without each
+being sent a pickled copy of its parcels and distances, or sending a pickled
+Fleet back.
+
+A SharedProblem publishes the parcels, as integer columns, and the distances,
+as a dense matrix indexed by city number, in shared memory blocks. A worker
+attaches to them by name through the small SharedHandle, reading distances
+straight from the shared matrix through a SharedDistanceMap. It sends back
+only three arrays of integers, which apply_allocation turns into a schedule
+of the parent's own parcels and trucks.
+"""
+from typing import List, Dict, Tuple, Union, Any
+from array import array
+from multiprocessing import shared_memory
+from distance_map import DistanceMap
+from domain import Parcel, Fleet
+
+# The number of integer columns describing each parcel: ID, volume, and the
+# city numbers of its source and destination.
+_PARCEL_COLUMNS = 4
+
+# What a worker sends back: the truck index of each parcel (-1 if the
+# scheduler left it unscheduled, -2 if it neither packed it nor returned it,
+# as RandomScheduler may when it picks a full truck), the parcel indexes on
+# each truck in order, and for each truck its number of stops followed by
+# their city numbers.
+Allocation = Tuple['array[int]', 'array[int]', 'array[int]']
+
+
+def _block(size: int) -> shared_memory.SharedMemory:
+    """Return a new shared memory block big enough for <size> bytes."""
+    return shared_memory.SharedMemory(create=True, size=max(size, 8))
+
+
+class SharedHandle:
+    """What a worker needs to attach to a SharedProblem. It is small enough
+    to pickle cheaply.
+
+    === Public Attributes ===
+    parcel_block: the name of the block of parcel columns.
+    matrix_block: the name of the block of the distance matrix.
+    num_parcels: the number of parcels.
+    cities: the name of each city, by city number.
+    """
+    parcel_block: str
+    matrix_block: str
+    num_parcels: int
+    cities: List[str]
+
+    def __init__(self, parcel_block: str, matrix_block: str,
+                 num_parcels: int, cities: List[str]) -> None:
+        """Create the handle of the blocks named <parcel_block> and
+        <matrix_block>."""
+        self.parcel_block = parcel_block
+        self.matrix_block = matrix_block
+        self.num_parcels = num_parcels
+        self.cities = cities
+
+
+class SharedProblem:
+    """The parcels and distances of a problem, published in shared memory.
+    Use it as a context manager, so that the blocks are freed at the end.
+
+    === Public Attributes ===
+    handle: the handle workers attach with.
+
+    === Private Attributes ===
+    _blocks: the shared memory blocks owned by this problem.
+    """
+    handle: SharedHandle
+    _blocks: List[shared_memory.SharedMemory]
+
+    def __init__(self, parcels: List[Parcel], dmap: DistanceMap) -> None:
+        """Publish <parcels> and the distances in <dmap>."""
+        cities = list(dict.fromkeys(
+            dmap.cities() + [p.source for p in parcels]
+            + [p.destination for p in parcels]))
+        number = {city: i for i, city in enumerate(cities)}
+        n = len(cities)
+
+        columns = _block(8 * _PARCEL_COLUMNS * len(parcels))
+        view = columns.buf.cast('q')
+        for i, parcel in enumerate(parcels):
+            k = _PARCEL_COLUMNS * i
+            view[k] = parcel.id_
+            view[k + 1] = parcel.volume
+            view[k + 2] = number[parcel.source]
+            view[k + 3] = number[parcel.destination]
+        view.release()
+
+        matrix = _block(8 * n * n)
+        view = matrix.buf.cast('q')
+        if n:
+            view[:n * n] = array('q', [-1]) * (n * n)
+        for city in dmap.cities():
+            base = number[city] * n
+            for other, distance in dmap.row(city).items():
+                view[base + number[other]] = distance
+        view.release()
+
+        self._blocks = [columns, matrix]
+        self.handle = SharedHandle(columns.name, matrix.name, len(parcels),
+                                   cities)
+
+    def close(self) -> None:
+        """Free the shared memory blocks of this problem."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedProblem':
+        """Return this problem, for use in a with statement."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Free the shared memory blocks of this problem."""
+        self.close()
+
+
+class SharedDistanceMap(DistanceMap):
+    """A read-only DistanceMap whose distances are read from a dense matrix
+    in shared memory, without copying it.
+
+    === Private Attributes ===
+    _matrix: the distance from city i to city j at index i * n + j, where n
+      is the number of cities, or -1 if there is none.
+    _names: the name of each city, by city number.
+    _number: the city number of each city, by name.
+    _rows: the rows built by row so far, by city.
+    """
+    _matrix: memoryview
+    _names: List[str]
+    _number: Dict[str, int]
+    _rows: Dict[str, Dict[str, int]]
+
+    def __init__(self, matrix: memoryview, names: List[str]) -> None:
+        """Create the map of the distances in <matrix>, between the cities
+        <names>."""
+        DistanceMap.__init__(self)
+        self._matrix = matrix
+        self._names = names
+        self._number = {city: i for i, city in enumerate(names)}
+        self._rows = {}
+
+    def distance(self, city_a: str, city_b: str) -> int:
+        """Return the distance from <city_a> to <city_b>, or -1 if there is
+        none."""
+        i = self._number.get(city_a)
+        j = self._number.get(city_b)
+        if i is None or j is None:
+            return -1
+        return self._matrix[i * len(self._names) + j]
+
+    def row(self, city: str) -> Dict[str, int]:
+        """Return the distances from <city> to other cities, by city. The
+        result must not be mutated."""
+        row = self._rows.get(city)
+        if row is None:
+            row = {}
+            i = self._number.get(city)
+            if i is not None:
+                n = len(self._names)
+                for j, name in enumerate(self._names):
+                    distance = self._matrix[i * n + j]
+                    if distance != -1:
+                        row[name] = distance
+            self._rows[city] = row
+        return row
+
+    def cities(self) -> List[str]:
+        """Return every city this map numbers."""
+        return list(self._names)
+
+    def add_distance(self, city_a: str, city_b: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """Raise TypeError, since a SharedDistanceMap is read-only.
+
+        >>> matrix = memoryview(array('q', [0, 5, 5, 0]))
+        >>> d = SharedDistanceMap(matrix, ['Toronto', 'Ottawa'])
+        >>> d.add_distance('Toronto', 'Ottawa', 5)
+        Traceback (most recent call last):
+        ...
+        TypeError: SharedDistanceMap is read-only
+        """
+        raise TypeError('SharedDistanceMap is read-only')
+
+
+class SharedView:
+    """A worker's read-only attachment to a SharedProblem. Use it as a
+    context manager, so that it is detached at the end.
+
+    === Public Attributes ===
+    handle: the handle this view was attached with.
+    dmap: the distances of the problem.
+
+    === Private Attributes ===
+    _blocks: the attached shared memory blocks.
+    _views: the memoryviews into <_blocks>, released on detaching.
+    """
+    handle: SharedHandle
+    dmap: SharedDistanceMap
+    _blocks: List[shared_memory.SharedMemory]
+    _views: List[memoryview]
+
+    def __init__(self, handle: SharedHandle) -> None:
+        """Attach to the problem published with <handle>."""
+        self.handle = handle
+        self._blocks = [shared_memory.SharedMemory(handle.parcel_block),
+                        shared_memory.SharedMemory(handle.matrix_block)]
+        self._views = [block.buf.cast('q') for block in self._blocks]
+        self.dmap = SharedDistanceMap(self._views[1], handle.cities)
+
+    def parcels(self) -> List[Parcel]:
+        """Return the parcels of the problem, in the order published."""
+        columns = self._views[0]
+        names = self.handle.cities
+        parcels = []
+        for i in range(self.handle.num_parcels):
+            k = _PARCEL_COLUMNS * i
+            parcels.append(Parcel(columns[k], columns[k + 1],
+                                  names[columns[k + 2]],
+                                  names[columns[k + 3]]))
+        return parcels
+
+    def close(self) -> None:
+        """Detach from the problem. Neither <dmap> nor the parcels' columns
+        may be read afterwards."""
+        for view in self._views:
+            view.release()
+        for block in self._blocks:
+            block.close()
+        self._views = []
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedView':
+        """Return this view, for use in a with statement."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Detach from the problem."""
+        self.close()
+
+
+def encode_allocation(fleet: Fleet, parcels: List[Parcel],
+                      unscheduled: List[Parcel],
+                      cities: List[str]) -> Allocation:
+    """Return the schedule of <parcels> onto the trucks of <fleet>, which
+    left <unscheduled> unscheduled, as an Allocation, numbering cities by
+    their index in <cities>.
+
+    Parcels are numbered by their index in <parcels>, so it must be in the
+    order the parcels were published in, not one a scheduler reordered.
+    """
+    index = {id(parcel): i for i, parcel in enumerate(parcels)}
+    number = {city: i for i, city in enumerate(cities)}
+    truck_of = array('q', [-2]) * len(parcels)
+    for parcel in unscheduled:
+        truck_of[index[id(parcel)]] = -1
+    packed = array('q')
+    stops = array('q')
+    for t, truck in enumerate(fleet.trucks):
+        for parcel in truck.parcels:
+            truck_of[index[id(parcel)]] = t
+            packed.append(index[id(parcel)])
+        stops.append(len(truck.route) - 1)
+        stops.extend(number[city] for city in truck.route[1:])
+    return truck_of, packed, stops
+
+
+def apply_allocation(fleet: Fleet, parcels: List[Parcel], cities: List[str],
+                     allocation: Allocation) -> List[Parcel]:
+    """Schedule <parcels> onto the empty trucks of <fleet> as recorded in
+    <allocation>, whose city numbers index <cities>, and return the parcels
+    left unscheduled.
+
+    Precondition: the trucks of <fleet> are empty and in the same order as
+    the fleet <allocation> was encoded from.
+    """
+    truck_of, packed, stops = allocation
+    for i in packed:
+        fleet.trucks[truck_of[i]].pack(parcels[i])
+    k = 0
+    for truck in fleet.trucks:
+        route = [truck.depot] + [cities[c] for c in
+                                 stops[k + 1:k + 1 + stops[k]]]
+        k += 1 + stops[k]
+        if route != truck.route:
+            # Routes that were not built by appending stops in pack order.
+            fleet.set_route(truck, route)
+    return [parcels[i] for i in range(len(parcels)) if truck_of[i] == -1]
+
+
+def schedule_shared(handle: SharedHandle,
+                    config: Dict[str, Union[str, bool]],
+                    rows: List[Tuple[int, int]]) -> Allocation:
+    """Schedule the problem published with <handle> as <config> says, onto
+    a fleet with a truck for each (truck ID, capacity) in <rows>, and return
+    the schedule as an Allocation. This is meant to run in a worker process.
+    """
+    # pylint: disable=import-outside-toplevel
+    from experiment import build_fleet, make_scheduler
+    with SharedView(handle) as view:
+        parcels = view.parcels()
+        fleet = build_fleet(rows, config['depot_location'])
+        scheduler = make_scheduler(config, view.dmap)
+        # Schedulers may reorder the list they are given, as RandomScheduler
+        # does, so they get a copy and <parcels> keeps the published order.
+        unscheduled = scheduler.schedule(list(parcels), fleet.trucks)
+        return encode_allocation(fleet, parcels, unscheduled, handle.cities)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'array',
+                                   'multiprocessing', 'distance_map',
+                                   'domain', 'experiment'],
+        'disable': ['E1136', 'W0212'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
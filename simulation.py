@@ -0,0 +1,215 @@
+"""Assignment 1 - Simulating a day of deliveries
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class DeliverySimulation, which plays out the day
+of a scheduled Fleet: every truck leaves its depot at time 0, drives its
+route at a constant speed, delivering the parcels for each city the first
+time it stops there, and drives back to its depot.
+
+The simulation is driven by events, kept in a heap ordered by time. Each
+truck has at most one event in the heap at a time, its arrival at its next
+stop, so the heap never holds more events than there are trucks, and the
+whole day costs O(s log t) for s stops on t trucks. Leg lengths are taken
+from a DistanceMap, a missing or non-positive distance counting as 0, as
+Truck.distance does.
+"""
+from typing import List, Dict, Tuple
+from array import array
+import heapq
+from distance_map import DistanceMap
+from domain import Fleet
+
+
+class SimulationResult:
+    """The time series of a simulated day of deliveries. Entry i of each
+    series describes the fleet just after everything happening at times[i].
+
+    === Public Attributes ===
+    times: the times at which something happened, in increasing order,
+      starting with 0.
+    on_road: the number of trucks that have left their depot and not yet
+      returned.
+    delivered: the number of parcels delivered so far.
+    return_times: the time each truck of the fleet, in order, is back at its
+      depot, or 0 for trucks that never leave it.
+
+    === Representation Invariants ===
+    - len(times) == len(on_road) == len(delivered)
+    """
+    times: 'array[float]'
+    on_road: 'array[int]'
+    delivered: 'array[int]'
+    return_times: 'array[float]'
+
+    def __init__(self, num_trucks: int) -> None:
+        """Create the empty result of simulating <num_trucks> trucks."""
+        self.times = array('d')
+        self.on_road = array('q')
+        self.delivered = array('q')
+        self.return_times = array('d', bytes(8 * num_trucks))
+
+    def makespan(self) -> float:
+        """Return the time the last truck is back at its depot."""
+        return self.times[-1] if self.times else 0.0
+
+    def series(self) -> List[Tuple[float, int, int]]:
+        """Return the (time, trucks on the road, parcels delivered) of every
+        entry of this result."""
+        return list(zip(self.times, self.on_road, self.delivered))
+
+
+class DeliverySimulation:
+    """A discrete-event simulation of the trucks of a scheduled Fleet
+    driving their routes.
+
+    === Public Attributes ===
+    speed: the distance each truck drives per unit of time.
+
+    === Private Attributes ===
+    _routes: the route of each truck, in fleet order.
+    _drops: for each truck, the number of its parcels going to each city.
+    _dmap: the distances the trucks drive.
+
+    === Representation Invariants ===
+    - speed > 0
+    - len(<_routes>) == len(<_drops>)
+    """
+    speed: float
+    _routes: List[List[str]]
+    _drops: List[Dict[str, int]]
+    _dmap: DistanceMap
+
+    def __init__(self, fleet: Fleet, dmap: DistanceMap,
+                 speed: float = 1.0) -> None:
+        """Initialize the simulation of the scheduled trucks of <fleet>,
+        driving the distances in <dmap> at <speed>."""
+        self.speed = speed
+        self._dmap = dmap
+        self._routes = []
+        self._drops = []
+        for truck in fleet.trucks:
+            self._routes.append(list(truck.route))
+            drops = {}
+            for parcel in truck.parcels:
+                drops[parcel.destination] = \
+                    drops.get(parcel.destination, 0) + 1
+            self._drops.append(drops)
+
+    def run(self) -> SimulationResult:
+        """Simulate the day and return its time series.
+
+        >>> from domain import Truck, Parcel
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> m.add_distance('Toronto', 'London', 20)
+        >>> m.add_distance('Hamilton', 'London', 12)
+        >>> f = Fleet()
+        >>> t1, t2 = Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')
+        >>> f.add_truck(t1)
+        >>> f.add_truck(t2)
+        >>> t1.pack(Parcel(1, 2, 'Toronto', 'Hamilton'))
+        True
+        >>> t1.pack(Parcel(2, 2, 'Toronto', 'London'))
+        True
+        >>> t2.pack(Parcel(3, 2, 'Toronto', 'Hamilton'))
+        True
+        >>> result = DeliverySimulation(f, m).run()
+        >>> result.series()
+        [(0.0, 2, 0), (9.0, 2, 2), (18.0, 1, 2), (21.0, 1, 3), (41.0, 0, 3)]
+        >>> list(result.return_times)
+        [41.0, 18.0]
+        """
+        result = SimulationResult(len(self._routes))
+        routes = self._routes
+        drops = [dict(d) for d in self._drops]
+        on_road = 0
+        delivered = 0
+        heap = []
+        for i, route in enumerate(routes):
+            if len(route) > 1:
+                heap.append((self._leg(route[0], route[1]), i, 1))
+                on_road += 1
+            else:
+                # Parcels for the depot itself are delivered on the spot.
+                delivered += sum(drops[i].values())
+                drops[i].clear()
+        heapq.heapify(heap)
+        self._record(result, 0.0, on_road, delivered)
+
+        dmap = self._dmap
+        speed = self.speed
+        while heap:
+            now, i, k = heap[0]
+            route = routes[i]
+            if k == len(route):
+                # Back at the depot, delivering any parcels for it.
+                heapq.heappop(heap)
+                on_road -= 1
+                result.return_times[i] = now
+                delivered += sum(drops[i].values())
+                drops[i].clear()
+            else:
+                city = route[k]
+                delivered += drops[i].pop(city, 0)
+                nxt = route[k + 1] if k + 1 < len(route) else route[0]
+                distance = dmap.distance(city, nxt)
+                if distance > 0:
+                    heapq.heapreplace(heap, (now + distance / speed, i, k + 1))
+                else:
+                    heapq.heapreplace(heap, (now, i, k + 1))
+            if not heap or heap[0][0] != now:
+                self._record(result, now, on_road, delivered)
+        return result
+
+    def _leg(self, city_a: str, city_b: str) -> float:
+        """Return the time it takes to drive from <city_a> to <city_b>."""
+        distance = self._dmap.distance(city_a, city_b)
+        return distance / self.speed if distance > 0 else 0.0
+
+    @staticmethod
+    def _record(result: SimulationResult, now: float, on_road: int,
+                delivered: int) -> None:
+        """Append the state of the fleet at time <now> to <result>, replacing
+        the last entry if it was also at <now>."""
+        if result.times and result.times[-1] == now:
+            result.on_road[-1] = on_road
+            result.delivered[-1] = delivered
+            return
+        result.times.append(now)
+        result.on_road.append(on_road)
+        result.delivered.append(delivered)
+
+
+def simulate(fleet: Fleet, dmap: DistanceMap,
+             speed: float = 1.0) -> SimulationResult:
+    """Return the time series of a day of the scheduled trucks of <fleet>
+    driving the distances in <dmap> at <speed>."""
+    return DeliverySimulation(fleet, dmap, speed).run()
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'array',
+                                   'heapq', 'distance_map', 'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,153 @@
+"""Assignment 1 - Snapshots of parsed input files
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Myriam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class SnapshotStore. It saves the result of parsing
+a data file as a binary (pickle) snapshot next to that file, and loads the
+snapshot instead of parsing the file again for as long as the file is
+unchanged.
+
+A snapshot starts with a small header recording what kind of data it holds
+and the size and modification time (or the content hash) of the file it was
+made from, so a stale snapshot is detected without unpickling its data.
+"""
+from typing import Any, Callable, Dict, Union
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+# Bump this whenever the layout of what is stored in snapshots changes.
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_SUFFIX = '.snapshot'
+
+
+def _file_hash(path: str) -> str:
+    """Return the sha256 hash of the contents of the file at <path>."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Loads parsed data files from snapshots, making snapshots as needed.
+
+    === Public Attributes ===
+    verify: 'stat' to treat a file as unchanged while its size and
+      modification time are, or 'hash' to compare content hashes instead.
+    hits: the number of loads served from a snapshot.
+    misses: the number of loads that had to parse the file.
+    load_seconds: the total time spent loading snapshots.
+    parse_seconds: the total time spent parsing files and writing snapshots.
+
+    === Representation Invariants ===
+    - verify in ('stat', 'hash')
+    """
+    verify: str
+    hits: int
+    misses: int
+    load_seconds: float
+    parse_seconds: float
+
+    def __init__(self, verify: str = 'stat') -> None:
+        """Create a SnapshotStore that checks files using <verify>."""
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds = 0.0
+        self.parse_seconds = 0.0
+
+    def _signature(self, path: str, kind: str) -> Dict[str, Any]:
+        """Return the header a snapshot of <kind> data for the file at <path>
+        must have to be used."""
+        info = os.stat(path)
+        header = {'format': SNAPSHOT_FORMAT, 'kind': kind,
+                  'size': info.st_size}
+        if self.verify == 'hash':
+            header['sha256'] = _file_hash(path)
+        else:
+            header['mtime_ns'] = info.st_mtime_ns
+        return header
+
+    def load(self, path: str, kind: str, parse: Callable[[], Any]) -> Any:
+        """Return the <kind> data parsed from the file at <path>, from its
+        snapshot if that is up to date, or else by calling <parse> and saving
+        the result as a new snapshot.
+        """
+        start = time.perf_counter()
+        header = self._signature(path, kind)
+        snapshot = path + SNAPSHOT_SUFFIX
+        try:
+            with open(snapshot, 'rb') as file:
+                if pickle.load(file) == header:
+                    data = pickle.load(file)
+                    self.hits += 1
+                    self.load_seconds += time.perf_counter() - start
+                    return data
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            pass
+        data = parse()
+        try:
+            # A temporary file of its own, so that processes loading the same
+            # file never write over each other's half-written snapshots.
+            handle, temp = tempfile.mkstemp(
+                dir=os.path.dirname(snapshot) or os.curdir,
+                prefix=os.path.basename(snapshot), suffix='.tmp')
+        except OSError:
+            # A read-only data directory only costs us the snapshot.
+            handle = None
+        if handle is not None:
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+                os.replace(temp, snapshot)
+            except OSError:
+                os.remove(temp)
+        self.misses += 1
+        self.parse_seconds += time.perf_counter() - start
+        return data
+
+    def report(self) -> Dict[str, Union[int, float]]:
+        """Return the hit rate and timings of this store.
+
+        >>> SnapshotStore().report()['hit_rate']
+        0.0
+        """
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'load_seconds': self.load_seconds,
+                'parse_seconds': self.parse_seconds}
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['_file_hash', 'load'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'hashlib', 'os', 'pickle', 'tempfile',
+                                   'time'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()